@@ -0,0 +1,72 @@
+"""Measure the per-request overhead of the rate limiting / admission middleware.
+
+Requests are driven straight through the ASGI interface (no sockets), so the
+numbers are the cost of the middleware itself. For scale, the same loop through
+the full app's ``GET /`` is shown last.
+
+Usage: python -m benchmarks.bench_admission
+"""
+import asyncio
+import statistics
+
+from benchmarks.common import setup_environment
+
+setup_environment("admission")
+
+from core.rate_limit import AdmissionController, AdmissionMiddleware, InMemoryBackend, RateLimitRule  # noqa: E402
+
+REQUESTS = 20000
+ROUNDS = 5
+
+async def plain_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message):
+    pass
+
+def scope(method: str, path: str) -> dict:
+    return {
+        "type": "http", "method": method, "path": path, "query_string": b"", "root_path": "",
+        "headers": [(b"host", b"bench")], "client": ("10.0.0.1", 5000), "server": ("bench", 80),
+    }
+
+async def per_request_us(app, request_scope: dict) -> float:
+    samples = []
+    for _ in range(ROUNDS):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for _ in range(REQUESTS):
+            await app(request_scope, receive, send)
+        samples.append((loop.time() - start) * 1e6 / REQUESTS)
+    return statistics.median(samples)
+
+def controller(rules) -> AdmissionController:
+    return AdmissionController(rules, InMemoryBackend(100000), max_concurrent=15, queue_timeout=0.25)
+
+async def run():
+    # A bucket large enough that nothing is rejected during the run
+    rule = RateLimitRule("vote", ("POST",), "/polls/{poll_id}/vote", "ip", 10 ** 9, 1)
+    cases = [
+        ("no middleware", plain_app, scope("GET", "/polls/")),
+        ("no matching rule", AdmissionMiddleware(plain_app, controller([rule])), scope("GET", "/polls/")),
+        ("token bucket hit", AdmissionMiddleware(plain_app, controller([rule])), scope("POST", "/polls/7/vote")),
+        ("concurrency off", AdmissionMiddleware(plain_app, AdmissionController([rule], InMemoryBackend(10), 0, 0)), scope("GET", "/polls/")),
+    ]
+
+    baseline = None
+    print(f"{'case':<18} {'us/request':>10} {'overhead us':>12}")
+    for name, app, request_scope in cases:
+        cost = await per_request_us(app, request_scope)
+        baseline = cost if baseline is None else baseline
+        print(f"{name:<18} {cost:>10.2f} {cost - baseline:>12.2f}")
+
+    from main import app as full_app
+    cost = await per_request_us(full_app, scope("GET", "/"))
+    print(f"{'full app GET /':<18} {cost:>10.2f}")
+
+if __name__ == "__main__":
+    asyncio.run(run())
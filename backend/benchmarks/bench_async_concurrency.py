@@ -0,0 +1,82 @@
+"""Compare sync and async (DB_ASYNC) request handling under concurrent load.
+
+Starts a uvicorn server per mode against the same seeded database and drives
+authenticated GET /polls/{id} and GET /polls?limit=20 requests from N
+concurrent clients, reporting requests/second and latency percentiles.
+
+Usage: python -m benchmarks.bench_async_concurrency [--duration 10] [--clients 50 200 1000]
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.common import percentile, seed_polls, setup_environment, start_server, stop_server
+
+DATABASE_URL = setup_environment("async_concurrency")
+
+from core.database import SessionLocal, engine  # noqa: E402
+from core.migrations import run_migrations  # noqa: E402
+from utils.auth import create_access_token  # noqa: E402
+
+import httpx  # noqa: E402
+
+PORT = 8791
+
+async def drive(clients: int, duration: float, poll_ids, tokens):
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(index: int):
+            nonlocal errors
+            headers = {"Authorization": f"Bearer {tokens[index % len(tokens)]}"}
+            while time.perf_counter() < deadline:
+                if random.random() < 0.8:
+                    url = f"/polls/{random.choice(poll_ids)}"
+                else:
+                    url = "/polls/?limit=20"
+                start = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=headers)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(clients)))
+        elapsed = time.perf_counter() - started
+    return len(latencies) / elapsed, percentile(latencies, 50), percentile(latencies, 99), errors
+
+def run(duration: float, client_counts):
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        user_ids, poll_ids = seed_polls(db, 500)
+        from models.models import User
+        usernames = [row[0] for row in db.query(User.username).filter(User.id.in_(user_ids)).all()]
+    finally:
+        db.close()
+    tokens = [create_access_token({"sub": username}) for username in usernames]
+
+    print(f"{'mode':>6} {'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for async_mode in (False, True):
+        server = start_server(PORT, DATABASE_URL=DATABASE_URL, DB_ASYNC=async_mode)
+        try:
+            for clients in client_counts:
+                rps, p50, p99, errors = asyncio.run(drive(clients, duration, poll_ids, tokens))
+                mode = "async" if async_mode else "sync"
+                print(f"{mode:>6} {clients:>8} {rps:>9.1f} {p50:>9.1f} {p99:>9.1f} {errors:>7}")
+        finally:
+            stop_server(server)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200, 1000])
+    args = parser.parse_args()
+    run(args.duration, args.clients)
@@ -0,0 +1,113 @@
+"""Multi-threaded increment and read microbenchmark for the counter engine.
+
+Writer threads count votes on one hot poll (or spread over many polls) while
+reader threads keep reading that poll's counts, as the details endpoint would.
+Runs the engine with a single stripe (one lock for every increment) and with
+COUNTER_ENGINE_STRIPES stripes, and, for contrast, the per-vote SQL counter
+UPDATEs the engine replaces.
+
+On a build with the GIL, threads never increment truly in parallel, so the
+striped and single-lock numbers stay close; the gap shows on free-threaded
+builds and grows with the number of cores.
+
+Usage: python -m benchmarks.bench_counter_engine [--threads 1 2 4 8] [--seconds 2]
+"""
+import argparse
+import sys
+import threading
+import time
+
+from benchmarks.common import seed_polls, setup_environment
+
+setup_environment("counter_engine")
+
+from core.config import COUNTER_ENGINE_STRIPES  # noqa: E402
+from core.database import SessionLocal, engine  # noqa: E402
+from core.migrations import run_migrations  # noqa: E402
+from models.models import PollOption  # noqa: E402
+from services.counter_engine import CounterEngine  # noqa: E402
+from services.counter_service import vote_counter_updates  # noqa: E402
+
+READERS = 2
+
+def seed(poll_count: int):
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        _, poll_ids = seed_polls(db, poll_count, voters=2, likers=1)
+        options = {}
+        for option_id, poll_id in db.query(PollOption.id, PollOption.poll_id).order_by(PollOption.id):
+            options.setdefault(poll_id, []).append(option_id)
+        return poll_ids, options
+    finally:
+        db.close()
+
+def drive(increment, read, targets, threads: int, seconds: float):
+    """Run writers and readers for ``seconds``; returns (increments/s, reads/s)."""
+    stop = threading.Event()
+    increments = [0] * threads
+    reads = [0] * READERS
+
+    def writer(index: int):
+        count = 0
+        n = len(targets)
+        while not stop.is_set():
+            for _ in range(100):
+                poll_id, option_id = targets[(index + count) % n]
+                increment(poll_id, option_id)
+                count += 1
+        increments[index] = count
+
+    def reader(index: int):
+        count = 0
+        while not stop.is_set():
+            read()
+            count += 1
+        reads[index] = count
+
+    workers = [threading.Thread(target=writer, args=(i,)) for i in range(threads)]
+    workers += [threading.Thread(target=reader, args=(i,)) for i in range(READERS if read else 0)]
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    return sum(increments) / seconds, sum(reads) / seconds
+
+def sql_increment(poll_id: int, option_id: int):
+    db = SessionLocal()
+    try:
+        for statement in vote_counter_updates(poll_id, option_id):
+            db.execute(statement)
+        db.commit()
+    finally:
+        db.close()
+
+def run(thread_counts, seconds: float):
+    poll_ids, options = seed(100)
+    hot = poll_ids[0]
+    scenarios = {
+        "hot poll": [(hot, option_id) for option_id in options[hot]],
+        "100 polls": [(poll_id, option_id) for poll_id in poll_ids for option_id in options[poll_id]],
+    }
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"GIL {'enabled' if gil else 'disabled'}; {READERS} reader threads on the hot poll\n")
+    print(f"{'scenario':<10} {'counter':<12} {'threads':>7} {'increments/s':>13} {'reads/s':>10}")
+    for scenario, targets in scenarios.items():
+        for label, stripes in (("1 stripe", 1), (f"{COUNTER_ENGINE_STRIPES} stripes", COUNTER_ENGINE_STRIPES)):
+            counters = CounterEngine(stripes, max_polls=10000, flush_interval=1, reconcile_interval=60)
+            counters.increment_many(targets)  # load the polls up front
+            for threads in thread_counts:
+                rate, read_rate = drive(counters.try_increment, lambda: counters.counts(hot), targets, threads, seconds)
+                print(f"{scenario:<10} {label:<12} {threads:>7} {rate:>13,.0f} {read_rate:>10,.0f}")
+        for threads in thread_counts:
+            rate, _ = drive(sql_increment, None, targets, threads, seconds)
+            print(f"{scenario:<10} {'SQL UPDATE':<12} {threads:>7} {rate:>13,.0f} {'':>10}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=2)
+    args = parser.parse_args()
+    run(args.threads, args.seconds)
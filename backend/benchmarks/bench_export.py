@@ -0,0 +1,44 @@
+"""Measure streaming vote exports: throughput, peak memory and pool usage.
+
+Seeds one poll per size with that many votes and consumes the export body
+the way a download would. Peak Python memory should stay flat as the vote
+count grows, and no pooled connection should be checked out between batches,
+i.e. while the client is receiving data.
+
+Usage: python -m benchmarks.bench_export [--sizes 100000 1000000]
+"""
+import argparse
+import tracemalloc
+
+from benchmarks.common import setup_environment, timed
+
+setup_environment("export")
+
+from benchmarks.seed import seed_dataset  # noqa: E402
+from core.database import engine  # noqa: E402
+from services.export_service import export_votes  # noqa: E402
+
+def run(sizes):
+    print(f"{'votes':>9} {'format':<11} {'seconds':>8} {'rows/s':>10} {'MiB out':>8} {'peak MiB':>9} {'held while sending':>19}")
+    for size in sizes:
+        manifest = seed_dataset(engine, users=size, polls=1, votes=size, likes=0)
+        poll_id = manifest["polls"]["first_id"]
+        for format, gzip in (("csv", False), ("ndjson", True)):
+            sent = 0
+            held = 0
+            tracemalloc.start()
+            with timed() as t:
+                for chunk in export_votes(engine, [poll_id], format, gzip):
+                    sent += len(chunk)
+                    held = max(held, engine.pool.checkedout())
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            seconds = t["elapsed"] / 1000
+            label = format + (".gz" if gzip else "")
+            print(f"{size:>9} {label:<11} {seconds:>8.2f} {size / seconds:>10.0f} {sent / 2 ** 20:>8.1f} {peak / 2 ** 20:>9.1f} {held:>19}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100000, 1000000])
+    args = parser.parse_args()
+    run(args.sizes)
@@ -0,0 +1,74 @@
+"""Compare OFFSET and keyset (cursor) pagination on the newest-polls feed.
+
+Seeds enough polls for ``--pages`` pages and times fetching page 1 and the
+last page with both strategies (poll rows only, no detail assembly).
+
+Usage: python -m benchmarks.bench_feed_pagination [--pages 10000] [--page-size 20]
+"""
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+from benchmarks.common import setup_environment, timed
+
+setup_environment("feed_pagination")
+
+from core.database import SessionLocal, engine  # noqa: E402
+from core.migrations import run_migrations  # noqa: E402
+from models.models import Poll, User  # noqa: E402
+from services.feed_service import feed_statement, paginate  # noqa: E402
+
+def seed(poll_count: int):
+    db = SessionLocal()
+    try:
+        if db.query(Poll.id).count() >= poll_count:
+            return
+        db.execute(User.__table__.insert(), [{"username": "feed_bench", "email": "feed@example.com", "hashed_password": "x"}])
+        creator_id = db.query(User.id).filter(User.username == "feed_bench").scalar()
+        # One poll per second, like a busy but realistic feed
+        base = datetime(2024, 1, 1)
+        batch = 50000
+        for start in range(0, poll_count, batch):
+            db.execute(Poll.__table__.insert(), [
+                {"title": f"Feed poll {i}", "creator_id": creator_id, "created_at": base + timedelta(seconds=i)}
+                for i in range(start, min(poll_count, start + batch))
+            ])
+        db.commit()
+    finally:
+        db.close()
+
+def measure(fn, repeat: int = 5) -> float:
+    samples = []
+    for _ in range(repeat):
+        with timed() as t:
+            fn()
+        samples.append(t["elapsed"])
+    return statistics.median(samples)
+
+def run(pages: int, page_size: int):
+    run_migrations(engine)
+    seed(pages * page_size + 1)
+    db = SessionLocal()
+    try:
+        # Cursor that points just before the last page
+        rows = db.execute(feed_statement("newest", page_size, skip=(pages - 2) * page_size)).all()
+        _, deep_cursor = paginate(rows, "newest", page_size)
+
+        cases = {
+            ("offset", 1): lambda: db.execute(feed_statement("newest", page_size)).all(),
+            ("offset", pages): lambda: db.execute(feed_statement("newest", page_size, skip=(pages - 1) * page_size)).all(),
+            ("cursor", 1): lambda: db.execute(feed_statement("newest", page_size)).all(),
+            ("cursor", pages): lambda: db.execute(feed_statement("newest", page_size, cursor=deep_cursor)).all(),
+        }
+        print(f"{'strategy':>8} {'page':>7} {'median ms':>10}")
+        for (strategy, page), fn in cases.items():
+            print(f"{strategy:>8} {page:>7} {measure(fn):>10.2f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args()
+    run(args.pages, args.page_size)
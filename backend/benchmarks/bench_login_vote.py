@@ -0,0 +1,100 @@
+"""Measure vote latency during a login storm, with and without the hashing pool.
+
+Runs the server twice against the same database: once hashing inline
+(PASSWORD_HASH_WORKERS=0) and once with the process pool. Each run drives
+concurrent logins alongside concurrent voters and reports vote p50/p99 and
+login throughput/rejections.
+
+Usage: python -m benchmarks.bench_login_vote [--duration 10] [--login-clients 32] [--vote-clients 32]
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.common import percentile, seed_polls, setup_environment, start_server, stop_server
+
+DATABASE_URL = setup_environment("login_vote")
+
+from core.database import SessionLocal, engine  # noqa: E402
+from core.migrations import run_migrations  # noqa: E402
+from models.models import PollOption, User  # noqa: E402
+from utils.auth import create_access_token, get_password_hash  # noqa: E402
+
+import httpx  # noqa: E402
+
+PORT = 8792
+PASSWORD = "benchmark-password"
+
+def seed(vote_clients: int, poll_count: int):
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        _, poll_ids = seed_polls(db, poll_count, voters=5)
+        hashed = get_password_hash(PASSWORD)
+        db.query(User).update({User.hashed_password: hashed})
+        db.execute(User.__table__.insert(), [
+            {"username": f"voter_{run}_{i}", "email": f"voter_{run}_{i}@example.com", "hashed_password": hashed}
+            for run in range(2) for i in range(vote_clients)
+        ])
+        db.commit()
+        options = dict(db.query(PollOption.poll_id, PollOption.id).filter(PollOption.poll_id.in_(poll_ids)).all())
+        login_users = [row[0] for row in db.query(User.username).filter(User.username.like("bench_user_%")).all()]
+    finally:
+        db.close()
+    return poll_ids, options, login_users
+
+async def drive(duration: float, login_clients: int, vote_clients: int, run: int, poll_ids, options, login_users):
+    vote_latencies = []
+    logins = {"ok": 0, "rejected": 0, "other": 0}
+    limits = httpx.Limits(max_connections=login_clients + vote_clients)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits, timeout=120) as client:
+        deadline = time.perf_counter() + duration
+
+        async def login_worker(index: int):
+            username = login_users[index % len(login_users)]
+            while time.perf_counter() < deadline:
+                response = await client.post("/auth/login", data={"username": username, "password": PASSWORD})
+                key = "ok" if response.status_code == 200 else "rejected" if response.status_code in (429, 503) else "other"
+                logins[key] += 1
+
+        async def vote_worker(index: int):
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': f'voter_{run}_{index}'})}"}
+            for poll_id in poll_ids:
+                if time.perf_counter() >= deadline:
+                    break
+                start = time.perf_counter()
+                await client.post(f"/polls/{poll_id}/vote", json={"option_id": options[poll_id]}, headers=headers)
+                vote_latencies.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(
+            *(login_worker(i) for i in range(login_clients)),
+            *(vote_worker(i) for i in range(vote_clients)),
+        )
+    return vote_latencies, logins
+
+def run(duration: float, login_clients: int, vote_clients: int):
+    poll_ids, options, login_users = seed(vote_clients, 2000)
+
+    print(f"{'hashing':>8} {'votes':>7} {'vote p50':>9} {'vote p99':>9} {'logins ok':>10} {'rejected':>9}")
+    for run_index, workers in enumerate((0, None)):
+        env = {"DATABASE_URL": DATABASE_URL}
+        if workers is not None:
+            env["PASSWORD_HASH_WORKERS"] = workers
+        server = start_server(PORT, **env)
+        try:
+            latencies, logins = asyncio.run(
+                drive(duration, login_clients, vote_clients, run_index, poll_ids, options, login_users)
+            )
+        finally:
+            stop_server(server)
+        mode = "inline" if workers == 0 else "pool"
+        print(f"{mode:>8} {len(latencies):>7} {percentile(latencies, 50):>9.1f} "
+              f"{percentile(latencies, 99):>9.1f} {logins['ok']:>10} {logins['rejected']:>9}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--login-clients", type=int, default=32)
+    parser.add_argument("--vote-clients", type=int, default=32)
+    args = parser.parse_args()
+    run(args.duration, args.login_clients, args.vote_clients)
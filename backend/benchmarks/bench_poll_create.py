@@ -0,0 +1,106 @@
+"""Measure poll creation: the single-transaction path and the bulk import.
+
+Creates polls one at a time through ``create_poll_service`` and through the
+previous path (insert the poll, commit, add options one by one, commit, read
+the details back), reporting statements and median latency per poll. Then
+streams an NDJSON upload through ``import_polls`` and reports its throughput
+and peak Python memory, which stays flat as the upload grows.
+
+Usage: python -m benchmarks.bench_poll_create [--polls 500] [--import-polls 20000 100000]
+"""
+import argparse
+import asyncio
+import statistics
+import tracemalloc
+
+import orjson
+
+from benchmarks.common import QueryCounter, setup_environment, timed
+
+setup_environment("poll_create")
+
+from core.database import SessionLocal, engine  # noqa: E402
+from core.migrations import run_migrations  # noqa: E402
+from core.token_cache import UserSnapshot  # noqa: E402
+from models.models import Poll, PollOption, User  # noqa: E402
+from schemas.schemas import PollCreate  # noqa: E402
+from services.poll_import_service import import_polls  # noqa: E402
+from services.poll_service import create_poll_service, get_poll_with_details, insert_polls, invalidate_poll  # noqa: E402
+
+OPTIONS = ["Option one", "Option two", "Option three", "Option four"]
+
+def previous_create(poll_data: PollCreate, creator: User, db) -> dict:
+    """Poll creation as it worked before the single-transaction path."""
+    db_poll = Poll(title=poll_data.title, description=poll_data.description, creator_id=creator.id)
+    db.add(db_poll)
+    db.commit()
+    db.refresh(db_poll)
+    for option_text in poll_data.options:
+        db.add(PollOption(text=option_text, poll_id=db_poll.id))
+    db.commit()
+    invalidate_poll(db_poll.id)
+    return get_poll_with_details(db_poll.id, creator.id, db)
+
+def bench_create(db, creator: User, count: int):
+    print(f"{'path':<16} {'statements/poll':>16} {'median ms':>10}")
+    for name, create in (("previous", previous_create), ("single txn", create_poll_service)):
+        samples = []
+        with QueryCounter(engine) as counter:
+            for i in range(count):
+                poll = PollCreate(title=f"Created poll {i}", description="Benchmark", options=OPTIONS)
+                with timed() as t:
+                    create(poll, creator, db)
+                samples.append(t["elapsed"])
+        print(f"{name:<16} {counter.count / count:>16.1f} {statistics.median(samples):>10.2f}")
+
+def ndjson_chunks(count: int, chunk_size: int = 64 * 1024):
+    """The upload as an HTTP server would deliver it, generated on the fly."""
+    async def chunks():
+        buffer = bytearray()
+        for i in range(count):
+            buffer += orjson.dumps({"title": f"Imported poll {i}", "description": "Benchmark", "options": OPTIONS}) + b"\n"
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        if buffer:
+            yield bytes(buffer)
+    return chunks()
+
+def bench_import(db, creator: User, sizes):
+    print(f"\n{'imported polls':>14} {'seconds':>8} {'polls/s':>9} {'peak MiB':>9}")
+
+    async def insert_batch(polls):
+        insert_polls(polls, creator.id, db)
+        db.commit()
+
+    for size in sizes:
+        tracemalloc.start()
+        with timed() as t:
+            result = asyncio.run(import_polls(ndjson_chunks(size), "ndjson", insert_batch))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert result["imported"] == size, result
+        seconds = t["elapsed"] / 1000
+        print(f"{size:>14} {seconds:>8.2f} {size / seconds:>9.0f} {peak / 2 ** 20:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--import-polls", type=int, nargs="+", default=[20000, 100000])
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        user = User(username="bench_creator", email="bench_creator@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        # What get_current_user hands the routes
+        creator = UserSnapshot.from_user(user)
+        bench_create(db, creator, args.polls)
+        bench_import(db, creator, args.import_polls)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
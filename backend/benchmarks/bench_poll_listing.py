@@ -0,0 +1,38 @@
+"""Compare per-poll and batched poll listing.
+
+Usage: python -m benchmarks.bench_poll_listing
+"""
+from benchmarks.common import QueryCounter, seed_polls, setup_environment, timed
+
+setup_environment("poll_listing")
+
+from core.database import SessionLocal, engine  # noqa: E402
+from models.models import Base, Poll  # noqa: E402
+from services.poll_service import get_poll_with_details, get_polls_with_details, poll_details_cache  # noqa: E402
+
+PAGE_SIZES = [10, 100, 1000]
+
+def run():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user_ids, _ = seed_polls(db, max(PAGE_SIZES))
+        viewer_id = user_ids[0]
+
+        print(f"{'page':>6} {'mode':>9} {'queries':>8} {'ms':>10}")
+        for page_size in PAGE_SIZES:
+            for mode in ("per-poll", "batched"):
+                db.expire_all()
+                poll_details_cache.clear()
+                with QueryCounter(engine) as counter, timed() as t:
+                    polls = db.query(Poll).filter(Poll.is_active == True).limit(page_size).all()
+                    if mode == "per-poll":
+                        [get_poll_with_details(poll.id, viewer_id, db) for poll in polls]
+                    else:
+                        get_polls_with_details(polls, viewer_id, db)
+                print(f"{page_size:>6} {mode:>9} {counter.count:>8} {t['elapsed']:>10.1f}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,100 @@
+"""Time full-text poll search against a LIKE scan.
+
+Seeds ``--polls`` polls whose titles, descriptions and options are drawn from
+a Zipf-distributed vocabulary: a few stop words, the most frequent as in real
+text, then made-up words ranging from matching a few polls to about a fifth
+of them. Builds the index with
+``rebuild_search_index`` and reports p50/p95 for the first page and a cursor
+page per query, plus one ``LIKE '%term%'`` scan for comparison. Every match is
+ranked, so the time grows with the number of matches.
+
+Usage: python -m benchmarks.bench_search [--polls 1000000] [--rounds 50]
+"""
+import argparse
+import itertools
+import random
+
+from benchmarks.common import percentile, setup_environment, timed
+
+setup_environment("search")
+
+from sqlalchemy import func, or_, select  # noqa: E402
+
+from benchmarks.seed import BulkLoader  # noqa: E402
+from core.database import SessionLocal, engine  # noqa: E402
+from core.migrations import run_migrations  # noqa: E402
+from models.models import Poll, PollOption  # noqa: E402
+from services.search_service import paginate_search, rebuild_search_index, search_statement  # noqa: E402
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "po", "ve", "da", "zu", "fe", "gi", "ho", "ja", "mu", "ba", "se", "to", "wy"]
+LEADING_STOP_WORDS = ["the", "what", "is", "your", "of", "a", "to", "you", "do", "for"]
+PAGE_SIZE = 20
+
+def made_up_words():
+    return ["".join(parts) for parts in itertools.product(SYLLABLES, repeat=3)]
+
+def seed(poll_count: int, words):
+    rng = random.Random(42)
+    weights = list(itertools.accumulate(1 / rank ** 0.9 for rank in range(1, len(words) + 1)))
+
+    def text(count):
+        return " ".join(rng.choices(words, cum_weights=weights, k=count))
+
+    loader = BulkLoader(engine)
+    loader.load("users", ("id", "username", "email", "hashed_password", "is_active"), [(1, "search_bench", "search@example.com", "x", True)])
+    loader.load("polls", ("id", "title", "description", "creator_id", "is_active", "total_votes", "like_count", "version"), (
+        (poll_id, text(4), text(10), 1, True, 0, 0, 0) for poll_id in range(1, poll_count + 1)
+    ))
+    loader.load("poll_options", ("id", "text", "poll_id", "vote_count"), (
+        ((poll_id - 1) * 4 + j + 1, text(2), poll_id, 0) for poll_id in range(1, poll_count + 1) for j in range(4)
+    ))
+
+def run(poll_count: int, rounds: int):
+    run_migrations(engine)
+    words = made_up_words()
+    db = SessionLocal()
+    try:
+        if not db.execute(select(func.count()).select_from(Poll)).scalar():
+            seed(poll_count, LEADING_STOP_WORDS + words)
+        with timed() as t:
+            indexed = rebuild_search_index(db)
+        print(f"Indexed {indexed:,} polls in {t['elapsed'] / 1000:.1f} s\n")
+
+        dialect = engine.dialect.name
+        queries = [words[0], words[9], words[99], words[999], words[-1], f"{words[0]} {words[99]}", f"{words[9]} {words[999]}", "what is the"]
+        print(f"{'query':<16} {'matches':>9} {'page 1 p50':>11} {'p95 ms':>7} {'page 2 p50':>11} {'p95 ms':>7}")
+        for q in queries:
+            statement = search_statement(dialect, q, PAGE_SIZE)
+            if statement is None:
+                print(f"{q!r:<16} only stop words; answered without a query")
+                continue
+            matches = db.execute(search_statement(dialect, q, 10 ** 9)).all()
+            _, cursor = paginate_search(db.execute(statement).all(), PAGE_SIZE)
+            results = []
+            for page_cursor in (None, cursor):
+                samples = []
+                for _ in range(rounds):
+                    with timed() as t:
+                        db.execute(search_statement(dialect, q, PAGE_SIZE, page_cursor)).all()
+                    samples.append(t["elapsed"])
+                results += [percentile(samples, 50), percentile(samples, 95)]
+            print(f"{q:<16} {len(matches):>9,} {results[0]:>11.2f} {results[1]:>7.2f} {results[2]:>11.2f} {results[3]:>7.2f}")
+
+        # Without an index every query reads every poll and option, however few match
+        term = f"%{words[-1]}%"
+        with timed() as t:
+            db.execute(
+                select(Poll.id).outerjoin(PollOption, PollOption.poll_id == Poll.id)
+                .where(Poll.is_active == True, or_(Poll.title.like(term), Poll.description.like(term), PollOption.text.like(term)))
+                .distinct()
+            ).all()
+        print(f"\nLIKE scan for {words[-1]!r} (unranked): {t['elapsed']:.0f} ms")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--polls", type=int, default=1000000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    run(args.polls, args.rounds)
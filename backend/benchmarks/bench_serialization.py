@@ -0,0 +1,67 @@
+"""Compare per-poll serialization cost of the default FastAPI path and TrustedJSONResponse.
+
+The default path validates the route's return value into ``List[PollResponse]``,
+dumps it back to JSON-compatible data and encodes it with the standard ``json``
+module, which is what FastAPI does for a plain-dict return value.
+
+Usage: python -m benchmarks.bench_serialization
+"""
+import json
+import statistics
+from typing import List
+
+from benchmarks.common import seed_polls, setup_environment, timed
+
+setup_environment("serialization")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+
+from core.database import SessionLocal, engine  # noqa: E402
+from core.responses import TrustedJSONResponse  # noqa: E402
+from models.models import Base, Poll  # noqa: E402
+from schemas.schemas import PollResponse  # noqa: E402
+from services.poll_service import get_polls_with_details  # noqa: E402
+
+PAGE_SIZES = [1, 10, 100]
+ROUNDS = 200
+
+poll_list = TypeAdapter(List[PollResponse])
+
+def default_path(details: List[dict]) -> bytes:
+    content = poll_list.dump_python(poll_list.validate_python(details), mode="json")
+    return JSONResponse(content).body
+
+def trusted_path(details: List[dict]) -> bytes:
+    return TrustedJSONResponse(details).body
+
+def run():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user_ids, _ = seed_polls(db, max(PAGE_SIZES))
+        polls = db.query(Poll).order_by(Poll.id).all()
+        details = get_polls_with_details(polls, user_ids[0], db)
+    finally:
+        db.close()
+
+    # Both paths must produce the same document
+    assert json.loads(default_path(details)) == json.loads(trusted_path(details))
+
+    print(f"{'page':>6} {'path':>8} {'us/poll':>9} {'speedup':>8}")
+    for page_size in PAGE_SIZES:
+        page = details[:page_size]
+        per_poll = {}
+        for name, render in (("default", default_path), ("trusted", trusted_path)):
+            samples = []
+            for _ in range(ROUNDS):
+                with timed() as t:
+                    render(page)
+                samples.append(t["elapsed"] * 1000 / page_size)
+            per_poll[name] = statistics.median(samples)
+        for name in ("default", "trusted"):
+            speedup = per_poll["default"] / per_poll[name]
+            print(f"{page_size:>6} {name:>8} {per_poll[name]:>9.1f} {speedup:>7.1f}x")
+
+if __name__ == "__main__":
+    run()
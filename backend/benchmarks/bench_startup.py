@@ -0,0 +1,86 @@
+"""Time cold start: importing the app, reaching /health/ready, and serve.py with N workers.
+
+Each sample is a fresh interpreter, so module caches and the import system
+start cold (bytecode caches are warm). Reports medians of:
+
+- ``import main`` as it is now, against importing passlib and jose up front
+  the way earlier releases did, plus applying migrations at import time;
+- one ``uvicorn main:app`` process until /health/ready answers, with and
+  without MIGRATE_ON_STARTUP (the schema is already current either way);
+- ``serve.py --workers N`` until /health/ready answers.
+
+Usage: python -m benchmarks.bench_startup [--rounds 7] [--workers 1 2 4]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import BACKEND_DIR, setup_environment
+
+setup_environment("startup")
+
+import httpx  # noqa: E402
+
+IMPORT_VARIANTS = {
+    "import main": "import main",
+    "eager passlib + jose": "import jose.jwt, passlib.context, main",
+    "eager + migrate at import": (
+        "import jose.jwt, passlib.context, main; "
+        "from core.migrations import run_migrations; run_migrations(main.engine)"
+    ),
+}
+
+def import_time(statement: str) -> float:
+    code = f"import time; start = time.perf_counter(); {statement}; print((time.perf_counter() - start) * 1000)"
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    return float(result.stdout.split()[-1])
+
+def time_to_ready(command, port: int, **env_overrides) -> float:
+    """Start ``command`` and return the ms until GET /health/ready answers 200."""
+    env = dict(os.environ, **{key: str(value) for key, value in env_overrides.items()})
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + 60
+        while time.perf_counter() < deadline:
+            try:
+                if httpx.get(f"http://127.0.0.1:{port}/health/ready", timeout=1).status_code == 200:
+                    return (time.perf_counter() - start) * 1000
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.02)
+        raise RuntimeError(f"{command} did not become ready")
+    finally:
+        process.terminate()
+        process.wait()
+
+def run(rounds: int, worker_counts, port: int):
+    # Apply the schema once so every variant below starts against a current database
+    import_time("import main; from core.migrations import run_migrations; run_migrations(main.engine)")
+
+    print(f"{'import':<28} {'median ms':>10}")
+    for label, statement in IMPORT_VARIANTS.items():
+        print(f"{label:<28} {statistics.median(import_time(statement) for _ in range(rounds)):>10.0f}")
+
+    uvicorn = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+    print(f"\n{'uvicorn main:app until ready':<28} {'median ms':>10}")
+    for migrate in ("true", "false"):
+        samples = [time_to_ready(uvicorn, port, MIGRATE_ON_STARTUP=migrate) for _ in range(rounds)]
+        print(f"{'MIGRATE_ON_STARTUP=' + migrate:<28} {statistics.median(samples):>10.0f}")
+
+    print(f"\n{'serve.py until ready':<28} {'median ms':>10}")
+    for workers in worker_counts:
+        command = [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)]
+        samples = [time_to_ready(command, port) for _ in range(rounds)]
+        print(f"{f'--workers {workers}':<28} {statistics.median(samples):>10.0f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8790)
+    args = parser.parse_args()
+    run(args.rounds, args.workers, args.port)
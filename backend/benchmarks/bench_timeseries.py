@@ -0,0 +1,65 @@
+"""Compare the results timeseries served from rollups with bucketing raw votes.
+
+Seeds one poll per size with that many votes (spread over the last week),
+backfills its rollups and times a 48-bucket hourly series both ways. The rollup
+query stays flat as the vote count grows; the raw scan grows with it.
+
+Usage: python -m benchmarks.bench_timeseries [--sizes 1000 10000 100000]
+"""
+import argparse
+import statistics
+
+from benchmarks.common import setup_environment, timed
+
+setup_environment("timeseries")
+
+from sqlalchemy import select  # noqa: E402
+
+from benchmarks.seed import seed_dataset  # noqa: E402
+from core.database import SessionLocal, engine  # noqa: E402
+from models.models import Vote  # noqa: E402
+from services.timeseries_service import (  # noqa: E402
+    backfill_rollups, build_timeseries, poll_options_statement, poll_timeseries, rollup_rows, timeseries_range,
+)
+
+ROUNDS = 20
+
+def raw_timeseries(db, poll_id: int, start: int, end: int) -> dict:
+    """What the endpoint would do without rollups: read every vote of the poll."""
+    options = db.execute(poll_options_statement(poll_id)).all()
+    votes = db.execute(select(Vote.poll_id, Vote.option_id, Vote.created_at).where(Vote.poll_id == poll_id))
+    rollups = [
+        (row["option_id"], row["bucket_start"], row["vote_count"])
+        for row in rollup_rows(votes)
+        if row["bucket_seconds"] == 3600 and start <= row["bucket_start"] < end
+    ]
+    return build_timeseries(poll_id, "1h", start, end, options, rollups)
+
+def run(sizes):
+    print(f"{'votes':>8} {'rollups ms':>11} {'raw scan ms':>12} {'speedup':>8}")
+    for size in sizes:
+        manifest = seed_dataset(engine, users=size, polls=1, votes=size, likes=0)
+        poll_id = manifest["polls"]["first_id"]
+        start, end = timeseries_range("1h", None, None)
+        db = SessionLocal()
+        try:
+            backfill_rollups(db, [poll_id])
+            assert poll_timeseries(db, poll_id, "1h", start, end) == raw_timeseries(db, poll_id, start, end)
+            results = {}
+            for name, query in (("rollups", lambda: poll_timeseries(db, poll_id, "1h", start, end)),
+                                ("raw", lambda: raw_timeseries(db, poll_id, start, end))):
+                samples = []
+                for _ in range(ROUNDS):
+                    with timed() as t:
+                        query()
+                    samples.append(t["elapsed"])
+                results[name] = statistics.median(samples)
+        finally:
+            db.close()
+        print(f"{size:>8} {results['rollups']:>11.2f} {results['raw']:>12.2f} {results['raw'] / results['rollups']:>7.1f}x")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+    run(args.sizes)
@@ -0,0 +1,125 @@
+"""Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway SQLite database unless DATABASE_URL is
+already set, so they must call ``setup_environment`` before importing any
+application module.
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def setup_environment(name: str) -> str:
+    """Point the app at a scratch database and make backend modules importable.
+
+    Rate limiting and admission control are off unless set explicitly.
+    """
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    if "DATABASE_URL" not in os.environ:
+        path = os.path.join(tempfile.mkdtemp(prefix="quickpoll-bench-"), f"{name}.db")
+        os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    # Load generators come from one IP and far exceed per-client limits
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "False")
+    os.environ.setdefault("ADMISSION_MAX_CONCURRENT", "0")
+    return os.environ["DATABASE_URL"]
+
+def start_server(port: int, **env_overrides) -> subprocess.Popen:
+    """Start ``uvicorn main:app`` on ``port`` and wait until it answers."""
+    import httpx
+
+    env = dict(os.environ, **{key: str(value) for key, value in env_overrides.items()})
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("Server did not start")
+
+def stop_server(process: subprocess.Popen):
+    process.terminate()
+    process.wait()
+
+class QueryCounter:
+    """Count SQL statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+@contextmanager
+def timed():
+    """Yield a dict whose ``elapsed`` key is set to the block's wall time in ms."""
+    result = {}
+    start = time.perf_counter()
+    yield result
+    result["elapsed"] = (time.perf_counter() - start) * 1000
+
+def percentile(samples, pct: float) -> float:
+    """Return the ``pct`` percentile of ``samples`` (nearest-rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+def seed_polls(db, poll_count: int, options_per_poll: int = 4, voters: int = 50, likers: int = 10):
+    """Bulk-insert users, polls, options, votes and likes for benchmarking."""
+    from models.models import User, Poll, PollOption, Vote, poll_likes
+    from services.counter_service import reconcile_counters
+
+    users = [
+        {"username": f"bench_user_{i}", "email": f"bench_user_{i}@example.com", "hashed_password": "x"}
+        for i in range(voters)
+    ]
+    db.execute(User.__table__.insert(), users)
+    user_ids = [row[0] for row in db.query(User.id).order_by(User.id).all()]
+
+    db.execute(Poll.__table__.insert(), [
+        {"title": f"Benchmark poll {i}", "description": "Synthetic", "creator_id": user_ids[i % len(user_ids)]}
+        for i in range(poll_count)
+    ])
+    poll_ids = [row[0] for row in db.query(Poll.id).order_by(Poll.id).all()]
+
+    db.execute(PollOption.__table__.insert(), [
+        {"text": f"Option {j}", "poll_id": poll_id}
+        for poll_id in poll_ids for j in range(options_per_poll)
+    ])
+    options = {}
+    for option_id, poll_id in db.query(PollOption.id, PollOption.poll_id).order_by(PollOption.id).all():
+        options.setdefault(poll_id, []).append(option_id)
+
+    db.execute(Vote.__table__.insert(), [
+        {"user_id": user_id, "poll_id": poll_id, "option_id": options[poll_id][(user_id + poll_id) % options_per_poll]}
+        for poll_id in poll_ids for user_id in user_ids
+    ])
+    db.execute(poll_likes.insert(), [
+        {"user_id": user_id, "poll_id": poll_id}
+        for poll_id in poll_ids for user_id in user_ids[:likers]
+    ])
+    db.commit()
+    reconcile_counters(db)
+    return user_ids, poll_ids
@@ -0,0 +1,331 @@
+"""Drive a mixed workload against the API and report per-endpoint results.
+
+Virtual users log in once, then loop over weighted operations until the
+duration is up:
+- ``list``: a feed page
+- ``detail``: one poll
+- ``vote``
+- ``like``: becomes ``unlike`` when the poll is already liked
+- ``login``
+
+Poll choice follows the dataset's Zipf popularity, so hot polls see most of the
+traffic.
+
+Two targets are supported:
+- In-process (default): requests go through ``httpx.ASGITransport`` to the app
+  on ``DATABASE_URL``, with no sockets involved.
+- A running server: pass ``--url``.
+
+For each endpoint the report gives throughput, p50/p95/p99 latency, status
+codes and SQL queries per request. Query counts come from the difference
+between ``/metrics`` scrapes taken before and after the run, so they need
+METRICS_ENABLED on the target (and STATS_TOKEN in the environment if the
+target sets one). ``--output`` writes the results as JSON, and
+``--baseline`` compares against an earlier results file.
+
+Without ``--manifest``, a small dataset is seeded into a scratch database first.
+For a large one, run ``benchmarks.seed`` and pass its manifest (and, in-process,
+the same DATABASE_URL).
+
+Usage: python -m benchmarks.loadtest [--manifest loadtest-dataset.json] [--url http://127.0.0.1:8000]
+                                     [--clients 50] [--duration 30] [--mix list=40,detail=35,vote=12,like=8,login=5]
+                                     [--output results.json] [--baseline previous.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.common import BACKEND_DIR, percentile, setup_environment
+
+DEFAULT_MIX = "list=40,detail=35,vote=12,like=8,login=5"
+# Route templates as labelled by core/metrics.py
+ROUTES = {
+    "list": ("GET", "/polls/"),
+    "detail": ("GET", "/polls/{poll_id}"),
+    "vote": ("POST", "/polls/{poll_id}/vote"),
+    "like": ("POST", "/polls/{poll_id}/like"),
+    "unlike": ("DELETE", "/polls/{poll_id}/like"),
+    "login": ("POST", "/auth/login"),
+}
+FEED_SORTS = ("newest", "newest", "most_voted", "most_liked")
+# Settings that change results; recorded for in-process runs
+RECORDED_SETTINGS = ("DB_ASYNC", "DB_POOL_SIZE", "DB_MAX_OVERFLOW", "VOTE_INGEST_MODE", "PASSWORD_HASH_WORKERS", "METRICS_ENABLED")
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ROUTES or name == "unlike":
+            raise SystemExit(f"Unknown operation in --mix: {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+class Workload:
+    """Picks operations and targets from the dataset manifest."""
+
+    def __init__(self, manifest: dict, mix: Dict[str, float], seed: Optional[int] = None):
+        from benchmarks.seed import zipf_cumulative_weights
+
+        self.manifest = manifest
+        self.rng = random.Random(seed)
+        self.operations = list(mix)
+        self.op_weights = list(itertools.accumulate(mix.values()))
+        polls = manifest["polls"]
+        self.first_poll, self.poll_count = polls["first_id"], polls["count"]
+        self.first_option, self.options_per_poll = polls["first_option_id"], polls["options_per_poll"]
+        self.poll_weights = zipf_cumulative_weights(self.poll_count, manifest.get("zipf_exponent", 0.8))
+
+    def operation(self) -> str:
+        return self.rng.choices(self.operations, cum_weights=self.op_weights)[0]
+
+    def poll(self) -> int:
+        from benchmarks.seed import pick_rank, poll_for_rank
+        return self.first_poll + poll_for_rank(pick_rank(self.rng, self.poll_weights), self.poll_count)
+
+    def option(self, poll_id: int) -> int:
+        offset = poll_id - self.first_poll
+        return self.first_option + offset * self.options_per_poll + self.rng.randrange(self.options_per_poll)
+
+    def username(self) -> str:
+        users = self.manifest["users"]
+        user_id = users["first_id"] + self.rng.randrange(users["count"])
+        return users["username_format"].format(id=user_id)
+
+class EndpointStats:
+    __slots__ = ("latencies", "statuses", "errors")
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.statuses: Dict[int, int] = {}
+        self.errors = 0
+
+    def summary(self, elapsed: float, queries: Optional[float]) -> dict:
+        requests = len(self.latencies)
+        failed = self.errors + sum(count for status, count in self.statuses.items() if status >= 500)
+        return {
+            "requests": requests,
+            "throughput_rps": round(requests / elapsed, 2),
+            "p50_ms": round(percentile(self.latencies, 50), 3),
+            "p95_ms": round(percentile(self.latencies, 95), 3),
+            "p99_ms": round(percentile(self.latencies, 99), 3),
+            "max_ms": round(max(self.latencies, default=0.0), 3),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "transport_errors": self.errors,
+            "error_rate": round(failed / requests, 4) if requests else 0.0,
+            "queries_per_request": None if queries is None else round(queries, 2),
+        }
+
+_METRIC_LINE = re.compile(r'^quickpoll_db_queries_per_request_(sum|count)\{method="([^"]+)",route="([^"]+)"\} (\S+)$')
+
+async def scrape_queries(client) -> Optional[Dict[Tuple[str, str], List[float]]]:
+    """Per-route [sum, count] of the queries-per-request histogram, or None without /metrics."""
+    token = os.environ.get("STATS_TOKEN")
+    response = await client.get("/metrics", headers={"Authorization": f"Bearer {token}"} if token else None)
+    if response.status_code != 200:
+        return None
+    totals: Dict[Tuple[str, str], List[float]] = {}
+    for line in response.text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match:
+            kind, method, route, value = match.groups()
+            totals.setdefault((method, route), [0.0, 0.0])[kind == "count"] = float(value)
+    return totals
+
+def queries_per_request(before, after, route: Tuple[str, str]) -> Optional[float]:
+    if before is None or after is None or route not in after:
+        return None
+    queries, count = after[route]
+    previous = before.get(route, [0.0, 0.0])
+    requests = count - previous[1]
+    return (queries - previous[0]) / requests if requests else None
+
+async def run_workload(client, workload: Workload, clients: int, duration: float) -> Tuple[Dict[str, EndpointStats], float]:
+    password = workload.manifest["users"]["password"]
+    stats = {name: EndpointStats() for name in ROUTES}
+
+    async def login(username: str) -> str:
+        # The server sheds logins when its hashing pool is full; back off and retry
+        for attempt in range(20):
+            response = await client.post("/auth/login", data={"username": username, "password": password})
+            if response.status_code == 200:
+                return response.json()["access_token"]
+            if response.status_code not in (429, 503):
+                break
+            await asyncio.sleep(min(2.0, 0.1 * 2 ** attempt))
+        raise SystemExit(f"Could not log in as {username} ({response.status_code}); is the manifest for this database?")
+
+    # Log every virtual user in before the clock starts
+    tokens = await asyncio.gather(*(login(workload.username()) for _ in range(clients)))
+
+    async def request(name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except Exception:
+            stats[name].errors += 1
+            stats[name].latencies.append((time.perf_counter() - start) * 1000)
+            return None
+        stats[name].latencies.append((time.perf_counter() - start) * 1000)
+        stats[name].statuses[response.status_code] = stats[name].statuses.get(response.status_code, 0) + 1
+        return response
+
+    async def virtual_user(token: str):
+        headers = {"Authorization": f"Bearer {token}"}
+        while time.perf_counter() < deadline:
+            operation = workload.operation()
+            if operation == "list":
+                await request("list", "GET", "/polls/", params={"limit": 20, "sort": workload.rng.choice(FEED_SORTS)}, headers=headers)
+            elif operation == "detail":
+                await request("detail", "GET", f"/polls/{workload.poll()}", headers=headers)
+            elif operation == "vote":
+                poll_id = workload.poll()
+                await request("vote", "POST", f"/polls/{poll_id}/vote", json={"option_id": workload.option(poll_id)}, headers=headers)
+            elif operation == "like":
+                poll_id = workload.poll()
+                response = await request("like", "POST", f"/polls/{poll_id}/like", headers=headers)
+                if response is not None and response.status_code == 400:
+                    await request("unlike", "DELETE", f"/polls/{poll_id}/like", headers=headers)
+            else:
+                await request("login", "POST", "/auth/login", data={"username": workload.username(), "password": password})
+
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(virtual_user(token) for token in tokens))
+    return stats, time.perf_counter() - started
+
+async def run(args, manifest: dict) -> dict:
+    import httpx
+
+    workload = Workload(manifest, parse_mix(args.mix), args.seed)
+    limits = httpx.Limits(max_connections=args.clients, max_keepalive_connections=args.clients)
+    settings = {}
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60)
+        target = args.url
+        lifespan = None
+    else:
+        from main import app
+
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+        target = "asgi"
+        lifespan = app.router.lifespan_context(app)
+        import core.config
+        settings = {name: getattr(core.config, name) for name in RECORDED_SETTINGS}
+
+    async with client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            before = await scrape_queries(client)
+            stats, elapsed = await run_workload(client, workload, args.clients, args.duration)
+            after = await scrape_queries(client)
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    endpoints = {
+        name: endpoint.summary(elapsed, queries_per_request(before, after, ROUTES[name]))
+        for name, endpoint in stats.items() if endpoint.latencies
+    }
+    everything = EndpointStats()
+    for endpoint in stats.values():
+        everything.latencies.extend(endpoint.latencies)
+        everything.errors += endpoint.errors
+        for status, count in endpoint.statuses.items():
+            everything.statuses[status] = everything.statuses.get(status, 0) + count
+    dataset = {key: value for key, value in manifest.items() if key != "users"}
+    dataset["users"] = manifest["users"]["count"]
+    return {
+        "run": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "target": target,
+            "clients": args.clients,
+            "duration_s": round(elapsed, 3),
+            "mix": parse_mix(args.mix),
+            "settings": settings,
+            "dataset": dataset,
+        },
+        "endpoints": endpoints,
+        "total": everything.summary(elapsed, None),
+    }
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_report(results: dict, baseline: Optional[dict] = None):
+    run = results["run"]
+    print(f"target={run['target']} clients={run['clients']} duration={run['duration_s']:.1f}s commit={run['git_commit']}")
+    header = f"{'endpoint':<8} {'requests':>9} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'queries':>8}"
+    if baseline:
+        header += f" {'req/s vs base':>14} {'p95 vs base':>12}"
+    print(header)
+    rows = list(results["endpoints"].items()) + [("total", results["total"])]
+    for name, row in rows:
+        queries = "-" if row["queries_per_request"] is None else f"{row['queries_per_request']:.1f}"
+        line = (f"{name:<8} {row['requests']:>9} {row['throughput_rps']:>9.1f} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['error_rate']:>7.1%} {queries:>8}")
+        if baseline:
+            base = baseline["total"] if name == "total" else baseline["endpoints"].get(name)
+            line += f" {_change(base, row, 'throughput_rps'):>14} {_change(base, row, 'p95_ms'):>12}"
+        print(line)
+
+def _change(base: Optional[dict], row: dict, key: str) -> str:
+    if not base or not base.get(key):
+        return "-"
+    return f"{(row[key] - base[key]) / base[key]:+.1%}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--manifest", help="Dataset manifest written by benchmarks.seed")
+    parser.add_argument("--url", help="Base URL of a running server; in-process over ASGI if omitted")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, help="Random seed for a repeatable request sequence")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+    parse_mix(args.mix)
+    if args.url and not args.manifest:
+        parser.error("--url needs the --manifest of the dataset the server is running on")
+
+    if args.manifest:
+        with open(args.manifest) as handle:
+            manifest = json.load(handle)
+        if not args.url and "***" not in manifest["database_url"]:
+            os.environ.setdefault("DATABASE_URL", manifest["database_url"])
+        setup_environment("loadtest")
+    else:
+        setup_environment("loadtest")
+        from benchmarks.seed import seed_dataset
+        from core.database import engine
+
+        print("No manifest given; seeding a small dataset")
+        manifest = seed_dataset(engine, users=1000, polls=10000, votes=200000, likes=20000)
+
+    results = asyncio.run(run(args, manifest))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    print_report(results, baseline)
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(results, handle, indent=2)
+        print(f"Results written to {args.output}")
+
+if __name__ == "__main__":
+    main()
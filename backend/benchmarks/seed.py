@@ -0,0 +1,262 @@
+"""Bulk-load a synthetic dataset for load testing.
+
+Rows are generated in chunks and written through the raw DBAPI connection:
+``COPY ... FROM STDIN`` on PostgreSQL, ``executemany`` elsewhere. IDs are
+assigned here, so counters (``total_votes``, ``vote_count``, ``like_count``)
+are computed while generating and no reconcile pass is needed. When the votes
+table starts empty its secondary indexes are dropped for the load and rebuilt
+afterwards.
+
+Vote and like volume per poll follows a Zipf distribution, so a few polls are
+hot and most are cold. ``poll_for_rank`` maps popularity ranks to polls, and
+the load generator uses it to aim reads and writes at the same hot polls.
+
+Every user's password is ``PASSWORD``. A JSON manifest describing the dataset
+is written for ``benchmarks.loadtest``.
+
+Usage: python -m benchmarks.seed [--users 100000] [--polls 1000000] [--votes 50000000]
+                                 [--likes 5000000] [--manifest loadtest-dataset.json]
+"""
+import argparse
+import bisect
+import csv
+import functools
+import io
+import itertools
+import json
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Sequence
+
+from benchmarks.common import setup_environment
+
+PASSWORD = "loadtest-password"
+USERNAME_FORMAT = "load_{id}"
+OPTIONS_PER_POLL = 4
+ZIPF_EXPONENT = 0.8
+BATCH_SIZE = 20000
+# Votes are spread over this window, at minute granularity
+VOTE_WINDOW_MINUTES = 7 * 24 * 60
+
+# Multipliers coprime to any realistic row count; they scatter ranks and voters
+_RANK_STRIDE = 2654435761
+_VOTER_STRIDE = 40503
+
+@functools.lru_cache(maxsize=None)
+def _coprime_stride(stride: int, count: int) -> int:
+    while math.gcd(stride, count) != 1:
+        stride += 1
+    return stride
+
+def poll_for_rank(rank: int, poll_count: int) -> int:
+    """Offset (from the first poll id) of the poll with popularity ``rank``."""
+    return (rank * _coprime_stride(_RANK_STRIDE, poll_count)) % poll_count
+
+def zipf_cumulative_weights(count: int, exponent: float = ZIPF_EXPONENT) -> List[float]:
+    """Cumulative weights of ranks ``0..count-1`` for ``random.choices``."""
+    return list(itertools.accumulate(1 / (rank + 1) ** exponent for rank in range(count)))
+
+def pick_rank(rng, cumulative_weights: List[float]) -> int:
+    """Draw a popularity rank from ``zipf_cumulative_weights`` output."""
+    return bisect.bisect(cumulative_weights, rng.random() * cumulative_weights[-1])
+
+def zipf_counts(total: int, count: int, cap: int, exponent: float = ZIPF_EXPONENT) -> List[int]:
+    """Split ``total`` over ``count`` ranks by Zipf weight, at most ``cap`` per rank."""
+    total = min(total, count * cap)
+    weights = [1 / (rank + 1) ** exponent for rank in range(count)]
+    counts = [0] * count
+    remaining, open_ranks = total, list(range(count))
+    # Capped ranks give their excess to the others; a few rounds settle it
+    while remaining > 0 and open_ranks:
+        weight_sum = sum(weights[rank] for rank in open_ranks)
+        still_open = []
+        for rank in open_ranks:
+            share = min(cap - counts[rank], int(remaining * weights[rank] / weight_sum))
+            counts[rank] += share
+            if counts[rank] < cap:
+                still_open.append(rank)
+        remaining = total - sum(counts)
+        if len(still_open) == len(open_ranks):
+            # Only rounding is left; hand it out one by one to the most popular ranks
+            for rank in still_open[:remaining]:
+                counts[rank] += 1
+            break
+        open_ranks = still_open
+    return counts
+
+def _chunks(rows: Iterable[tuple], size: int):
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class BulkLoader:
+    """Write row tuples into a table over one raw DBAPI connection."""
+
+    def __init__(self, engine, batch_size: int = BATCH_SIZE):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.dialect = engine.dialect.name
+
+    def load(self, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+        start = time.perf_counter()
+        loaded = 0
+        connection = self.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            if self.dialect == "sqlite":
+                # Safe for a throwaway bulk load only: nothing is fsynced until the end
+                cursor.execute("PRAGMA synchronous=OFF")
+            for chunk in _chunks(rows, self.batch_size):
+                if self.dialect == "postgresql":
+                    self._copy(cursor, table, columns, chunk)
+                else:
+                    placeholders = ", ".join(["?" if self.engine.dialect.paramstyle == "qmark" else "%s"] * len(columns))
+                    cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", chunk)
+                loaded += len(chunk)
+            if self.dialect == "postgresql" and "id" in columns:
+                # Explicit ids bypass the sequence; move it past them
+                cursor.execute(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))")
+            connection.commit()
+        finally:
+            connection.close()
+        elapsed = time.perf_counter() - start
+        print(f"  {table:<14} {loaded:>12,} rows {elapsed:>8.1f} s {loaded / max(elapsed, 1e-9):>12,.0f} rows/s")
+        return loaded
+
+    @staticmethod
+    def _copy(cursor, table: str, columns: Sequence[str], chunk: List[tuple]):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(chunk)
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def _next_id(db, table) -> int:
+    from sqlalchemy import func, select
+    return (db.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+def seed_dataset(engine, users: int, polls: int, votes: int, likes: int, batch_size: int = BATCH_SIZE) -> dict:
+    """Bulk-load the dataset after any existing rows and return its manifest."""
+    from sqlalchemy import func, select
+
+    from core.database import SessionLocal
+    from core.migrations import run_migrations
+    from models.models import Poll, PollOption, User, Vote, poll_likes
+    from utils.auth import get_password_hash
+
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        first_user = _next_id(db, User.__table__)
+        first_poll = _next_id(db, Poll.__table__)
+        first_option = _next_id(db, PollOption.__table__)
+        first_vote = _next_id(db, Vote.__table__)
+        votes_empty = db.execute(select(func.count()).select_from(Vote.__table__)).scalar() == 0
+    finally:
+        db.close()
+
+    loader = BulkLoader(engine, batch_size)
+    # Naive UTC, as the database stores it
+    now = datetime.now(timezone.utc).replace(microsecond=0, tzinfo=None)
+    hashed_password = get_password_hash(PASSWORD)
+    vote_counts = zipf_counts(votes, polls, users)
+    like_counts = zipf_counts(likes, polls, users)
+    # Per-poll counts by poll offset rather than by popularity rank
+    poll_votes, poll_likes_count = [0] * polls, [0] * polls
+    for rank in range(polls):
+        offset = poll_for_rank(rank, polls)
+        poll_votes[offset], poll_likes_count[offset] = vote_counts[rank], like_counts[rank]
+    voter_stride = _coprime_stride(_VOTER_STRIDE, users)
+
+    def voters(offset: int, count: int):
+        # Distinct users per poll: a full-cycle walk over the user range
+        start = (offset * 7919) % users
+        return (first_user + (start + j * voter_stride) % users for j in range(count))
+
+    print(f"Seeding {users:,} users, {polls:,} polls, {sum(vote_counts):,} votes, {sum(like_counts):,} likes")
+    loader.load("users", ("id", "username", "email", "hashed_password", "is_active"), (
+        (user_id, USERNAME_FORMAT.format(id=user_id), f"load_{user_id}@example.com", hashed_password, True)
+        for user_id in range(first_user, first_user + users)
+    ))
+    loader.load("polls", ("id", "title", "description", "creator_id", "is_active", "created_at", "total_votes", "like_count", "version"), (
+        (
+            first_poll + offset, f"Load test poll {first_poll + offset}", "Synthetic poll for load testing",
+            first_user + offset % users, True, (now - timedelta(seconds=polls - offset)).isoformat(sep=" "),
+            poll_votes[offset], poll_likes_count[offset], poll_votes[offset] + poll_likes_count[offset],
+        )
+        for offset in range(polls)
+    ))
+    # The j-th vote on a poll goes to option j % OPTIONS_PER_POLL, so option counts are known up front
+    loader.load("poll_options", ("id", "text", "poll_id", "vote_count"), (
+        (
+            first_option + offset * OPTIONS_PER_POLL + j, f"Option {j + 1}", first_poll + offset,
+            poll_votes[offset] // OPTIONS_PER_POLL + (j < poll_votes[offset] % OPTIONS_PER_POLL),
+        )
+        for offset in range(polls) for j in range(OPTIONS_PER_POLL)
+    ))
+
+    vote_indexes = list(Vote.__table__.indexes) if votes_empty else []
+    with engine.begin() as connection:
+        for index in vote_indexes:
+            index.drop(connection, checkfirst=True)
+    timestamps = [(now - timedelta(minutes=minute)).isoformat(sep=" ") for minute in range(VOTE_WINDOW_MINUTES)]
+
+    def vote_rows():
+        vote_id = first_vote
+        for offset in range(polls):
+            option_base = first_option + offset * OPTIONS_PER_POLL
+            for j, user_id in enumerate(voters(offset, poll_votes[offset])):
+                yield (vote_id, user_id, first_poll + offset, option_base + j % OPTIONS_PER_POLL,
+                       timestamps[(vote_id * 31) % VOTE_WINDOW_MINUTES])
+                vote_id += 1
+
+    loader.load("votes", ("id", "user_id", "poll_id", "option_id", "created_at"), vote_rows())
+    if vote_indexes:
+        start = time.perf_counter()
+        with engine.begin() as connection:
+            for index in vote_indexes:
+                index.create(connection, checkfirst=True)
+        print(f"  {'vote indexes':<14} rebuilt in {time.perf_counter() - start:.1f} s")
+
+    # Likers walk the user range backwards so they differ from the voters
+    loader.load(poll_likes.name, ("user_id", "poll_id"), (
+        (first_user + users - 1 - (user_id - first_user), first_poll + offset)
+        for offset in range(polls) for user_id in voters(offset, poll_likes_count[offset])
+    ))
+
+    url = engine.url
+    return {
+        "created_at": now.isoformat() + "Z",
+        "database_url": url.render_as_string(hide_password=True),
+        "users": {"first_id": first_user, "count": users, "username_format": USERNAME_FORMAT, "password": PASSWORD},
+        "polls": {"first_id": first_poll, "count": polls, "options_per_poll": OPTIONS_PER_POLL, "first_option_id": first_option},
+        "votes": sum(vote_counts),
+        "likes": sum(like_counts),
+        "zipf_exponent": ZIPF_EXPONENT,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--polls", type=int, default=1_000_000)
+    parser.add_argument("--votes", type=int, default=50_000_000)
+    parser.add_argument("--likes", type=int, default=5_000_000)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--manifest", default="loadtest-dataset.json", help="Where to write the dataset manifest")
+    args = parser.parse_args()
+
+    setup_environment("loadtest")
+    from core.database import engine
+
+    start = time.perf_counter()
+    manifest = seed_dataset(engine, args.users, args.polls, args.votes, args.likes, args.batch_size)
+    with open(args.manifest, "w") as handle:
+        json.dump(manifest, handle, indent=2)
+    print(f"Done in {time.perf_counter() - start:.1f} s; manifest written to {args.manifest}")
+    print(f"Database: {manifest['database_url']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Async counterparts of core/dependencies.py for DB_ASYNC mode."""
+from fastapi import Depends, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from core.database import get_async_db, get_async_read_db, read_replicas
+from core.dependencies import build_credentials_exception, oauth2_scheme, optional_oauth2_scheme
+from core.token_cache import UserSnapshot, token_cache
+from models.models import User
+from utils.auth import decode_token
+
+async def authenticate_token_async(token: str, db: AsyncSession) -> Optional[UserSnapshot]:
+    """Resolve a token to an active user's snapshot, using the verified-token cache."""
+    snapshot = token_cache.lookup(token)
+    if snapshot is not None:
+        return snapshot if snapshot.is_active else None
+    
+    payload = decode_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
+    
+    changes = token_cache.begin_db_lookup()
+    result = await db.execute(select(User).where(User.username == payload["sub"]))
+    user = result.scalars().first()
+    if user is None or not user.is_active:
+        return None
+    
+    return token_cache.store(token, user, payload.get("exp"), changes)
+
+async def get_current_user_async(request: Request, token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """Get the current authenticated user (async mode)."""
+    user = await authenticate_token_async(token, db)
+    if user is None:
+        raise build_credentials_exception()
+    
+    if request.method != "GET":
+        # Read this user's next requests from the primary so they see their own write
+        read_replicas.record_write(token)
+    return user
+
+async def get_current_user_read_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_read_db)):
+    """Get the current authenticated user for a read-only route (async mode)."""
+    user = await authenticate_token_async(token, db)
+    if user is None:
+        raise build_credentials_exception()
+    
+    return user
+
+async def get_current_user_optional_async(token: Optional[str] = Depends(optional_oauth2_scheme), db: AsyncSession = Depends(get_async_read_db)) -> Optional[UserSnapshot]:
+    """Get the current authenticated user, or None if not authenticated (async mode)."""
+    if token is None:
+        return None
+    
+    return await authenticate_token_async(token, db)
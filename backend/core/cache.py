@@ -0,0 +1,114 @@
+"""Small in-process caches with LRU eviction, TTL expiry and hit/miss stats."""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Every cache registers itself here so its stats can be reported
+CACHES: Dict[str, "TTLCache"] = {}
+
+class TTLCache:
+    """Thread-safe, size-bounded LRU cache whose entries expire after ``ttl`` seconds.
+
+    ``generation(key)`` and ``set(..., generation=...)`` let a reader that
+    rebuilt a value skip storing it if the key was invalidated meanwhile, so a
+    write that lands during a rebuild cannot be overwritten by stale data.
+    Generations are kept for at most ``maxsize`` keys; dropping one starts a new
+    epoch, which also voids every rebuild that began before it.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generations: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        CACHES[name] = self
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return a live cached value without counting a lookup or touching LRU order."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            return entry[0]
+
+    def generation(self, key: Hashable) -> Tuple[int, int]:
+        """Return the invalidation generation of ``key``."""
+        with self._lock:
+            return self._epoch, self._generations.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None, ttl: Optional[float] = None):
+        """Store ``value``, unless ``key`` was invalidated since ``generation``."""
+        with self._lock:
+            if generation is not None and (self._epoch, self._generations.get(key, 0)) != generation:
+                return
+            expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """Drop ``key`` and bump its generation."""
+        with self._lock:
+            self._data.pop(key, None)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._generations.move_to_end(key)
+            while len(self._generations) > self.maxsize:
+                # The dropped key's generation would restart at 0 and match a pre-invalidation rebuild
+                self._generations.popitem(last=False)
+                self._epoch += 1
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+            self._epoch += 1
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+def cache_stats() -> dict:
+    """Return stats for every registered cache."""
+    return {name: cache.stats() for name, cache in CACHES.items()}
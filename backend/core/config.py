@@ -7,4 +7,110 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./quickpoll.db")
 SECRET_KEY = os.getenv("SECRET_KEY", "your-super-secret-jwt-key")
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
-DEBUG = os.getenv("DEBUG", "True").lower() == "true"
\ No newline at end of file
+
+# Password hashing: bcrypt cost and a bounded process pool for hashing work
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))  # 0 hashes inline
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", max(1, PASSWORD_HASH_WORKERS) * 4))
+# fork, forkserver or spawn; serve.py uses forkserver so pool workers do not inherit the listening socket
+PASSWORD_HASH_START_METHOD = os.getenv("PASSWORD_HASH_START_METHOD", "fork")
+
+# Verified-token cache (entries never outlive the token's exp). The TTL bounds how long
+# other workers keep accepting a deactivated user's tokens.
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", 50000))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", 30))
+DEBUG = os.getenv("DEBUG", "True").lower() == "true"
+# Bearer token for /stats/* and /metrics; without one they are served only when DEBUG is on
+STATS_TOKEN = os.getenv("STATS_TOKEN", "")
+
+# Connection pool (ignored for in-memory SQLite)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+
+# SQLite pragmas applied on every new connection
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))
+
+# Serve requests with async handlers on an AsyncEngine (aiosqlite/asyncpg)
+DB_ASYNC = os.getenv("DB_ASYNC", "False").lower() == "true"
+
+# Read replicas for read-only routes (comma-separated URLs; empty reads from the primary)
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+DB_REPLICA_HEALTH_CHECK_SECONDS = float(os.getenv("DB_REPLICA_HEALTH_CHECK_SECONDS", 5))
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 10))  # PostgreSQL only; 0 disables
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))  # reads go to the primary after a write
+
+# Poll detail cache
+POLL_CACHE_MAX_SIZE = int(os.getenv("POLL_CACHE_MAX_SIZE", 10000))
+POLL_CACHE_TTL_SECONDS = float(os.getenv("POLL_CACHE_TTL_SECONDS", 30))
+
+# Real-time streaming
+STREAM_BROKER = os.getenv("STREAM_BROKER", "memory")  # "memory" or "redis"
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
+STREAM_COALESCE_MS = int(os.getenv("STREAM_COALESCE_MS", 250))
+STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", 32))
+STREAM_KEEPALIVE_SECONDS = float(os.getenv("STREAM_KEEPALIVE_SECONDS", 15))
+
+# Vote ingestion: "direct" writes each vote in its request, "buffered" journals
+# votes and writes them in batches from a background worker
+VOTE_INGEST_MODE = os.getenv("VOTE_INGEST_MODE", "direct")
+VOTE_FLUSH_INTERVAL_MS = int(os.getenv("VOTE_FLUSH_INTERVAL_MS", 50))
+VOTE_FLUSH_BATCH_SIZE = int(os.getenv("VOTE_FLUSH_BATCH_SIZE", 500))
+VOTE_JOURNAL_DIR = os.getenv("VOTE_JOURNAL_DIR", "./vote_journal")
+VOTE_JOURNAL_FSYNC = os.getenv("VOTE_JOURNAL_FSYNC", "always")  # "always", "batch" or "never"
+VOTE_INGEST_MAX_POLLS = int(os.getenv("VOTE_INGEST_MAX_POLLS", 10000))
+
+# Trending ranking: decayed vote/like activity kept in memory, checkpointed periodically
+TRENDING_HALF_LIFE_HOURS = float(os.getenv("TRENDING_HALF_LIFE_HOURS", 6))
+TRENDING_LIKE_WEIGHT = float(os.getenv("TRENDING_LIKE_WEIGHT", 2))
+TRENDING_TOP_K = int(os.getenv("TRENDING_TOP_K", 100))
+TRENDING_CHECKPOINT_SECONDS = float(os.getenv("TRENDING_CHECKPOINT_SECONDS", 60))
+
+# HTTP caching of poll reads: anonymous responses are public for this long
+HTTP_CACHE_MAX_AGE = int(os.getenv("HTTP_CACHE_MAX_AGE", 5))
+HTTP_CACHE_STALE_WHILE_REVALIDATE = int(os.getenv("HTTP_CACHE_STALE_WHILE_REVALIDATE", 30))
+
+# Rate limiting: per-route token buckets written as "<burst>/<seconds>" (empty disables a rule)
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "True").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")  # "memory" or "redis" (uses REDIS_URL)
+RATE_LIMIT_LOGIN = os.getenv("RATE_LIMIT_LOGIN", "10/60")        # per IP
+RATE_LIMIT_REGISTER = os.getenv("RATE_LIMIT_REGISTER", "5/300")  # per IP
+RATE_LIMIT_VOTE = os.getenv("RATE_LIMIT_VOTE", "60/60")          # per user
+RATE_LIMIT_LIKE = os.getenv("RATE_LIMIT_LIKE", "60/60")          # per user
+RATE_LIMIT_EXPORT = os.getenv("RATE_LIMIT_EXPORT", "10/60")      # per user
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))
+RATE_LIMIT_TRUST_FORWARDED = os.getenv("RATE_LIMIT_TRUST_FORWARDED", "False").lower() == "true"
+
+# Admission control: requests in flight per process, kept below the DB pool's capacity (0 disables)
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+ADMISSION_QUEUE_TIMEOUT_MS = int(os.getenv("ADMISSION_QUEUE_TIMEOUT_MS", 250))
+
+# Request metrics on /metrics; requests slower than SLOW_REQUEST_MS are logged with their SQL (0 disables)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 0))
+SLOW_REQUEST_MAX_STATEMENTS = int(os.getenv("SLOW_REQUEST_MAX_STATEMENTS", 50))
+
+# Bulk poll import (POST /polls/import): polls inserted and committed per batch, invalid records reported
+POLL_IMPORT_BATCH_SIZE = int(os.getenv("POLL_IMPORT_BATCH_SIZE", 500))
+POLL_IMPORT_MAX_ERRORS = int(os.getenv("POLL_IMPORT_MAX_ERRORS", 100))
+
+# Vote exports: rows read per connection checkout; the connection goes back to the pool between batches
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", 10000))
+
+# In-memory vote counters for hot polls (services/counter_engine.py); VOTE_INGEST_MODE=direct only
+COUNTER_ENGINE_ENABLED = os.getenv("COUNTER_ENGINE_ENABLED", "False").lower() == "true"
+COUNTER_ENGINE_STRIPES = int(os.getenv("COUNTER_ENGINE_STRIPES", 16))
+COUNTER_ENGINE_MAX_POLLS = int(os.getenv("COUNTER_ENGINE_MAX_POLLS", 10000))
+COUNTER_ENGINE_FLUSH_MS = int(os.getenv("COUNTER_ENGINE_FLUSH_MS", 200))
+COUNTER_ENGINE_RECONCILE_SECONDS = float(os.getenv("COUNTER_ENGINE_RECONCILE_SECONDS", 5))
+
+# Startup: workers apply pending migrations unless serve.py already did (it sets this to false for them)
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "True").lower() == "true"
+# Production launcher (serve.py): workers (0 = one per available core) and seconds to finish requests on shutdown/reload
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", 0))
+GRACEFUL_SHUTDOWN_SECONDS = int(os.getenv("GRACEFUL_SHUTDOWN_SECONDS", 30))
@@ -1,13 +1,53 @@
-from sqlalchemy import create_engine
+from typing import Optional
+
+from fastapi import Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from .config import DATABASE_URL
+from .config import (
+    DATABASE_URL, DB_ASYNC, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING, SQLITE_JOURNAL_MODE, SQLITE_SYNCHRONOUS, SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE,
+    DATABASE_REPLICA_URLS, DB_REPLICA_HEALTH_CHECK_SECONDS, DB_REPLICA_MAX_LAG_SECONDS, DB_REPLICA_STICKY_SECONDS,
+)
+from .pool import TimedAsyncQueuePool, TimedQueuePool, named_pool_class, pool_status
+from .replicas import Replica, ReplicaSet
+
+def is_memory_sqlite(url: str) -> bool:
+    return "sqlite" in url and (":memory:" in url or "mode=memory" in url or url.rstrip("/").endswith("sqlite:"))
+
+def engine_options(url: str, pool_class, name: str) -> dict:
+    """Pool and driver options for ``create_engine``/``create_async_engine``."""
+    options = {}
+    if "sqlite" in url:
+        options["connect_args"] = {"check_same_thread": False}
+        if is_memory_sqlite(url):
+            # In-memory databases live in a single connection; keep SQLAlchemy's default pool
+            return options
+    options.update(
+        poolclass=named_pool_class(pool_class, name),
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING,
+    )
+    return options
+
+def apply_sqlite_pragmas(engine):
+    """Tune every new SQLite connection for concurrent readers and writers."""
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.close()
 
 # Configure engine based on database type
-if "sqlite" in DATABASE_URL:
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
-else:
-    engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL, TimedQueuePool, "primary"))
+if "sqlite" in DATABASE_URL and not is_memory_sqlite(DATABASE_URL):
+    apply_sqlite_pragmas(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -17,4 +57,82 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its async driver."""
+    if url.startswith("sqlite:"):
+        return "sqlite+aiosqlite:" + url[len("sqlite:"):]
+    for prefix in ("postgresql://", "postgres://", "postgresql+psycopg2://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+# The sync engine is always available (migrations, CLI, streaming snapshots);
+# the async engine is only created when DB_ASYNC is enabled.
+async_engine = None
+AsyncSessionLocal = None
+
+if DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+    _async_url = async_database_url(DATABASE_URL)
+    async_engine = create_async_engine(_async_url, **engine_options(_async_url, TimedAsyncQueuePool, "async"))
+    if "sqlite" in DATABASE_URL and not is_memory_sqlite(DATABASE_URL):
+        apply_sqlite_pragmas(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def create_replica(index: int, url: str) -> Replica:
+    """Engines and session factories for one read replica."""
+    name = f"replica{index}"
+    replica_engine = create_engine(url, **engine_options(url, TimedQueuePool, name))
+    if "sqlite" in url and not is_memory_sqlite(url):
+        apply_sqlite_pragmas(replica_engine)
+    replica_async_engine = replica_async_sessions = None
+    if DB_ASYNC:
+        replica_url = async_database_url(url)
+        replica_async_engine = create_async_engine(replica_url, **engine_options(replica_url, TimedAsyncQueuePool, f"{name}-async"))
+        if "sqlite" in url and not is_memory_sqlite(url):
+            apply_sqlite_pragmas(replica_async_engine.sync_engine)
+        replica_async_sessions = async_sessionmaker(
+            replica_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False, info={"replica": name}
+        )
+    return Replica(
+        name, replica_engine, sessionmaker(autocommit=False, autoflush=False, bind=replica_engine, info={"replica": name}),
+        replica_async_engine, replica_async_sessions,
+    )
+
+read_replicas = ReplicaSet(
+    [create_replica(index, url) for index, url in enumerate(DATABASE_REPLICA_URLS)],
+    check_interval=DB_REPLICA_HEALTH_CHECK_SECONDS,
+    max_lag=DB_REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=DB_REPLICA_STICKY_SECONDS,
+)
+
+def get_read_db(request: Request):
+    """Session for read-only routes: a healthy replica, or the primary."""
+    replica: Optional[Replica] = read_replicas.choose(request.headers.get("authorization"))
+    db = (replica.session_factory if replica is not None else SessionLocal)()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    replica: Optional[Replica] = read_replicas.choose(request.headers.get("authorization"))
+    async with (replica.async_session_factory if replica is not None else AsyncSessionLocal)() as db:
+        yield db
+
+def from_replica(db) -> bool:
+    """Whether a (sync or async) session reads from a replica, which may lag the primary."""
+    return "replica" in db.info
+
+def database_pool_status() -> dict:
+    """Pool occupancy and checkout wait-time stats for each engine."""
+    return pool_status({"primary": engine, "async": async_engine, **read_replicas.engines()})
@@ -1,40 +1,71 @@
-from fastapi import Depends, HTTPException, status
+import hmac
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from typing import Optional
-from core.database import get_db
+from core.config import DEBUG, STATS_TOKEN
+from core.database import get_db, get_read_db, read_replicas
+from core.token_cache import UserSnapshot, token_cache
 from models.models import User
-from utils.auth import verify_token
+from utils.auth import decode_token
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get the current authenticated user."""
-    credentials_exception = HTTPException(
+def build_credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def authenticate_token(token: str, db: Session) -> Optional[UserSnapshot]:
+    """Resolve a token to an active user's snapshot, using the verified-token cache."""
+    snapshot = token_cache.lookup(token)
+    if snapshot is not None:
+        return snapshot if snapshot.is_active else None
+    
+    payload = decode_token(token)
+    if payload is None or payload.get("sub") is None:
+        return None
     
-    username = verify_token(token)
-    if username is None:
-        raise credentials_exception
+    changes = token_cache.begin_db_lookup()
+    user = db.query(User).filter(User.username == payload["sub"]).first()
+    if user is None or not user.is_active:
+        return None
+    
+    return token_cache.store(token, user, payload.get("exp"), changes)
+
+def get_current_user(request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """Get the current authenticated user."""
+    user = authenticate_token(token, db)
+    if user is None:
+        raise build_credentials_exception()
     
-    user = db.query(User).filter(User.username == username).first()
+    if request.method != "GET":
+        # Read this user's next requests from the primary so they see their own write
+        read_replicas.record_write(token)
+    return user
+
+def get_current_user_read(token: str = Depends(oauth2_scheme), db: Session = Depends(get_read_db)):
+    """Get the current authenticated user for a read-only route."""
+    user = authenticate_token(token, db)
     if user is None:
-        raise credentials_exception
+        raise build_credentials_exception()
     
     return user
 
-def get_current_user_optional(token: Optional[str] = Depends(optional_oauth2_scheme), db: Session = Depends(get_db)) -> Optional[User]:
+def require_stats_access(token: Optional[str] = Depends(optional_oauth2_scheme)):
+    """Guard operational endpoints: STATS_TOKEN as a bearer token, or DEBUG mode when none is set."""
+    if STATS_TOKEN:
+        if token is None or not hmac.compare_digest(token, STATS_TOKEN):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Stats access denied")
+    elif not DEBUG:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Stats are disabled; set STATS_TOKEN")
+
+def get_current_user_optional(token: Optional[str] = Depends(optional_oauth2_scheme), db: Session = Depends(get_read_db)) -> Optional[UserSnapshot]:
     """Get the current authenticated user, or None if not authenticated."""
     if token is None:
         return None
     
-    username = verify_token(token)
-    if username is None:
-        return None
-    
-    user = db.query(User).filter(User.username == username).first()
-    return user
\ No newline at end of file
+    return authenticate_token(token, db)
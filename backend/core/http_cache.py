@@ -0,0 +1,42 @@
+"""ETags and Cache-Control for poll reads.
+
+A poll's ETag is derived from its ``version`` column, which every vote, like,
+edit and delete bumps in the same transaction. The caller's user id is part of
+the tag because responses carry ``user_voted``/``user_liked``. Version tokens
+come from ``services/poll_service.py``, which also accounts for votes still
+buffered by the write-behind ingester.
+"""
+import hashlib
+from typing import Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from core.config import HTTP_CACHE_MAX_AGE, HTTP_CACHE_STALE_WHILE_REVALIDATE
+
+def poll_etag(versions: Iterable[Tuple[int, str]], user_id: Optional[int], *extra) -> str:
+    """Strong ETag for a response built from polls at the given (id, version token)s."""
+    parts = [f"u{user_id or 0}", *map(str, extra)]
+    parts.extend(f"{poll_id}:{token}" for poll_id, token in versions)
+    digest = hashlib.blake2b("|".join(parts).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """True if the request's If-None-Match covers ``etag``."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so a W/ prefix is ignored
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def cache_headers(etag: str, user_id: Optional[int]) -> dict:
+    """Headers for a cacheable poll response."""
+    if user_id is None:
+        cache_control = f"public, max-age={HTTP_CACHE_MAX_AGE}, stale-while-revalidate={HTTP_CACHE_STALE_WHILE_REVALIDATE}"
+    else:
+        cache_control = "private, no-cache"
+    return {"ETag": etag, "Cache-Control": cache_control, "Vary": "Authorization"}
+
+def not_modified(headers: dict) -> Response:
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,212 @@
+"""Request instrumentation exposed in the Prometheus text format on ``/metrics``.
+
+``MetricsMiddleware`` times every HTTP request and labels it with the matched
+route template (``/polls/{poll_id}``), so per-route latency and per-route SQL
+query counts can be compared; an endpoint with an N+1 pattern stands out as a
+query-count outlier. SQL statements are counted and timed with SQLAlchemy
+cursor events on each engine (``instrument_engine``) and attributed to the
+request through a context variable, which Starlette copies into the threadpool
+that runs sync endpoints. Work done outside requests (background threads) is
+not attributed.
+
+With SLOW_REQUEST_MS set, requests slower than that are logged together with
+the statements they ran.
+"""
+import bisect
+import contextvars
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from core.config import SLOW_REQUEST_MS, SLOW_REQUEST_MAX_STATEMENTS
+from core.pool import POOL_STATS
+
+slow_logger = logging.getLogger("quickpoll.slow_requests")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+class RequestStats:
+    """SQL activity of the request in progress."""
+    __slots__ = ("queries", "sql_time", "statements")
+
+    def __init__(self, keep_statements: bool):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements: Optional[List[Tuple[float, str]]] = [] if keep_statements else None
+
+current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("current_request", default=None)
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+class MetricsRegistry:
+    """Per-route request metrics, rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.queries: Dict[Tuple[str, str], Histogram] = {}
+        self.sql_seconds: Dict[Tuple[str, str], float] = {}
+        self.slow_requests = 0
+
+    def record(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+            if key not in self.latency:
+                self.latency[key] = Histogram(LATENCY_BUCKETS)
+                self.queries[key] = Histogram(QUERY_COUNT_BUCKETS)
+            self.latency[key].observe(elapsed)
+            self.queries[key].observe(stats.queries)
+            self.sql_seconds[key] = self.sql_seconds.get(key, 0.0) + stats.sql_time
+
+    def record_slow(self):
+        with self._lock:
+            self.slow_requests += 1
+
+    def render(self, pool_status: dict) -> str:
+        lines: List[str] = []
+        with self._lock:
+            _counter(lines, "quickpoll_http_requests_total", "HTTP requests by route and status.", {
+                (("method", m), ("route", r), ("status", str(s))): n for (m, r, s), n in self.requests.items()
+            })
+            _histograms(lines, "quickpoll_http_request_duration_seconds", "Request latency by route.", self.latency)
+            _histograms(lines, "quickpoll_db_queries_per_request", "SQL statements executed per request, by route.", self.queries)
+            _counter(lines, "quickpoll_db_query_seconds_total", "Time spent in SQL statements, by route.", {
+                (("method", m), ("route", r)): seconds for (m, r), seconds in self.sql_seconds.items()
+            })
+            _counter(lines, "quickpoll_slow_requests_total", "Requests slower than SLOW_REQUEST_MS.", {(): self.slow_requests})
+        _pool_metrics(lines, pool_status)
+        return "\n".join(lines) + "\n"
+
+def _labels(pairs) -> str:
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _counter(lines: List[str], name: str, help_text: str, values: dict, kind: str = "counter"):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in values.items():
+        lines.append(f"{name}{_labels(labels)} {value}")
+
+def _histograms(lines: List[str], name: str, help_text: str, histograms: Dict[Tuple[str, str], Histogram]):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for (method, route), histogram in histograms.items():
+        base = (("method", method), ("route", route))
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels(base + (('le', bound),))} {cumulative}")
+        lines.append(f"{name}_bucket{_labels(base + (('le', '+Inf'),))} {histogram.count}")
+        lines.append(f"{name}_sum{_labels(base)} {histogram.total}")
+        lines.append(f"{name}_count{_labels(base)} {histogram.count}")
+
+def _pool_metrics(lines: List[str], pool_status: dict):
+    gauges = {"size": "Configured pool size.", "checked_out": "Connections in use.", "overflow": "Overflow connections open."}
+    for field, help_text in gauges.items():
+        _counter(lines, f"quickpoll_db_pool_{field}", help_text, {
+            (("engine", name),): entry[field] for name, entry in pool_status.items() if field in entry
+        }, kind="gauge")
+    _counter(lines, "quickpoll_db_pool_checkouts_total", "Connection checkouts.", {
+        (("engine", name),): stats.checkouts for name, stats in POOL_STATS.items()
+    })
+    _counter(lines, "quickpoll_db_pool_checkout_timeouts_total", "Checkouts that timed out.", {
+        (("engine", name),): stats.timeouts for name, stats in POOL_STATS.items()
+    })
+    _counter(lines, "quickpoll_db_pool_wait_seconds_total", "Time spent waiting for a connection.", {
+        (("engine", name),): stats.total_wait for name, stats in POOL_STATS.items()
+    })
+
+metrics_registry = MetricsRegistry()
+
+# SQLAlchemy hooks
+
+def instrument_engine(engine):
+    """Count and time statements on ``engine`` (pass ``async_engine.sync_engine`` for async)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_request.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_request.get()
+    if stats is None or not conn.info.get("query_start"):
+        return
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats.queries += 1
+    stats.sql_time += elapsed
+    if stats.statements is not None and len(stats.statements) < SLOW_REQUEST_MAX_STATEMENTS:
+        stats.statements.append((elapsed, statement))
+
+def _handle_error(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
+
+# Middleware
+
+class MetricsMiddleware:
+    """ASGI middleware that records every HTTP request in ``metrics_registry``."""
+
+    def __init__(self, app, registry: MetricsRegistry = metrics_registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(keep_statements=SLOW_REQUEST_MS > 0)
+        token = current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_request.reset(token)
+            # Label by route template; unmatched paths share one label to bound cardinality
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            self.registry.record(scope["method"], route_path, status_code, elapsed, stats)
+            if SLOW_REQUEST_MS > 0 and elapsed * 1000 >= SLOW_REQUEST_MS:
+                self._log_slow(scope["method"], scope["path"], route_path, status_code, elapsed, stats)
+
+    def _log_slow(self, method: str, path: str, route: str, status_code: int, elapsed: float, stats: RequestStats):
+        self.registry.record_slow()
+        statements = "\n".join(f"  {seconds * 1000:8.2f} ms  {' '.join(sql.split())}" for seconds, sql in stats.statements)
+        slow_logger.warning(
+            "Slow request %s %s (route %s) -> %s in %.1f ms, %d queries, %.1f ms SQL\n%s",
+            method, path, route, status_code, elapsed * 1000, stats.queries, stats.sql_time * 1000, statements,
+        )
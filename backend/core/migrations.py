@@ -0,0 +1,114 @@
+"""Versioned schema migration runner.
+
+Migrations live in the top-level ``migrations`` package as modules named
+``<version>_<name>.py`` exposing ``upgrade(connection)``. Applied versions are
+recorded in the ``schema_migrations`` table and each migration runs in its own
+transaction. Migrations are written to be idempotent so databases created by
+the old ``create_all`` call can be brought forward safely.
+"""
+import importlib
+import pkgutil
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import func
+
+MIGRATIONS_PACKAGE = "migrations"
+
+# Arbitrary key for the Postgres advisory lock held while migrating
+ADVISORY_LOCK_ID = 7461_0001
+
+migration_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migration_metadata,
+    Column("version", String(32), primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+class Migration(NamedTuple):
+    version: str
+    name: str
+    module: object
+
+def discover_migrations() -> List[Migration]:
+    """Return all migrations in version order."""
+    package = importlib.import_module(MIGRATIONS_PACKAGE)
+    migrations = []
+    for module_info in pkgutil.iter_modules(package.__path__):
+        version, _, name = module_info.name.partition("_")
+        if not version.isdigit():
+            continue
+        module = importlib.import_module(f"{MIGRATIONS_PACKAGE}.{module_info.name}")
+        migrations.append(Migration(version, name, module))
+    return sorted(migrations, key=lambda migration: migration.version)
+
+def applied_versions(connection: Connection) -> set:
+    """Return the set of versions already recorded as applied (read-only)."""
+    if not has_table(connection, schema_migrations.name):
+        return set()
+    return set(connection.execute(select(schema_migrations.c.version)).scalars())
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    """Return migrations that have not been applied yet, without issuing any DDL."""
+    with engine.connect() as connection:
+        applied = applied_versions(connection)
+    return [migration for migration in discover_migrations() if migration.version not in applied]
+
+def run_migrations(engine: Engine, target: Optional[str] = None) -> List[Migration]:
+    """Apply pending migrations up to ``target`` (inclusive) and return them."""
+    is_postgres = engine.dialect.name == "postgresql"
+    applied = []
+
+    with engine.connect() as lock_connection:
+        # Serialize concurrent runners (e.g. several workers booting) on Postgres
+        if is_postgres:
+            lock_connection.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+            lock_connection.commit()
+        try:
+            with engine.begin() as connection:
+                migration_metadata.create_all(bind=connection, checkfirst=True)
+            for migration in pending_migrations(engine):
+                if target is not None and migration.version > target:
+                    break
+                with engine.begin() as connection:
+                    migration.module.upgrade(connection)
+                    connection.execute(
+                        schema_migrations.insert().values(version=migration.version, name=migration.name)
+                    )
+                applied.append(migration)
+        finally:
+            if is_postgres:
+                lock_connection.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+                lock_connection.commit()
+
+    return applied
+
+# Helpers for writing idempotent migrations
+
+def has_table(connection: Connection, table: str) -> bool:
+    return inspect(connection).has_table(table)
+
+def has_column(connection: Connection, table: str, column: str) -> bool:
+    return any(col["name"] == column for col in inspect(connection).get_columns(table))
+
+def has_index(connection: Connection, table: str, index: str) -> bool:
+    return any(idx["name"] == index for idx in inspect(connection).get_indexes(table))
+
+def add_column(connection: Connection, table: str, column: str, ddl: str) -> bool:
+    """Add ``column`` to ``table`` unless it exists. Returns True if added."""
+    if has_column(connection, table, column):
+        return False
+    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return True
+
+def create_index(connection: Connection, table: str, index: str, columns: str, unique: bool = False) -> bool:
+    """Create ``index`` on ``table`` unless it exists. Returns True if created."""
+    if has_index(connection, table, index):
+        return False
+    kind = "UNIQUE INDEX" if unique else "INDEX"
+    connection.execute(text(f"CREATE {kind} {index} ON {table} ({columns})"))
+    return True
@@ -0,0 +1,97 @@
+"""Connection pool instrumentation.
+
+The pools below time how long each checkout waits for a connection and count
+checkout timeouts, so pool size and overflow can be tuned from real data.
+"""
+import threading
+import time
+from collections import deque
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+class PoolStats:
+    """Checkout counts and wait-time samples for one pool."""
+
+    def __init__(self, sample_size: int = 2048):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=sample_size)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+
+    def record_wait(self, seconds: float, checked_out: int):
+        with self._lock:
+            self.checkouts += 1
+            self.total_wait += seconds
+            self.max_wait = max(self.max_wait, seconds)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+            self._waits.append(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            waits = sorted(self._waits)
+        def pct(p):
+            return round(waits[min(len(waits) - 1, int(p / 100 * len(waits)))] * 1000, 3) if waits else 0.0
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "peak_checked_out": self.peak_checked_out,
+            "wait_ms_avg": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+            "wait_ms_p50": pct(50),
+            "wait_ms_p99": pct(99),
+            "wait_ms_max": round(self.max_wait * 1000, 3),
+        }
+
+# Stats per pool, keyed by the name given to the engine in core/database.py
+POOL_STATS: Dict[str, PoolStats] = {}
+
+class _TimedCheckoutMixin:
+    stats_name = "primary"
+
+    def _do_get(self):
+        stats = POOL_STATS.setdefault(self.stats_name, PoolStats())
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.record_timeout()
+            raise
+        stats.record_wait(time.perf_counter() - start, self.checkedout())
+        return connection
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+def named_pool_class(base, name: str):
+    """Return a subclass of ``base`` that reports its stats under ``name``."""
+    return type(base.__name__, (base,), {"stats_name": name})
+
+def pool_status(engines: Dict[str, object]) -> dict:
+    """Current occupancy plus accumulated stats for each named engine."""
+    status = {}
+    for name, engine in engines.items():
+        if engine is None:
+            continue
+        pool = engine.pool
+        entry = {"pool": pool.__class__.__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        entry.update(POOL_STATS.get(name, PoolStats()).snapshot())
+        status[name] = entry
+    return status
@@ -0,0 +1,301 @@
+"""Rate limiting and admission control middleware.
+
+Two checks run before a request reaches the app:
+
+* Token buckets per route. Each rule allows a burst of N requests that refills
+  over S seconds, keyed per user (by access token) or per client IP. Rejected
+  requests get 429 with Retry-After. Buckets live in process memory by default,
+  or in Redis (``RATE_LIMIT_BACKEND=redis``) so all workers share them.
+* A concurrency limit. At most ADMISSION_MAX_CONCURRENT requests run at once,
+  which defaults to the DB pool's size plus overflow, so a burst queues here
+  instead of on pool checkout. A request that cannot get a slot within
+  ADMISSION_QUEUE_TIMEOUT_MS gets 503 with Retry-After. Streams and stats
+  endpoints are exempt.
+
+The middleware is plain ASGI (no BaseHTTPMiddleware), and routes without a rule
+only pay for a dict lookup and a counter.
+"""
+import asyncio
+import logging
+import math
+import re
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from core.config import (
+    ADMISSION_MAX_CONCURRENT, ADMISSION_QUEUE_TIMEOUT_MS, RATE_LIMIT_BACKEND, RATE_LIMIT_ENABLED,
+    RATE_LIMIT_EXPORT, RATE_LIMIT_LIKE, RATE_LIMIT_LOGIN, RATE_LIMIT_MAX_KEYS, RATE_LIMIT_REGISTER, RATE_LIMIT_TRUST_FORWARDED,
+    RATE_LIMIT_VOTE, REDIS_URL,
+)
+from core.token_cache import token_cache
+from utils.auth import decode_token
+
+logger = logging.getLogger(__name__)
+
+class RateLimitRule(NamedTuple):
+    name: str
+    methods: Tuple[str, ...]
+    path: str  # route template, e.g. "/polls/{poll_id}/vote"
+    per: str  # "user" or "ip"
+    burst: int
+    period: float  # seconds to refill a full burst
+
+    @property
+    def rate(self) -> float:
+        return self.burst / self.period
+
+def parse_limit(spec: str) -> Optional[Tuple[int, float]]:
+    """Parse "<burst>/<seconds>"; an empty spec disables the rule."""
+    if not spec.strip():
+        return None
+    burst, _, period = spec.partition("/")
+    return int(burst), float(period or 1)
+
+def default_rules() -> List[RateLimitRule]:
+    rules = []
+    for name, methods, path, per, spec in (
+        ("login", ("POST",), "/auth/login", "ip", RATE_LIMIT_LOGIN),
+        ("register", ("POST",), "/auth/register", "ip", RATE_LIMIT_REGISTER),
+        ("vote", ("POST",), "/polls/{poll_id}/vote", "user", RATE_LIMIT_VOTE),
+        ("vote", ("POST",), "/votes/batch", "user", RATE_LIMIT_VOTE),
+        ("like", ("POST", "DELETE"), "/polls/{poll_id}/like", "user", RATE_LIMIT_LIKE),
+        ("export", ("GET",), "/polls/{poll_id}/export", "user", RATE_LIMIT_EXPORT),
+        ("export", ("GET",), "/polls/export", "user", RATE_LIMIT_EXPORT),
+    ):
+        limit = parse_limit(spec)
+        if limit is not None:
+            rules.append(RateLimitRule(name, methods, path, per, *limit))
+    return rules
+
+# Long-lived or operational endpoints that never take a concurrency slot. Exports
+# only hold a database connection while reading each batch, not for the download.
+ADMISSION_EXEMPT = re.compile(r"^(/health/|/stats/|/docs|/redoc|/openapi\.json|/polls/[^/]+/stream$|/polls/([^/]+/)?export$)")
+
+# Backends
+
+class InMemoryBackend:
+    """Token buckets in a bounded LRU dict. Only touched from the event loop."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, list]" = OrderedDict()
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        """Take one token. Returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [float(burst), now]
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            return 0.0
+        return (1 - bucket[0]) / rate
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "keys": len(self._buckets), "max_keys": self.max_keys}
+
+class RedisBackend:
+    """Token buckets shared by all workers, updated atomically by a Lua script.
+
+    Requires the optional ``redis`` package. If Redis is unreachable requests
+    are let through rather than failed.
+    """
+
+    script = """
+    local now = redis.call('TIME')
+    now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as exc:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from exc
+        self._client = aioredis.Redis.from_url(url)
+        self._script = self._client.register_script(self.script)
+        self.errors = 0
+
+    async def acquire(self, key: str, rate: float, burst: int) -> float:
+        try:
+            return float(await self._script(keys=[f"quickpoll:ratelimit:{key}"], args=[rate, burst]))
+        except Exception:
+            self.errors += 1
+            logger.warning("Rate limit backend unavailable, allowing request", exc_info=True)
+            return 0.0
+
+    def stats(self) -> dict:
+        return {"backend": "redis", "errors": self.errors}
+
+def create_backend():
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisBackend(REDIS_URL)
+    return InMemoryBackend(RATE_LIMIT_MAX_KEYS)
+
+# Controller and middleware
+
+class AdmissionController:
+    """Holds the rules, bucket backend, concurrency limit and their counters."""
+
+    def __init__(self, rules: List[RateLimitRule], backend, max_concurrent: int, queue_timeout: float, trust_forwarded: bool = False):
+        self.backend = backend
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.trust_forwarded = trust_forwarded
+        self._routes: Dict[str, List[Tuple[re.Pattern, RateLimitRule]]] = {}
+        for rule in rules:
+            pattern = re.compile("^" + re.sub(r"\{[^}]+\}", "[^/]+", rule.path) + "/?$")
+            for method in rule.methods:
+                self._routes.setdefault(method, []).append((pattern, rule))
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.limited: Dict[str, int] = {}
+        self.shed = 0
+
+    def match(self, method: str, path: str) -> Optional[RateLimitRule]:
+        for pattern, rule in self._routes.get(method, ()):
+            if pattern.match(path):
+                return rule
+        return None
+
+    def client_key(self, scope, per: str) -> str:
+        """Bucket key for the caller: the user behind a valid token, else the client IP."""
+        if per == "user":
+            user_id = self._user_id(scope)
+            if user_id is not None:
+                return f"user:{user_id}"
+        return f"ip:{self._client_ip(scope)}"
+
+    async def check_rate(self, scope) -> Optional[Tuple[str, float]]:
+        """Return (rule name, retry-after seconds) if the request is over its limit."""
+        rule = self.match(scope["method"], scope["path"])
+        if rule is None:
+            return None
+        retry_after = await self.backend.acquire(f"{rule.name}:{self.client_key(scope, rule.per)}", rule.rate, rule.burst)
+        if retry_after > 0:
+            self.limited[rule.name] = self.limited.get(rule.name, 0) + 1
+            return rule.name, retry_after
+        return None
+
+    async def admit(self) -> bool:
+        """Take a concurrency slot, waiting up to ``queue_timeout``. False if none freed up."""
+        if self.in_flight < self.max_concurrent and not self._waiters:
+            self.in_flight += 1
+            if self.in_flight > self.peak_in_flight:
+                self.peak_in_flight = self.in_flight
+            return True
+        
+        # Queue in arrival order; release() hands its slot straight to the first waiter
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return True  # the slot arrived just as the wait timed out
+            self._waiters.remove(waiter)
+            self.shed += 1
+            return False
+        return True
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "shed": self.shed,
+            "rate_limited": dict(self.limited),
+            "buckets": self.backend.stats(),
+        }
+
+    def _user_id(self, scope) -> Optional[str]:
+        authorization = _header(scope, b"authorization")
+        if not authorization or not authorization.lower().startswith("bearer "):
+            return None
+        token = authorization[7:]
+        # Tokens seen by the app are usually cached; otherwise verify the signature.
+        # Either way the key is the token's subject (the username).
+        cached = token_cache.peek(token)
+        if cached is not None:
+            return cached[0].username
+        payload = decode_token(token)
+        return payload.get("sub") if payload else None
+
+    def _client_ip(self, scope) -> str:
+        if self.trust_forwarded:
+            forwarded = _header(scope, b"x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+class AdmissionMiddleware:
+    """ASGI middleware applying an ``AdmissionController`` to HTTP requests."""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        controller = self.controller
+
+        limited = await controller.check_rate(scope)
+        if limited is not None:
+            return await _reject(scope, receive, send, 429, "Too many requests", limited[1])
+
+        if controller.max_concurrent <= 0 or ADMISSION_EXEMPT.match(scope["path"]):
+            return await self.app(scope, receive, send)
+        if not await controller.admit():
+            return await _reject(scope, receive, send, 503, "Server is busy, please retry", 1)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release()
+
+async def _reject(scope, receive, send, status_code: int, detail: str, retry_after: float):
+    response = JSONResponse({"detail": detail}, status_code=status_code, headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+    await response(scope, receive, send)
+
+admission_controller = AdmissionController(
+    rules=default_rules() if RATE_LIMIT_ENABLED else [],
+    backend=create_backend(),
+    max_concurrent=ADMISSION_MAX_CONCURRENT,
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    trust_forwarded=RATE_LIMIT_TRUST_FORWARDED,
+)
@@ -0,0 +1,157 @@
+"""Read replicas for read-only routes.
+
+Routes that only read take their session from ``get_read_db`` (see
+core/database.py), which spreads them round-robin over the healthy replicas
+and falls back to the primary when none is healthy.
+
+A background thread checks each replica every DB_REPLICA_HEALTH_CHECK_SECONDS.
+On PostgreSQL it also measures replay lag, and a replica lagging more than
+DB_REPLICA_MAX_LAG_SECONDS is taken out of rotation until it catches up. A
+replica whose connection drops mid-request is taken out at once.
+
+Read-your-writes: after an authenticated write (any non-GET request through
+``get_current_user``, plus login), that access token's reads go to the primary
+for DB_REPLICA_STICKY_SECONDS, so users see their own votes and likes even if
+the replicas lag. Stickiness is tracked per process.
+"""
+import itertools
+import logging
+import threading
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, text
+
+from core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind; 0 when it has replayed everything it received
+LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+class Replica:
+    """One read replica: its engines, session factories and health."""
+
+    def __init__(self, name: str, engine, session_factory, async_engine=None, async_session_factory=None):
+        self.name = name
+        self.engine = engine
+        self.session_factory = session_factory
+        self.async_engine = async_engine
+        self.async_session_factory = async_session_factory
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.reads = 0
+        for sync_engine in (engine, getattr(async_engine, "sync_engine", None)):
+            if sync_engine is not None:
+                event.listen(sync_engine, "handle_error", self._on_error)
+
+    def _on_error(self, exception_context):
+        if exception_context.is_disconnect and self.healthy:
+            self.healthy = False
+            self.last_error = str(exception_context.original_exception)
+            logger.warning("Read replica %s disconnected; reads go elsewhere until it passes a health check", self.name)
+
+class ReplicaSet:
+    """Routes reads across replicas with health checks and read-your-writes stickiness."""
+
+    def __init__(self, replicas: List[Replica], check_interval: float, max_lag: float, sticky_seconds: float):
+        self.replicas = replicas
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._next = itertools.count()
+        self._sticky = TTLCache("read_your_writes", maxsize=100000, ttl=sticky_seconds)
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.primary_reads = 0
+        self.sticky_reads = 0
+
+    def choose(self, authorization: Optional[str]) -> Optional[Replica]:
+        """The replica to serve a read, or None to read from the primary."""
+        if not self.replicas:
+            return None
+        if authorization and len(self._sticky) and self._sticky.peek(_bearer_token(authorization)) is not None:
+            self.sticky_reads += 1
+            return None
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            self.primary_reads += 1
+            return None
+        replica = healthy[next(self._next) % len(healthy)]
+        replica.reads += 1
+        return replica
+
+    def record_write(self, token: str):
+        """Send this token's reads to the primary for the sticky window."""
+        if self.replicas:
+            self._sticky.set(token, True)
+
+    def check(self):
+        """Run one round of health checks."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    lag_query = LAG_QUERIES.get(replica.engine.dialect.name)
+                    if lag_query is not None:
+                        replica.lag = float(connection.execute(text(lag_query)).scalar() or 0)
+                    else:
+                        connection.execute(text("SELECT 1"))
+                healthy = not (self.max_lag > 0 and replica.lag is not None and replica.lag > self.max_lag)
+                replica.last_error = None if healthy else f"replication lag {replica.lag:.1f}s"
+            except Exception as exc:
+                healthy = False
+                replica.last_error = str(exc)
+            if healthy != replica.healthy:
+                if healthy:
+                    logger.info("Read replica %s is healthy again", replica.name)
+                else:
+                    logger.warning("Read replica %s taken out of rotation: %s", replica.name, replica.last_error)
+            replica.healthy = healthy
+
+    def start(self):
+        if not self.replicas or self._thread is not None:
+            return
+        self.check()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for replica in self.replicas:
+            replica.engine.dispose()
+
+    def _run(self):
+        while not self._stopping.wait(self.check_interval):
+            self.check()
+
+    def engines(self) -> Dict[str, object]:
+        """Replica engines by pool name, for pool stats and instrumentation."""
+        engines = {}
+        for replica in self.replicas:
+            engines[replica.name] = replica.engine
+            if replica.async_engine is not None:
+                engines[f"{replica.name}-async"] = replica.async_engine
+        return engines
+
+    def stats(self) -> dict:
+        return {
+            "replicas": [
+                {"name": replica.name, "healthy": replica.healthy, "lag_seconds": replica.lag, "reads": replica.reads, "last_error": replica.last_error}
+                for replica in self.replicas
+            ],
+            "primary_fallback_reads": self.primary_reads,
+            "sticky_reads": self.sticky_reads,
+            "sticky_tokens": len(self._sticky),
+            "sticky_seconds": self._sticky.ttl,
+        }
+
+def _bearer_token(authorization: str) -> str:
+    return authorization[7:] if authorization[:7].lower() == "bearer " else authorization
@@ -0,0 +1,17 @@
+"""Fast JSON responses for payloads the app builds itself."""
+import orjson
+from fastapi.responses import JSONResponse
+
+class TrustedJSONResponse(JSONResponse):
+    """Serialize a payload with orjson, skipping response-model validation.
+
+    FastAPI only validates and re-encodes a route's return value when it is
+    not already a Response, so returning this bypasses both steps. Use it only
+    for dicts built internally (e.g. by ``services/poll_service.py``) whose shape
+    matches the route's ``response_model`` by construction; the model still
+    documents the route in OpenAPI.
+    """
+
+    def render(self, content) -> bytes:
+        # OPT_UTC_Z writes UTC datetimes as "...Z", like Pydantic does
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
@@ -0,0 +1,141 @@
+"""Cache of verified access tokens.
+
+A hit skips both the JWT decode and the user lookup. Entries map the raw token
+to an immutable ``UserSnapshot`` and expire no later than the token's ``exp``.
+
+Deactivating a user through a Session invalidates their cached tokens once the
+transaction commits: an ORM change of ``User.is_active`` drops that user's
+tokens, and a bulk ``UPDATE`` of ``users`` run through a Session drops every
+cached token. A lookup that raced with the change is not cached. Invalidation
+is local to the process; other workers, and updates made outside a Session,
+are only picked up when entries expire, so ``AUTH_CACHE_TTL_SECONDS`` bounds
+how long a deactivated user's token can keep working.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from core.cache import TTLCache
+from core.config import AUTH_CACHE_MAX_SIZE, AUTH_CACHE_TTL_SECONDS
+from models.models import User
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only view of the authenticated user, safe to share across requests."""
+    id: int
+    username: str
+    email: str
+    is_active: bool
+    created_at: datetime
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        return cls(user.id, user.username, user.email, user.is_active, user.created_at)
+
+class TokenCache(TTLCache):
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        super().__init__(name, maxsize, ttl)
+        self._user_generations: Dict[int, int] = {}
+        self._user_epoch = 0
+        # Bumped by every invalidation, so a lookup can tell whether one happened while it ran
+        self._user_changes = 0
+        self._user_lock = threading.Lock()
+        self.db_lookups = 0
+
+    def lookup(self, token: str) -> Optional[UserSnapshot]:
+        entry = self.get(token)
+        if entry is None:
+            return None
+        snapshot, generation = entry
+        if generation != self._user_generation(snapshot.id):
+            # The user changed (e.g. was deactivated) since this token was cached
+            self.invalidate(token)
+            self.hits -= 1
+            self.misses += 1
+            return None
+        return snapshot
+
+    def begin_db_lookup(self) -> int:
+        """Count a user query and return the change marker to pass to ``store``."""
+        with self._user_lock:
+            self.db_lookups += 1
+            return self._user_changes
+
+    def store(self, token: str, user: User, expires_at: Optional[int], changes: int) -> UserSnapshot:
+        """Cache the user loaded for a freshly verified token.
+
+        Nothing is cached if a user was invalidated since ``begin_db_lookup``
+        returned ``changes``, as the query may have read the old row.
+        """
+        snapshot = UserSnapshot.from_user(user)
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        with self._user_lock:
+            if changes != self._user_changes:
+                return snapshot
+            generation = self._user_epoch, self._user_generations.get(snapshot.id, 0)
+        if ttl > 0:
+            self.set(token, (snapshot, generation), ttl=ttl)
+        return snapshot
+
+    def invalidate_user(self, user_id: int):
+        with self._user_lock:
+            self._user_generations[user_id] = self._user_generations.get(user_id, 0) + 1
+            self._user_changes += 1
+
+    def invalidate_all_users(self):
+        with self._user_lock:
+            self._user_epoch += 1
+            self._user_generations.clear()
+            self._user_changes += 1
+
+    def _user_generation(self, user_id: int):
+        with self._user_lock:
+            return self._user_epoch, self._user_generations.get(user_id, 0)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats["db_lookups_saved"] = self.hits
+        stats["db_lookups"] = self.db_lookups
+        return stats
+
+token_cache = TokenCache("auth_tokens", AUTH_CACHE_MAX_SIZE, AUTH_CACHE_TTL_SECONDS)
+
+# Changes are collected per session and applied only after commit; invalidating
+# at flush would let a concurrent lookup re-cache the old row before it commits.
+_ALL_USERS = "all"
+
+def _pending_invalidations(session: Session) -> set:
+    return session.info.setdefault("token_cache_invalidations", set())
+
+@event.listens_for(User, "after_update")
+def _invalidate_on_user_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and inspect(target).attrs.is_active.history.has_changes():
+        _pending_invalidations(session).add(target.id)
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_on_bulk_update(orm_execute_state):
+    if orm_execute_state.is_update and getattr(orm_execute_state.statement.table, "name", None) == User.__tablename__:
+        _pending_invalidations(orm_execute_state.session).add(_ALL_USERS)
+
+@event.listens_for(Session, "after_commit")
+def _apply_invalidations(session):
+    invalidations = session.info.pop("token_cache_invalidations", None)
+    if not invalidations:
+        return
+    if _ALL_USERS in invalidations:
+        token_cache.invalidate_all_users()
+    else:
+        for user_id in invalidations:
+            token_cache.invalidate_user(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_invalidations(session):
+    session.info.pop("token_cache_invalidations", None)
@@ -1,14 +1,60 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from core.cache import cache_stats
+from core.config import DB_ASYNC, METRICS_ENABLED, MIGRATE_ON_STARTUP
+from core.database import async_engine, database_pool_status, engine, read_replicas
+from core.dependencies import require_stats_access
+from core.metrics import MetricsMiddleware, instrument_engine, metrics_registry
+from core.migrations import pending_migrations, run_migrations
+from core.rate_limit import AdmissionMiddleware, admission_controller
+from routers import stream
+from services.counter_engine import counter_engine
+from services.stream_service import stream_hub
+from services.trending_service import trending
+from services.vote_ingest import vote_ingester
+from utils.hashing import password_hasher
 
-from core.database import engine
-from models.models import Base
-from routers import auth, polls, votes, likes
+if DB_ASYNC:
+    from routers.aio import auth, polls, votes, likes
+else:
+    from routers import auth, polls, votes, likes
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if MIGRATE_ON_STARTUP:
+        # Create or upgrade tables; serve.py does this once before starting workers instead
+        run_migrations(engine)
+    # Fork hashing workers before any background threads start
+    password_hasher.start()
+    await stream_hub.start()
+    trending.start()
+    read_replicas.start()
+    if counter_engine is not None:
+        counter_engine.start()
+    if vote_ingester is not None:
+        vote_ingester.start()
+    yield
+    if vote_ingester is not None:
+        vote_ingester.stop()
+    if counter_engine is not None:
+        counter_engine.stop()
+    read_replicas.stop()
+    trending.stop()
+    await stream_hub.stop()
+    password_hasher.shutdown(wait=True)
+    if async_engine is not None:
+        await async_engine.dispose()
 
-app = FastAPI(title="QuickPoll API", description="Real-time Opinion Polling Platform")
+app = FastAPI(title="QuickPoll API", description="Real-time Opinion Polling Platform", lifespan=lifespan)
+
+# Rate limits and concurrency cap (added first so CORS headers wrap its 429/503s)
+app.add_middleware(AdmissionMiddleware, controller=admission_controller)
 
 # CORS middleware
 app.add_middleware(
@@ -17,18 +63,90 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Request metrics (added last so it also times requests the middlewares above reject)
+if METRICS_ENABLED:
+    instrument_engine(engine)
+    if async_engine is not None:
+        instrument_engine(async_engine.sync_engine)
+    for replica_engine in read_replicas.engines().values():
+        instrument_engine(getattr(replica_engine, "sync_engine", replica_engine))
+    app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(polls.router)
 app.include_router(votes.router)
+app.include_router(votes.batch_router)
 app.include_router(likes.router)
+app.include_router(stream.router)
 
 @app.get("/")
 def root():
     return {"message": "Welcome to QuickPoll API"}
 
+@app.get("/health/live")
+def liveness():
+    """The process is up."""
+    return {"status": "ok"}
+
+_schema_current = False
+
+@app.get("/health/ready")
+def readiness():
+    """Ready for traffic: startup has finished, the database answers and its schema is current."""
+    global _schema_current
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        if not _schema_current:
+            pending = pending_migrations(engine)
+            if pending:
+                return JSONResponse({"status": "migrations pending", "pending": [migration.version for migration in pending]}, status_code=503)
+            _schema_current = True
+    except SQLAlchemyError as exc:
+        return JSONResponse({"status": "database unavailable", "error": type(exc).__name__}, status_code=503)
+    return {"status": "ready"}
+
+@app.get("/metrics", response_class=PlainTextResponse, dependencies=[Depends(require_stats_access)])
+def get_metrics():
+    """Per-route latency, SQL query counts and pool usage in the Prometheus text format."""
+    return PlainTextResponse(metrics_registry.render(database_pool_status()), media_type="text/plain; version=0.0.4")
+
+@app.get("/stats/caches", dependencies=[Depends(require_stats_access)])
+def get_cache_stats():
+    """Hit/miss/eviction stats for the in-process caches."""
+    return cache_stats()
+
+@app.get("/stats/trending", dependencies=[Depends(require_stats_access)])
+def get_trending_stats():
+    """Size and checkpoint state of the trending ranking."""
+    return trending.stats()
+
+@app.get("/stats/counters", dependencies=[Depends(require_stats_access)])
+def get_counter_stats():
+    """Resident polls and flush state of the in-memory vote counters."""
+    if counter_engine is None:
+        return {"enabled": False}
+    return {"enabled": True, **counter_engine.stats()}
+
+@app.get("/stats/admission", dependencies=[Depends(require_stats_access)])
+def get_admission_stats():
+    """Requests in flight, shed and rate limited."""
+    return admission_controller.stats()
+
+@app.get("/stats/replicas", dependencies=[Depends(require_stats_access)])
+def get_replica_stats():
+    """Read replica health, lag and how reads were routed."""
+    return read_replicas.stats()
+
+@app.get("/stats/pool", dependencies=[Depends(require_stats_access)])
+def get_pool_stats():
+    """Connection pool occupancy and checkout wait times."""
+    return database_pool_status()
+
 if __name__ == "__main__":
     import uvicorn
     import os
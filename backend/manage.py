@@ -0,0 +1,129 @@
+"""Administrative commands for the QuickPoll backend.
+
+Usage: python manage.py <command> [options]
+"""
+import argparse
+import sys
+
+from core.database import SessionLocal, engine
+
+def migrate(args):
+    """Apply pending schema migrations."""
+    from core.migrations import discover_migrations, pending_migrations, run_migrations
+
+    if args.list:
+        pending = {migration.version for migration in pending_migrations(engine)}
+        for migration in discover_migrations():
+            status = "pending" if migration.version in pending else "applied"
+            print(f"{migration.version} {migration.name}: {status}")
+        return
+
+    applied = run_migrations(engine, target=args.target)
+    for migration in applied:
+        print(f"Applied {migration.version} {migration.name}")
+    if not applied:
+        print("Database is up to date")
+
+def reconcile_counters(args):
+    """Recompute denormalized vote/like counters and repair drift."""
+    from services.counter_service import reconcile_counters as reconcile
+
+    db = SessionLocal()
+    try:
+        drift = reconcile(db, dry_run=args.dry_run)
+    finally:
+        db.close()
+
+    action = "would repair" if args.dry_run else "repaired"
+    for name, rows in drift.items():
+        print(f"{name}: {action} {rows} row(s)")
+
+def backfill_rollups(args):
+    """Rebuild the vote timeseries rollups from existing votes."""
+    from services.timeseries_service import backfill_rollups as backfill
+
+    db = SessionLocal()
+    try:
+        written = backfill(db, poll_ids=args.poll)
+    finally:
+        db.close()
+    print(f"Wrote {written} rollup row(s)")
+
+def rebuild_search_index(args):
+    """Re-index every active poll for full-text search."""
+    from services.search_service import SearchUnavailable, rebuild_search_index as rebuild
+
+    db = SessionLocal()
+    try:
+        indexed = rebuild(db)
+    except SearchUnavailable as exc:
+        sys.exit(str(exc))
+    finally:
+        db.close()
+    print(f"Indexed {indexed} poll(s)")
+
+def sync_replicas(args):
+    """Copy the primary SQLite database onto SQLite read replicas (local testing)."""
+    import sqlite3
+    import time
+
+    from sqlalchemy.engine import make_url
+
+    from core.config import DATABASE_REPLICA_URLS
+
+    if engine.dialect.name != "sqlite":
+        sys.exit("sync-replicas only copies SQLite files; use the database's own replication otherwise")
+    targets = [make_url(url).database for url in DATABASE_REPLICA_URLS if make_url(url).get_backend_name() == "sqlite"]
+    if not targets:
+        sys.exit("DATABASE_REPLICA_URLS lists no SQLite replicas")
+
+    while True:
+        source = sqlite3.connect(engine.url.database)
+        try:
+            for path in targets:
+                try:
+                    target = sqlite3.connect(path)
+                    try:
+                        source.backup(target)
+                    finally:
+                        target.close()
+                except sqlite3.Error as exc:
+                    print(f"Could not copy to {path}: {exc}")
+                    continue
+                print(f"Copied {engine.url.database} to {path}")
+        finally:
+            source.close()
+        if not args.every:
+            return
+        # Repeating copies behave like asynchronous replication with up to this much lag
+        time.sleep(args.every)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="QuickPoll management commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help=migrate.__doc__)
+    migrate_parser.add_argument("--list", action="store_true", help="Show applied and pending migrations")
+    migrate_parser.add_argument("--target", help="Stop after this migration version")
+    migrate_parser.set_defaults(func=migrate)
+
+    reconcile_parser = subparsers.add_parser("reconcile-counters", help=reconcile_counters.__doc__)
+    reconcile_parser.add_argument("--dry-run", action="store_true", help="Report drift without repairing it")
+    reconcile_parser.set_defaults(func=reconcile_counters)
+
+    rollups_parser = subparsers.add_parser("backfill-rollups", help=backfill_rollups.__doc__)
+    rollups_parser.add_argument("--poll", type=int, action="append", help="Only this poll (repeatable)")
+    rollups_parser.set_defaults(func=backfill_rollups)
+
+    search_parser = subparsers.add_parser("rebuild-search-index", help=rebuild_search_index.__doc__)
+    search_parser.set_defaults(func=rebuild_search_index)
+
+    replicas_parser = subparsers.add_parser("sync-replicas", help=sync_replicas.__doc__)
+    replicas_parser.add_argument("--every", type=float, help="Keep copying every N seconds")
+    replicas_parser.set_defaults(func=sync_replicas)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
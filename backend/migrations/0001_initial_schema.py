@@ -0,0 +1,6 @@
+"""Create the base tables for fresh databases."""
+from models.models import Base
+
+def upgrade(connection):
+    # Existing tables are left untouched; later migrations bring them forward
+    Base.metadata.create_all(bind=connection, checkfirst=True)
@@ -0,0 +1,23 @@
+"""Add denormalized vote and like counters and backfill them."""
+from sqlalchemy import text
+
+from core.migrations import add_column
+
+def upgrade(connection):
+    added = [
+        add_column(connection, "poll_options", "vote_count", "INTEGER NOT NULL DEFAULT 0"),
+        add_column(connection, "polls", "total_votes", "INTEGER NOT NULL DEFAULT 0"),
+        add_column(connection, "polls", "like_count", "INTEGER NOT NULL DEFAULT 0"),
+    ]
+    if not any(added):
+        return
+
+    connection.execute(text(
+        "UPDATE poll_options SET vote_count = "
+        "(SELECT COUNT(*) FROM votes WHERE votes.option_id = poll_options.id)"
+    ))
+    connection.execute(text(
+        "UPDATE polls SET "
+        "total_votes = (SELECT COUNT(*) FROM votes WHERE votes.poll_id = polls.id), "
+        "like_count = (SELECT COUNT(*) FROM poll_likes WHERE poll_likes.poll_id = polls.id)"
+    ))
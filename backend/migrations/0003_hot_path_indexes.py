@@ -0,0 +1,26 @@
+"""Index the vote and poll hot paths and enforce one vote per user per poll."""
+from sqlalchemy import text
+
+from core.migrations import create_index, has_index
+
+def upgrade(connection):
+    if not has_index(connection, "votes", "uq_votes_poll_user"):
+        # Drop duplicate votes left by the old check-then-insert race, keeping the first
+        removed = connection.execute(text(
+            "DELETE FROM votes WHERE id NOT IN "
+            "(SELECT MIN(id) FROM votes GROUP BY poll_id, user_id)"
+        )).rowcount
+        if removed:
+            connection.execute(text(
+                "UPDATE poll_options SET vote_count = "
+                "(SELECT COUNT(*) FROM votes WHERE votes.option_id = poll_options.id)"
+            ))
+            connection.execute(text(
+                "UPDATE polls SET total_votes = "
+                "(SELECT COUNT(*) FROM votes WHERE votes.poll_id = polls.id)"
+            ))
+        create_index(connection, "votes", "uq_votes_poll_user", "poll_id, user_id", unique=True)
+
+    create_index(connection, "votes", "ix_votes_option_id", "option_id")
+    create_index(connection, "polls", "ix_polls_is_active_created_at", "is_active, created_at")
+    create_index(connection, "poll_options", "ix_poll_options_poll_id", "poll_id")
@@ -0,0 +1,13 @@
+"""Add keyset pagination indexes for the newest, most-voted and most-liked feeds."""
+from sqlalchemy import text
+
+from core.migrations import create_index, has_index
+
+def upgrade(connection):
+    create_index(connection, "polls", "ix_polls_feed_newest", "is_active, created_at, id")
+    create_index(connection, "polls", "ix_polls_feed_most_voted", "is_active, total_votes, id")
+    create_index(connection, "polls", "ix_polls_feed_most_liked", "is_active, like_count, id")
+    
+    # Superseded by ix_polls_feed_newest, which has the same leading columns
+    if has_index(connection, "polls", "ix_polls_is_active_created_at"):
+        connection.execute(text("DROP INDEX ix_polls_is_active_created_at"))
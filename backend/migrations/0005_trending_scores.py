@@ -0,0 +1,5 @@
+"""Add the checkpoint table for the trending ranking."""
+from models.models import TrendingScore
+
+def upgrade(connection):
+    TrendingScore.__table__.create(bind=connection, checkfirst=True)
@@ -0,0 +1,5 @@
+"""Add the per-poll version counter used for HTTP ETags."""
+from core.migrations import add_column
+
+def upgrade(connection):
+    add_column(connection, "polls", "version", "INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,8 @@
+"""Add per-bucket vote rollups for the results timeseries.
+
+Existing votes are not rolled up here; run ``python manage.py backfill-rollups``.
+"""
+from models.models import VoteRollup
+
+def upgrade(connection):
+    VoteRollup.__table__.create(bind=connection, checkfirst=True)
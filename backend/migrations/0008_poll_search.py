@@ -0,0 +1,21 @@
+"""Add the full-text search index for polls (FTS5 on SQLite, tsvector + GIN on PostgreSQL).
+
+Existing polls are not indexed here; run ``python manage.py rebuild-search-index``.
+"""
+from sqlalchemy import text
+
+SCHEMA = {
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS poll_search USING fts5(title, description, options, tokenize = 'porter unicode61')",
+    ],
+    "postgresql": [
+        "CREATE TABLE IF NOT EXISTS poll_search ("
+        "poll_id INTEGER PRIMARY KEY REFERENCES polls (id) ON DELETE CASCADE, document TSVECTOR NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS ix_poll_search_document ON poll_search USING GIN (document)",
+    ],
+}
+
+def upgrade(connection):
+    # Other backends have no search index; GET /polls/search answers 501 there
+    for statement in SCHEMA.get(connection.dialect.name, []):
+        connection.execute(text(statement))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Float, Text, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from core.database import Base
@@ -28,6 +28,12 @@ class User(Base):
 
 class Poll(Base):
     __tablename__ = "polls"
+    __table_args__ = (
+        # Keyset pagination indexes for the feeds in services/feed_service.py
+        Index("ix_polls_feed_newest", "is_active", "created_at", "id"),
+        Index("ix_polls_feed_most_voted", "is_active", "total_votes", "id"),
+        Index("ix_polls_feed_most_liked", "is_active", "like_count", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
@@ -36,6 +42,12 @@ class Poll(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Denormalized counters, maintained on write (see services/counter_service.py)
+    total_votes = Column(Integer, nullable=False, default=0, server_default="0")
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Bumped by every vote, like, edit and delete; feeds the HTTP ETags (core/http_cache.py)
+    version = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Relationships
     creator = relationship("User", back_populates="polls")
     options = relationship("PollOption", back_populates="poll")
@@ -47,23 +59,49 @@ class PollOption(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     text = Column(String(500), nullable=False)
-    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False)
+    poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Denormalized counter, maintained on write
+    vote_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Relationships
     poll = relationship("Poll", back_populates="options")
     votes = relationship("Vote", back_populates="option")
 
 class Vote(Base):
     __tablename__ = "votes"
+    __table_args__ = (
+        # One vote per user per poll, enforced by the database
+        Index("uq_votes_poll_user", "poll_id", "user_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     poll_id = Column(Integer, ForeignKey("polls.id"), nullable=False)
-    option_id = Column(Integer, ForeignKey("poll_options.id"), nullable=False)
+    option_id = Column(Integer, ForeignKey("poll_options.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     # Relationships
     user = relationship("User", back_populates="votes")
     poll = relationship("Poll", back_populates="votes")
-    option = relationship("PollOption", back_populates="votes")
\ No newline at end of file
+    option = relationship("PollOption", back_populates="votes")
+
+class TrendingScore(Base):
+    """Checkpoint of the in-memory trending ranking (services/trending_service.py)."""
+    __tablename__ = "poll_trending_scores"
+
+    poll_id = Column(Integer, ForeignKey("polls.id"), primary_key=True)
+    # Decay-invariant key: log2(score) + t / half_life, so rows never need rewriting just to age
+    score_key = Column(Float, nullable=False, index=True)
+
+class VoteRollup(Base):
+    """Votes per option per time bucket, maintained on write (services/timeseries_service.py)."""
+    __tablename__ = "poll_vote_rollups"
+
+    # Primary key order serves the timeseries query: one poll, one bucket size, a range of buckets
+    poll_id = Column(Integer, ForeignKey("polls.id"), primary_key=True)
+    bucket_seconds = Column(Integer, primary_key=True)  # 60, 3600 or 86400
+    bucket_start = Column(Integer, primary_key=True)  # Unix time of the bucket's start
+    option_id = Column(Integer, ForeignKey("poll_options.id"), primary_key=True)
+    vote_count = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1 @@
+# Async routers, mounted instead of the sync ones when DB_ASYNC is enabled
@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import timedelta
+
+from core.database import get_async_db, read_replicas
+from models.models import User
+from schemas.schemas import UserCreate, UserResponse, Token
+from utils.auth import create_access_token, password_needs_rehash
+from utils.hashing import HashingBusy, password_hasher
+from routers.auth import hashing_busy_exception
+from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
+from core.async_dependencies import get_current_user_read_async
+
+router = APIRouter(prefix="/auth", tags=["Authentication"])
+
+@router.post("/register", response_model=UserResponse)
+async def register(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Register a new user."""
+    # Check if user exists
+    result = await db.execute(select(User).where(
+        (User.username == user.username) | (User.email == user.email)
+    ))
+    if result.scalars().first():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username or email already registered"
+        )
+    
+    # Create new user; hashing runs in the bounded password-hashing pool
+    # with the connection returned to the pool meanwhile
+    await db.rollback()
+    try:
+        hashed_password = await password_hasher.hash_async(user.password)
+    except HashingBusy:
+        raise hashing_busy_exception()
+    db_user = User(
+        username=user.username,
+        email=user.email,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    
+    return db_user
+
+@router.post("/login", response_model=Token)
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    """Login and get access token."""
+    result = await db.execute(select(User.id, User.username, User.hashed_password, User.is_active).where(User.username == form_data.username))
+    user = result.first()
+    # Return the connection to the pool while bcrypt runs
+    await db.rollback()
+    try:
+        valid = user is not None and user.is_active and await password_hasher.verify_async(form_data.password, user.hashed_password)
+        if valid and password_needs_rehash(user.hashed_password):
+            # Upgrade hashes made with an old bcrypt cost
+            new_hash = await password_hasher.hash_async(form_data.password)
+            await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+            await db.commit()
+    except HashingBusy:
+        raise hashing_busy_exception()
+    if not valid:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.username}, expires_delta=access_token_expires
+    )
+    # A new account may not have reached the read replicas yet
+    read_replicas.record_write(access_token)
+    return {"access_token": access_token, "token_type": "bearer"}
+
+@router.get("/me", response_model=UserResponse)
+async def get_me(current_user: User = Depends(get_current_user_read_async)):
+    """Get current user info."""
+    return current_user
@@ -0,0 +1,60 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import get_async_db
+from models.models import User, Poll, poll_likes
+from core.async_dependencies import get_current_user_async
+from services.async_poll_service import record_like
+from services.poll_service import invalidate_poll
+from services.stream_service import stream_hub
+from services.trending_service import trending
+
+router = APIRouter(prefix="/polls", tags=["Likes"])
+
+async def _check_like(poll_id: int, user_id: int, db: AsyncSession) -> bool:
+    """Raise 404 for a missing poll, otherwise return whether the user liked it."""
+    poll = await db.execute(select(Poll.id).where(Poll.id == poll_id))
+    if poll.first() is None:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    liked = await db.execute(select(poll_likes.c.poll_id).where(
+        poll_likes.c.poll_id == poll_id,
+        poll_likes.c.user_id == user_id
+    ))
+    return liked.first() is not None
+
+@router.post("/{poll_id}/like")
+async def like_poll(poll_id: int, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Like a poll."""
+    if await _check_like(poll_id, current_user.id, db):
+        raise HTTPException(status_code=400, detail="You have already liked this poll")
+    
+    # Add like and bump the counter in the same transaction
+    await db.execute(poll_likes.insert().values(user_id=current_user.id, poll_id=poll_id))
+    version = await record_like(poll_id, 1, db)
+    await db.commit()
+    invalidate_poll(poll_id)
+    stream_hub.publish_like(poll_id, 1, version)
+    trending.record_like(poll_id, 1)
+    
+    return {"message": "Poll liked successfully"}
+
+@router.delete("/{poll_id}/like")
+async def unlike_poll(poll_id: int, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Unlike a poll."""
+    if not await _check_like(poll_id, current_user.id, db):
+        raise HTTPException(status_code=400, detail="You have not liked this poll")
+    
+    # Remove like and drop the counter in the same transaction
+    await db.execute(poll_likes.delete().where(
+        poll_likes.c.poll_id == poll_id,
+        poll_likes.c.user_id == current_user.id
+    ))
+    version = await record_like(poll_id, -1, db)
+    await db.commit()
+    invalidate_poll(poll_id)
+    stream_hub.publish_like(poll_id, -1, version)
+    trending.record_like(poll_id, -1)
+    
+    return {"message": "Poll unliked successfully"}
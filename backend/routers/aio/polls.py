@@ -0,0 +1,216 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional
+
+from core.database import get_async_db, get_async_read_db
+from models.models import User, Poll
+from core.http_cache import etag_matches, not_modified
+from core.responses import TrustedJSONResponse
+from schemas.schemas import PollBatchRequest, PollBatchResponse, PollCreate, PollImportResponse, PollResponse, PollTimeseriesResponse, PollUpdate, TrendingPollResponse
+from core.config import TRENDING_TOP_K
+from core.async_dependencies import get_current_user_async, get_current_user_optional_async, get_current_user_read_async
+from services.export_service import EXPORT_FORMAT_PATTERN, export_headers, export_votes_async, owned_poll_ids_async, single_poll
+from services.feed_service import InvalidCursor, feed_statement, paginate
+from services.search_service import paginate_search
+from services.async_poll_service import create_poll_service, get_poll_version, get_poll_with_details, get_polls_with_details, index_polls, insert_polls, unindex_polls
+from services.poll_service import invalidate_poll
+from routers.polls import FEED_SORT_PATTERN, order_batch, poll_cache_headers, rank_trending, require_import_format, run_import, search_page_statement, set_next_cursor, timeseries_bounds, with_trending_scores
+from services.timeseries_service import BUCKET_PATTERN, build_timeseries, poll_options_statement, rollups_statement
+from services.trending_service import trending
+from services.vote_ingest import vote_ingester
+
+router = APIRouter(prefix="/polls", tags=["Polls"])
+
+async def _get_owned_poll(poll_id: int, current_user: User, db: AsyncSession, action: str) -> Poll:
+    result = await db.execute(select(Poll).where(Poll.id == poll_id, Poll.is_active == True))
+    poll = result.scalars().first()
+    if not poll:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    # Check if user is the owner
+    if poll.creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail=f"Not authorized to {action} this poll")
+    return poll
+
+@router.post("/", response_model=PollResponse)
+async def create_poll(poll: PollCreate, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Create a new poll."""
+    return TrustedJSONResponse(await create_poll_service(poll, current_user, db))
+
+@router.post("/import", response_model=PollImportResponse)
+async def import_polls_endpoint(request: Request, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Create many polls from an NDJSON or CSV body, streamed in batches.
+
+    Invalid records are skipped and listed by line; see
+    services/poll_import_service.py for the formats.
+    """
+    format = require_import_format(request)
+
+    async def insert_batch(polls):
+        await insert_polls(polls, current_user.id, db)
+        await db.commit()
+
+    return TrustedJSONResponse(await run_import(request, format, insert_batch))
+
+@router.get("/", response_model=List[PollResponse])
+async def get_polls(request: Request, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=100), sort: str = Query("newest", pattern=FEED_SORT_PATTERN), cursor: Optional[str] = None, current_user: Optional[User] = Depends(get_current_user_optional_async), db: AsyncSession = Depends(get_async_read_db)):
+    """Get active polls, newest first by default.
+
+    Pass the X-Next-Cursor response header back as ``cursor`` for the next page.
+    """
+    try:
+        rows = (await db.execute(feed_statement(sort, limit, cursor, skip))).all()
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    polls, next_cursor = paginate(rows, sort, limit)
+    
+    # The page's ids and versions decide the body, so compare before building it
+    user_id = current_user.id if current_user else None
+    headers = poll_cache_headers([(poll.id, poll.version) for poll in polls], user_id)
+    if etag_matches(request, headers["ETag"]):
+        response = not_modified(headers)
+    else:
+        details = await get_polls_with_details(polls, user_id, db)
+        response = TrustedJSONResponse(details, headers=poll_cache_headers([(poll["id"], poll["version"]) for poll in details], user_id))
+    set_next_cursor(response, next_cursor)
+    return response
+
+@router.get("/trending", response_model=List[TrendingPollResponse])
+async def get_trending_polls(limit: int = Query(20, ge=1, le=TRENDING_TOP_K), current_user: Optional[User] = Depends(get_current_user_optional_async), db: AsyncSession = Depends(get_async_read_db)):
+    """Get the polls with the most recent vote and like activity."""
+    ranked = trending.top(limit)
+    if not ranked:
+        return []
+    result = await db.execute(select(Poll).where(Poll.id.in_([poll_id for poll_id, _ in ranked]), Poll.is_active == True))
+    
+    user_id = current_user.id if current_user else None
+    details = await get_polls_with_details(rank_trending(ranked, result.scalars().all()), user_id, db)
+    return TrustedJSONResponse(with_trending_scores(details, ranked))
+
+@router.post("/batch", response_model=PollBatchResponse)
+async def get_polls_batch(batch: PollBatchRequest, current_user: Optional[User] = Depends(get_current_user_optional_async), db: AsyncSession = Depends(get_async_read_db)):
+    """Get details for up to 100 polls in one request."""
+    result = await db.execute(select(Poll).where(Poll.id.in_(batch.ids), Poll.is_active == True))
+    polls, missing = order_batch(batch.ids, result.scalars().all())
+    
+    user_id = current_user.id if current_user else None
+    return TrustedJSONResponse({"polls": await get_polls_with_details(polls, user_id, db), "missing": missing})
+
+@router.get("/search", response_model=List[PollResponse])
+async def search_polls(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None, current_user: Optional[User] = Depends(get_current_user_optional_async), db: AsyncSession = Depends(get_async_read_db)):
+    """Search active polls by title, description and option text, most relevant first.
+
+    Every word of ``q`` must match. Pass the X-Next-Cursor response header back
+    as ``cursor`` for the next page.
+    """
+    statement = search_page_statement(db.get_bind().dialect.name, q, limit, cursor)
+    poll_ids, next_cursor = paginate_search((await db.execute(statement)).all() if statement is not None else [], limit)
+    polls = []
+    if poll_ids:
+        polls = (await db.execute(select(Poll).where(Poll.id.in_(poll_ids), Poll.is_active == True))).scalars().all()
+    
+    user_id = current_user.id if current_user else None
+    response = TrustedJSONResponse(await get_polls_with_details(order_batch(poll_ids, polls)[0], user_id, db))
+    set_next_cursor(response, next_cursor)
+    return response
+
+async def release_for_export(db: AsyncSession):
+    """The engine to export from; see routers/polls.py."""
+    engine = db.bind
+    await db.close()
+    return engine
+
+@router.get("/export")
+async def export_own_votes(format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, current_user: User = Depends(get_current_user_read_async), db: AsyncSession = Depends(get_async_read_db)):
+    """Download the votes on all of your active polls as CSV or NDJSON."""
+    engine = await release_for_export(db)
+    return StreamingResponse(
+        export_votes_async(engine, owned_poll_ids_async(engine, current_user.id), format, gzip),
+        **export_headers(f"user-{current_user.id}-votes", format, gzip),
+    )
+
+@router.get("/{poll_id}", response_model=PollResponse)
+async def get_poll(request: Request, poll_id: int, current_user: Optional[User] = Depends(get_current_user_optional_async), db: AsyncSession = Depends(get_async_read_db)):
+    """Get a specific poll by ID.
+
+    Answers 304 from the poll's version alone when If-None-Match still matches.
+    """
+    user_id = current_user.id if current_user else None
+    version = await get_poll_version(poll_id, db)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    headers = poll_cache_headers([(poll_id, version)], user_id)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
+    
+    details = await get_poll_with_details(poll_id, user_id, db, version)
+    if not details or not details["is_active"]:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    return TrustedJSONResponse(details, headers=poll_cache_headers([(poll_id, details["version"])], user_id))
+
+@router.get("/{poll_id}/results/timeseries", response_model=PollTimeseriesResponse)
+async def get_poll_timeseries(poll_id: int, bucket: str = Query("1h", pattern=BUCKET_PATTERN), since: Optional[datetime] = None, until: Optional[datetime] = None, db: AsyncSession = Depends(get_async_read_db)):
+    """Votes per option over time, in minute (1m), hour (1h) or day (1d) buckets.
+
+    Served from rollups kept on write, so the cost depends on the number of
+    buckets, not votes. Without ``since``, returns the latest 60 minutes,
+    48 hours or 30 days.
+    """
+    start, end = timeseries_bounds(bucket, since, until)
+    options = (await db.execute(poll_options_statement(poll_id))).all()
+    if not options:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    rollups = (await db.execute(rollups_statement(poll_id, bucket, start, end))).all()
+    return TrustedJSONResponse(build_timeseries(poll_id, bucket, start, end, options, rollups))
+
+@router.get("/{poll_id}/export")
+async def export_poll_votes(poll_id: int, format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, current_user: User = Depends(get_current_user_read_async), db: AsyncSession = Depends(get_async_read_db)):
+    """Download every vote on a poll as CSV or NDJSON (owner only)."""
+    await _get_owned_poll(poll_id, current_user, db, "export")
+    engine = await release_for_export(db)
+    return StreamingResponse(
+        export_votes_async(engine, single_poll(poll_id), format, gzip),
+        **export_headers(f"poll-{poll_id}-votes", format, gzip),
+    )
+
+@router.put("/{poll_id}", response_model=PollResponse)
+async def update_poll(poll_id: int, poll_update: PollUpdate, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Update a poll (owner only)."""
+    poll = await _get_owned_poll(poll_id, current_user, db, "update")
+    
+    # Update fields if provided
+    if poll_update.title is not None:
+        poll.title = poll_update.title
+    if poll_update.description is not None:
+        poll.description = poll_update.description
+    poll.version = Poll.version + 1
+    await db.flush()
+    await index_polls(db, [poll_id])
+    
+    await db.commit()
+    await db.refresh(poll)
+    invalidate_poll(poll_id)
+    
+    return TrustedJSONResponse(await get_poll_with_details(poll_id, current_user.id, db))
+
+@router.delete("/{poll_id}")
+async def delete_poll(poll_id: int, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Delete a poll (owner only)."""
+    poll = await _get_owned_poll(poll_id, current_user, db, "delete")
+    
+    # Soft delete
+    poll.is_active = False
+    poll.version = Poll.version + 1
+    await unindex_polls(db, [poll_id])
+    await db.commit()
+    invalidate_poll(poll_id)
+    trending.forget(poll_id)
+    if vote_ingester is not None:
+        vote_ingester.forget_poll(poll_id)
+    
+    return {"message": "Poll deleted successfully"}
@@ -0,0 +1,84 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+
+from core.database import get_async_db
+from models.models import User, Poll, PollOption, Vote
+from schemas.schemas import VoteAccepted, VoteBatchCreate, VoteBatchResponse, VoteCreate, VoteResponse
+from core.async_dependencies import get_current_user_async
+from services.async_poll_service import count_votes, record_vote
+from services.poll_service import invalidate_poll
+from services.stream_service import stream_hub
+from services.trending_service import trending
+from services.vote_batch_service import inserted_ids_statement, ownership_statement, settle_batch, validate_batch
+from services.vote_ingest import insert_new_votes, vote_ingester
+from routers.votes import accept_buffered_batch, accept_buffered_vote, publish_votes
+
+router = APIRouter(prefix="/polls", tags=["Voting"])
+batch_router = APIRouter(prefix="/votes", tags=["Voting"])
+
+@router.post("/{poll_id}/vote", response_model=VoteResponse, responses={202: {"model": VoteAccepted}})
+async def vote_on_poll(poll_id: int, vote: VoteCreate, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Vote on a poll."""
+    if vote_ingester is not None:
+        # The first vote on a poll loads its index from the database
+        return await run_in_threadpool(accept_buffered_vote, poll_id, vote.option_id, current_user.id)
+    
+    # Check that the poll is active and the option belongs to it in one query
+    result = await db.execute(
+        select(PollOption.id)
+        .join(Poll, Poll.id == PollOption.poll_id)
+        .where(PollOption.id == vote.option_id, Poll.id == poll_id, Poll.is_active == True)
+    )
+    if result.first() is None:
+        poll = await db.execute(select(Poll.id).where(Poll.id == poll_id, Poll.is_active == True))
+        if poll.first() is None:
+            raise HTTPException(status_code=404, detail="Poll not found")
+        raise HTTPException(status_code=400, detail="Invalid option for this poll")
+    
+    # Create vote; the (poll_id, user_id) unique index rejects repeat votes
+    db_vote = Vote(
+        user_id=current_user.id,
+        poll_id=poll_id,
+        option_id=vote.option_id,
+        # Set here rather than by the database so the rollups bucket the same timestamp
+        created_at=datetime.now(timezone.utc)
+    )
+    db.add(db_vote)
+    try:
+        await db.flush()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="You have already voted on this poll")
+    
+    # Bump the counters in the same transaction
+    version = await record_vote(poll_id, vote.option_id, db_vote.created_at, db)
+    await db.commit()
+    await count_votes([(poll_id, vote.option_id)])
+    await db.refresh(db_vote)
+    invalidate_poll(poll_id)
+    stream_hub.publish_vote(poll_id, vote.option_id, version)
+    trending.record_vote(poll_id)
+    
+    return db_vote
+
+@batch_router.post("/batch", response_model=VoteBatchResponse)
+async def vote_batch(vote_batch: VoteBatchCreate, current_user: User = Depends(get_current_user_async), db: AsyncSession = Depends(get_async_db)):
+    """Vote on several polls in one transaction.
+
+    Each item gets its own result; invalid items do not stop the others.
+    """
+    if vote_ingester is not None:
+        return await run_in_threadpool(accept_buffered_batch, vote_batch, current_user.id)
+    
+    ownership = (await db.execute(ownership_statement(vote_batch.votes))).all()
+    results, pending = validate_batch(vote_batch.votes, current_user.id, ownership)
+    inserted = await db.run_sync(insert_new_votes, [row for _, row in pending])
+    vote_ids = dict((await db.execute(inserted_ids_statement(current_user.id, inserted))).all()) if inserted else {}
+    await count_votes([(row["poll_id"], row["option_id"]) for row in inserted])
+    publish_votes(inserted)
+    
+    return {"results": settle_batch(results, pending, inserted, vote_ids)}
@@ -3,15 +3,23 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from datetime import timedelta
 
-from core.database import get_db
+from core.database import get_db, read_replicas
 from models.models import User
 from schemas.schemas import UserCreate, UserResponse, Token
-from utils.auth import verify_password, get_password_hash, create_access_token
+from utils.auth import create_access_token, password_needs_rehash
+from utils.hashing import HashingBusy, password_hasher
 from core.config import ACCESS_TOKEN_EXPIRE_MINUTES
-from core.dependencies import get_current_user
+from core.dependencies import get_current_user_read
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
+def hashing_busy_exception():
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=UserResponse)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     """Register a new user."""
@@ -25,8 +33,13 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
             detail="Username or email already registered"
         )
     
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    # Create new user; hashing runs in the bounded password-hashing pool
+    # with the connection returned to the pool meanwhile
+    db.rollback()
+    try:
+        hashed_password = password_hasher.hash(user.password)
+    except HashingBusy:
+        raise hashing_busy_exception()
     db_user = User(
         username=user.username,
         email=user.email,
@@ -41,8 +54,19 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 @router.post("/login", response_model=Token)
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """Login and get access token."""
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = db.query(User.id, User.username, User.hashed_password, User.is_active).filter(User.username == form_data.username).first()
+    # Return the connection to the pool while bcrypt runs
+    db.rollback()
+    try:
+        valid = user is not None and user.is_active and password_hasher.verify(form_data.password, user.hashed_password)
+        if valid and password_needs_rehash(user.hashed_password):
+            # Upgrade hashes made with an old bcrypt cost
+            new_hash = password_hasher.hash(form_data.password)
+            db.query(User).filter(User.id == user.id).update({User.hashed_password: new_hash})
+            db.commit()
+    except HashingBusy:
+        raise hashing_busy_exception()
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -53,9 +77,11 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
+    # A new account may not have reached the read replicas yet
+    read_replicas.record_write(access_token)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
-def get_me(current_user: User = Depends(get_current_user)):
+def get_me(current_user: User = Depends(get_current_user_read)):
     """Get current user info."""
     return current_user
\ No newline at end of file
@@ -2,11 +2,22 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from core.database import get_db
-from models.models import User, Poll
+from models.models import User, Poll, poll_likes
 from core.dependencies import get_current_user
+from services.counter_service import record_like
+from services.poll_service import invalidate_poll
+from services.stream_service import stream_hub
+from services.trending_service import trending
 
 router = APIRouter(prefix="/polls", tags=["Likes"])
 
+def _has_liked(poll_id: int, user_id: int, db: Session) -> bool:
+    """Check for a like row without loading every liker of the poll."""
+    return db.query(poll_likes).filter(
+        poll_likes.c.poll_id == poll_id,
+        poll_likes.c.user_id == user_id
+    ).first() is not None
+
 @router.post("/{poll_id}/like")
 def like_poll(poll_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Like a poll."""
@@ -16,12 +27,16 @@ def like_poll(poll_id: int, current_user: User = Depends(get_current_user), db:
         raise HTTPException(status_code=404, detail="Poll not found")
     
     # Check if already liked
-    if current_user in poll.liked_by:
+    if _has_liked(poll_id, current_user.id, db):
         raise HTTPException(status_code=400, detail="You have already liked this poll")
     
-    # Add like
-    poll.liked_by.append(current_user)
+    # Add like and bump the counter in the same transaction
+    db.execute(poll_likes.insert().values(user_id=current_user.id, poll_id=poll_id))
+    version = record_like(poll_id, 1, db)
     db.commit()
+    invalidate_poll(poll_id)
+    stream_hub.publish_like(poll_id, 1, version)
+    trending.record_like(poll_id, 1)
     
     return {"message": "Poll liked successfully"}
 
@@ -34,11 +49,18 @@ def unlike_poll(poll_id: int, current_user: User = Depends(get_current_user), db
         raise HTTPException(status_code=404, detail="Poll not found")
     
     # Check if liked
-    if current_user not in poll.liked_by:
+    if not _has_liked(poll_id, current_user.id, db):
         raise HTTPException(status_code=400, detail="You have not liked this poll")
     
-    # Remove like
-    poll.liked_by.remove(current_user)
+    # Remove like and drop the counter in the same transaction
+    db.execute(poll_likes.delete().where(
+        poll_likes.c.poll_id == poll_id,
+        poll_likes.c.user_id == current_user.id
+    ))
+    version = record_like(poll_id, -1, db)
     db.commit()
+    invalidate_poll(poll_id)
+    stream_hub.publish_like(poll_id, -1, version)
+    trending.record_like(poll_id, -1)
     
-    return {"message": "Poll unliked successfully"}
\ No newline at end of file
+    return {"message": "Poll unliked successfully"}
@@ -1,37 +1,234 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from datetime import datetime
+from typing import List, Optional, Tuple
 
-from core.database import get_db
+from core.database import get_db, get_read_db
 from models.models import User, Poll
-from schemas.schemas import PollCreate, PollResponse, PollUpdate
-from core.dependencies import get_current_user, get_current_user_optional
-from services.poll_service import create_poll_service, get_poll_with_details
+from core.http_cache import cache_headers, etag_matches, not_modified, poll_etag
+from core.responses import TrustedJSONResponse
+from schemas.schemas import PollBatchRequest, PollBatchResponse, PollCreate, PollImportResponse, PollResponse, PollTimeseriesResponse, PollUpdate, TrendingPollResponse
+from core.config import TRENDING_TOP_K
+from core.dependencies import get_current_user, get_current_user_optional, get_current_user_read
+from services.export_service import EXPORT_FORMAT_PATTERN, export_headers, export_votes, owned_poll_ids
+from services.feed_service import InvalidCursor, feed_statement, paginate
+from services.poll_import_service import IMPORT_CONTENT_TYPES, InvalidImport, import_format, import_polls
+from services.poll_service import create_poll_service, get_poll_version, get_poll_with_details, get_polls_with_details, insert_polls, invalidate_poll, version_token
+from services.search_service import SearchUnavailable, index_polls, paginate_search, search_statement, unindex_polls
+from services.timeseries_service import BUCKET_PATTERN, poll_timeseries, timeseries_range
+from services.trending_service import trending
+from services.vote_ingest import vote_ingester
 
 router = APIRouter(prefix="/polls", tags=["Polls"])
 
 @router.post("/", response_model=PollResponse)
 def create_poll(poll: PollCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Create a new poll."""
-    db_poll = create_poll_service(poll, current_user.id, db)
-    return get_poll_with_details(db_poll.id, current_user.id, db)
+    return TrustedJSONResponse(create_poll_service(poll, current_user, db))
+
+def require_import_format(request: Request) -> str:
+    format = import_format(request.headers.get("content-type"))
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send polls as {' or '.join(IMPORT_CONTENT_TYPES)}",
+        )
+    return format
+
+async def run_import(request: Request, format: str, insert_batch) -> dict:
+    try:
+        return await import_polls(request.stream(), format, insert_batch)
+    except InvalidImport as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+@router.post("/import", response_model=PollImportResponse)
+async def import_polls_endpoint(request: Request, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Create many polls from an NDJSON or CSV body, streamed in batches.
+
+    Invalid records are skipped and listed by line; see
+    services/poll_import_service.py for the formats.
+    """
+    format = require_import_format(request)
+
+    def insert_batch(polls):
+        insert_polls(polls, current_user.id, db)
+        db.commit()
+
+    return TrustedJSONResponse(await run_import(request, format, lambda polls: run_in_threadpool(insert_batch, polls)))
+
+FEED_SORT_PATTERN = "^(newest|most_voted|most_liked)$"
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]):
+    """Expose the cursor for the next page in the X-Next-Cursor header."""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+def poll_cache_headers(versions: List[Tuple[int, int]], user_id: Optional[int]) -> dict:
+    """ETag and Cache-Control for a response built from polls at the given (id, version)s."""
+    etag = poll_etag(((poll_id, version_token(poll_id, version)) for poll_id, version in versions), user_id)
+    return cache_headers(etag, user_id)
 
 @router.get("/", response_model=List[PollResponse])
-def get_polls(skip: int = 0, limit: int = 100, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_db)):
-    """Get all active polls."""
-    polls = db.query(Poll).filter(Poll.is_active == True).offset(skip).limit(limit).all()
+def get_polls(request: Request, skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=100), sort: str = Query("newest", pattern=FEED_SORT_PATTERN), cursor: Optional[str] = None, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_read_db)):
+    """Get active polls, newest first by default.
+
+    Pass the X-Next-Cursor response header back as ``cursor`` for the next page.
+    """
+    try:
+        rows = db.execute(feed_statement(sort, limit, cursor, skip)).all()
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    polls, next_cursor = paginate(rows, sort, limit)
+    
+    # The page's ids and versions decide the body, so compare before building it
     user_id = current_user.id if current_user else None
-    return [get_poll_with_details(poll.id, user_id, db) for poll in polls]
+    headers = poll_cache_headers([(poll.id, poll.version) for poll in polls], user_id)
+    if etag_matches(request, headers["ETag"]):
+        response = not_modified(headers)
+    else:
+        details = get_polls_with_details(polls, user_id, db)
+        response = TrustedJSONResponse(details, headers=poll_cache_headers([(poll["id"], poll["version"]) for poll in details], user_id))
+    set_next_cursor(response, next_cursor)
+    return response
+
+def rank_trending(ranked: List[Tuple[int, float]], polls: List[Poll]) -> List[Poll]:
+    """Order active polls by their trending rank and drop deleted ones from the ranking."""
+    polls_by_id = {poll.id: poll for poll in polls}
+    for poll_id, _ in ranked:
+        if poll_id not in polls_by_id:
+            trending.forget(poll_id)
+    return [polls_by_id[poll_id] for poll_id, _ in ranked if poll_id in polls_by_id]
+
+def with_trending_scores(details: List[dict], ranked: List[Tuple[int, float]]) -> List[dict]:
+    scores = dict(ranked)
+    for poll_details in details:
+        poll_details["trending_score"] = round(scores[poll_details["id"]], 4)
+    return details
+
+@router.get("/trending", response_model=List[TrendingPollResponse])
+def get_trending_polls(limit: int = Query(20, ge=1, le=TRENDING_TOP_K), current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_read_db)):
+    """Get the polls with the most recent vote and like activity."""
+    ranked = trending.top(limit)
+    if not ranked:
+        return []
+    polls = db.query(Poll).filter(Poll.id.in_([poll_id for poll_id, _ in ranked]), Poll.is_active == True).all()
+    
+    user_id = current_user.id if current_user else None
+    details = get_polls_with_details(rank_trending(ranked, polls), user_id, db)
+    return TrustedJSONResponse(with_trending_scores(details, ranked))
+
+def order_batch(ids: List[int], polls: List[Poll]) -> Tuple[List[Poll], List[int]]:
+    """Put fetched polls in request order and list the ids that were not found."""
+    polls_by_id = {poll.id: poll for poll in polls}
+    return [polls_by_id[poll_id] for poll_id in ids if poll_id in polls_by_id], [poll_id for poll_id in ids if poll_id not in polls_by_id]
+
+@router.post("/batch", response_model=PollBatchResponse)
+def get_polls_batch(batch: PollBatchRequest, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_read_db)):
+    """Get details for up to 100 polls in one request."""
+    polls = db.query(Poll).filter(Poll.id.in_(batch.ids), Poll.is_active == True).all()
+    polls, missing = order_batch(batch.ids, polls)
+    
+    user_id = current_user.id if current_user else None
+    return TrustedJSONResponse({"polls": get_polls_with_details(polls, user_id, db), "missing": missing})
+
+def search_page_statement(dialect_name: str, q: str, limit: int, cursor: Optional[str]):
+    """Statement for one page of search results (None if ``q`` has no searchable terms)."""
+    try:
+        return search_statement(dialect_name, q, limit, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except SearchUnavailable as exc:
+        raise HTTPException(status_code=501, detail=str(exc))
+
+@router.get("/search", response_model=List[PollResponse])
+def search_polls(q: str = Query(..., min_length=1, max_length=200), limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_read_db)):
+    """Search active polls by title, description and option text, most relevant first.
+
+    Every word of ``q`` must match. Pass the X-Next-Cursor response header back
+    as ``cursor`` for the next page.
+    """
+    statement = search_page_statement(db.get_bind().dialect.name, q, limit, cursor)
+    poll_ids, next_cursor = paginate_search(db.execute(statement).all() if statement is not None else [], limit)
+    polls = db.query(Poll).filter(Poll.id.in_(poll_ids), Poll.is_active == True).all() if poll_ids else []
+    
+    user_id = current_user.id if current_user else None
+    response = TrustedJSONResponse(get_polls_with_details(order_batch(poll_ids, polls)[0], user_id, db))
+    set_next_cursor(response, next_cursor)
+    return response
+
+def release_for_export(db: Session):
+    """The engine to export from; the request's session is closed so it holds no
+    connection while the download runs (the export checks out its own per batch)."""
+    engine = db.get_bind()
+    db.close()
+    return engine
+
+@router.get("/export")
+def export_own_votes(format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, current_user: User = Depends(get_current_user_read), db: Session = Depends(get_read_db)):
+    """Download the votes on all of your active polls as CSV or NDJSON."""
+    engine = release_for_export(db)
+    return StreamingResponse(
+        export_votes(engine, owned_poll_ids(engine, current_user.id), format, gzip),
+        **export_headers(f"user-{current_user.id}-votes", format, gzip),
+    )
 
 @router.get("/{poll_id}", response_model=PollResponse)
-def get_poll(poll_id: int, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_db)):
-    """Get a specific poll by ID."""
-    poll = db.query(Poll).filter(Poll.id == poll_id, Poll.is_active == True).first()
-    if not poll:
+def get_poll(request: Request, poll_id: int, current_user: Optional[User] = Depends(get_current_user_optional), db: Session = Depends(get_read_db)):
+    """Get a specific poll by ID.
+
+    Answers 304 from the poll's version alone when If-None-Match still matches.
+    """
+    user_id = current_user.id if current_user else None
+    version = get_poll_version(poll_id, db)
+    if version is None:
         raise HTTPException(status_code=404, detail="Poll not found")
+    headers = poll_cache_headers([(poll_id, version)], user_id)
+    if etag_matches(request, headers["ETag"]):
+        return not_modified(headers)
     
-    user_id = current_user.id if current_user else None
-    return get_poll_with_details(poll_id, user_id, db)
+    details = get_poll_with_details(poll_id, user_id, db, version)
+    if not details or not details["is_active"]:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    return TrustedJSONResponse(details, headers=poll_cache_headers([(poll_id, details["version"])], user_id))
+
+def timeseries_bounds(bucket: str, since: Optional[datetime], until: Optional[datetime]) -> Tuple[int, int]:
+    try:
+        return timeseries_range(bucket, since, until)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+@router.get("/{poll_id}/results/timeseries", response_model=PollTimeseriesResponse)
+def get_poll_timeseries(poll_id: int, bucket: str = Query("1h", pattern=BUCKET_PATTERN), since: Optional[datetime] = None, until: Optional[datetime] = None, db: Session = Depends(get_read_db)):
+    """Votes per option over time, in minute (1m), hour (1h) or day (1d) buckets.
+
+    Served from rollups kept on write, so the cost depends on the number of
+    buckets, not votes. Without ``since``, returns the latest 60 minutes,
+    48 hours or 30 days.
+    """
+    start, end = timeseries_bounds(bucket, since, until)
+    timeseries = poll_timeseries(db, poll_id, bucket, start, end)
+    if timeseries is None:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    
+    return TrustedJSONResponse(timeseries)
+
+@router.get("/{poll_id}/export")
+def export_poll_votes(poll_id: int, format: str = Query("csv", pattern=EXPORT_FORMAT_PATTERN), gzip: bool = False, current_user: User = Depends(get_current_user_read), db: Session = Depends(get_read_db)):
+    """Download every vote on a poll as CSV or NDJSON (owner only).
+
+    Streamed in batches, so memory use does not grow with the number of votes.
+    """
+    creator_id = db.query(Poll.creator_id).filter(Poll.id == poll_id, Poll.is_active == True).scalar()
+    if creator_id is None:
+        raise HTTPException(status_code=404, detail="Poll not found")
+    if creator_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to export this poll")
+    
+    engine = release_for_export(db)
+    return StreamingResponse(export_votes(engine, [poll_id], format, gzip), **export_headers(f"poll-{poll_id}-votes", format, gzip))
 
 @router.put("/{poll_id}", response_model=PollResponse)
 def update_poll(poll_id: int, poll_update: PollUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -49,11 +246,15 @@ def update_poll(poll_id: int, poll_update: PollUpdate, current_user: User = Depe
         poll.title = poll_update.title
     if poll_update.description is not None:
         poll.description = poll_update.description
+    poll.version = Poll.version + 1
+    db.flush()
+    index_polls(db, [poll_id])
     
     db.commit()
     db.refresh(poll)
+    invalidate_poll(poll_id)
     
-    return get_poll_with_details(poll_id, current_user.id, db)
+    return TrustedJSONResponse(get_poll_with_details(poll_id, current_user.id, db))
 
 @router.delete("/{poll_id}")
 def delete_poll(poll_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
@@ -68,6 +269,12 @@ def delete_poll(poll_id: int, current_user: User = Depends(get_current_user), db
     
     # Soft delete
     poll.is_active = False
+    poll.version = Poll.version + 1
+    unindex_polls(db, [poll_id])
     db.commit()
+    invalidate_poll(poll_id)
+    trending.forget(poll_id)
+    if vote_ingester is not None:
+        vote_ingester.forget_poll(poll_id)
     
     return {"message": "Poll deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,99 @@
+import asyncio
+import json
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+
+from core.config import STREAM_KEEPALIVE_SECONDS
+from core.database import SessionLocal
+from services.poll_service import get_poll_version, get_poll_with_details
+from services.stream_service import stream_hub
+
+router = APIRouter(prefix="/polls", tags=["Streaming"])
+
+def _load_snapshot(poll_id: int):
+    """The poll's current state; subscribe first so no later delta is missed."""
+    db = SessionLocal()
+    try:
+        version = get_poll_version(poll_id, db)
+        details = get_poll_with_details(poll_id, None, db, version) if version is not None else None
+    finally:
+        db.close()
+    if not details or not details["is_active"]:
+        return None
+    return {"type": "snapshot", "poll": jsonable_encoder(details)}
+
+async def _until_disconnect(websocket: WebSocket):
+    """Read and ignore client messages until the client disconnects."""
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+
+@router.get("/{poll_id}/stream")
+async def stream_poll_sse(poll_id: int, request: Request):
+    """Stream live count updates for a poll as Server-Sent Events."""
+    subscriber = stream_hub.subscribe(poll_id)
+    snapshot = await run_in_threadpool(_load_snapshot, poll_id)
+    if snapshot is None:
+        stream_hub.unsubscribe(subscriber)
+        raise HTTPException(status_code=404, detail="Poll not found")
+    subscriber.snapshot_version = snapshot["poll"]["version"]
+
+    async def events():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    update = await subscriber.next_update(STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if update is None:
+                    yield "event: dropped\ndata: {}\n\n"
+                    break
+                yield f"event: delta\ndata: {json.dumps(update)}\n\n"
+        finally:
+            stream_hub.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/{poll_id}/stream")
+async def stream_poll_ws(websocket: WebSocket, poll_id: int):
+    """Stream live count updates for a poll over a WebSocket."""
+    subscriber = stream_hub.subscribe(poll_id)
+    try:
+        snapshot = await run_in_threadpool(_load_snapshot, poll_id)
+        if snapshot is None:
+            await websocket.close(code=4404)
+            return
+        subscriber.snapshot_version = snapshot["poll"]["version"]
+
+        await websocket.accept()
+        await websocket.send_json(snapshot)
+        disconnected = asyncio.ensure_future(_until_disconnect(websocket))
+        try:
+            while True:
+                # Wait for the next update or the client leaving, whichever comes first
+                next_update = asyncio.ensure_future(subscriber.next_update())
+                await asyncio.wait({next_update, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not next_update.done():
+                    next_update.cancel()
+                    return
+                update = next_update.result()
+                if update is None:
+                    # Try again later: the client was too slow to keep up
+                    await websocket.close(code=1013)
+                    return
+                await websocket.send_json(update)
+        finally:
+            disconnected.cancel()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        stream_hub.unsubscribe(subscriber)
+
@@ -1,16 +1,54 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from datetime import datetime, timezone
 
 from core.database import get_db
 from models.models import User, Poll, PollOption, Vote
-from schemas.schemas import VoteCreate, VoteResponse
+from schemas.schemas import VoteAccepted, VoteBatchCreate, VoteBatchResponse, VoteCreate, VoteResponse
 from core.dependencies import get_current_user
+from services.counter_service import count_votes, record_vote
+from services.poll_service import invalidate_poll
+from services.stream_service import stream_hub
+from services.trending_service import trending
+from services.vote_batch_service import inserted_ids_statement, ownership_statement, settle_batch, submit_buffered_batch, validate_batch
+from services.vote_ingest import VoteRejected, insert_new_votes, vote_ingester
 
 router = APIRouter(prefix="/polls", tags=["Voting"])
+batch_router = APIRouter(prefix="/votes", tags=["Voting"])
 
-@router.post("/{poll_id}/vote", response_model=VoteResponse)
+def accept_buffered_vote(poll_id: int, option_id: int, user_id: int) -> JSONResponse:
+    """Hand a vote to the write-behind ingester and answer 202 Accepted."""
+    try:
+        row = vote_ingester.submit(poll_id, option_id, user_id)
+    except VoteRejected as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail)
+    stream_hub.publish_vote(poll_id, option_id)
+    trending.record_vote(poll_id)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=jsonable_encoder(VoteAccepted(**row)))
+
+def publish_votes(rows: list):
+    """Post-commit bookkeeping for votes recorded by a batch."""
+    for row in rows:
+        invalidate_poll(row["poll_id"])
+        stream_hub.publish_vote(row["poll_id"], row["option_id"], row.get("version"))
+        trending.record_vote(row["poll_id"])
+
+def accept_buffered_batch(vote_batch: VoteBatchCreate, user_id: int) -> dict:
+    results, accepted = submit_buffered_batch(vote_batch.votes, user_id, vote_ingester)
+    for row in accepted:
+        stream_hub.publish_vote(row["poll_id"], row["option_id"])
+        trending.record_vote(row["poll_id"])
+    return {"results": results}
+
+@router.post("/{poll_id}/vote", response_model=VoteResponse, responses={202: {"model": VoteAccepted}})
 def vote_on_poll(poll_id: int, vote: VoteCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
     """Vote on a poll."""
+    if vote_ingester is not None:
+        return accept_buffered_vote(poll_id, vote.option_id, current_user.id)
+    
     # Check if poll exists and is active
     poll = db.query(Poll).filter(Poll.id == poll_id, Poll.is_active == True).first()
     if not poll:
@@ -24,22 +62,46 @@ def vote_on_poll(poll_id: int, vote: VoteCreate, current_user: User = Depends(ge
     if not option:
         raise HTTPException(status_code=400, detail="Invalid option for this poll")
     
-    # Check if user already voted
-    existing_vote = db.query(Vote).filter(
-        Vote.user_id == current_user.id, 
-        Vote.poll_id == poll_id
-    ).first()
-    if existing_vote:
-        raise HTTPException(status_code=400, detail="You have already voted on this poll")
-    
-    # Create vote
+    # Create vote; the (poll_id, user_id) unique index rejects repeat votes
     db_vote = Vote(
         user_id=current_user.id,
         poll_id=poll_id,
-        option_id=vote.option_id
+        option_id=vote.option_id,
+        # Set here rather than by the database so the rollups bucket the same timestamp
+        created_at=datetime.now(timezone.utc)
     )
     db.add(db_vote)
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="You have already voted on this poll")
+    
+    # Bump the counters in the same transaction
+    version = record_vote(poll_id, vote.option_id, db_vote.created_at, db)
     db.commit()
+    count_votes([(poll_id, vote.option_id)])
+    invalidate_poll(poll_id)
+    stream_hub.publish_vote(poll_id, vote.option_id, version)
+    trending.record_vote(poll_id)
     db.refresh(db_vote)
     
-    return db_vote
\ No newline at end of file
+    return db_vote
+
+@batch_router.post("/batch", response_model=VoteBatchResponse)
+def vote_batch(vote_batch: VoteBatchCreate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Vote on several polls in one transaction.
+
+    Each item gets its own result; invalid items do not stop the others.
+    """
+    if vote_ingester is not None:
+        return accept_buffered_batch(vote_batch, current_user.id)
+    
+    ownership = db.execute(ownership_statement(vote_batch.votes)).all()
+    results, pending = validate_batch(vote_batch.votes, current_user.id, ownership)
+    inserted = insert_new_votes(db, [row for _, row in pending])
+    vote_ids = dict(db.execute(inserted_ids_statement(current_user.id, inserted)).all()) if inserted else {}
+    count_votes([(row["poll_id"], row["option_id"]) for row in inserted])
+    publish_votes(inserted)
+    
+    return {"results": settle_batch(results, pending, inserted, vote_ids)}
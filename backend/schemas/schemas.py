@@ -144,12 +144,55 @@ class PollResponse(PollBase):
     options: List[PollOptionResponse]
     total_votes: int = 0
     like_count: int = 0
+    version: int = 0  # bumped on every change; basis of the ETag
     user_voted: Optional[int] = None  # option_id if user voted
     user_liked: bool = False
     
     class Config:
         from_attributes = True
 
+class PollBatchRequest(BaseModel):
+    ids: List[int]
+    
+    @field_validator('ids')
+    @classmethod
+    def validate_ids(cls, v):
+        if not v:
+            raise ValueError('At least one poll id is required')
+        if len(v) > 100:
+            raise ValueError('Cannot fetch more than 100 polls at once')
+        return list(dict.fromkeys(v))
+
+class PollBatchResponse(BaseModel):
+    polls: List[PollResponse]
+    missing: List[int] = []  # requested ids that are not active polls
+
+class PollImportError(BaseModel):
+    line: int
+    error: str
+
+class PollImportResponse(BaseModel):
+    imported: int
+    failed: int
+    errors: List[PollImportError] = []  # the first POLL_IMPORT_MAX_ERRORS invalid records
+
+class TrendingPollResponse(PollResponse):
+    trending_score: float  # decayed vote/like activity
+
+class TimeseriesOption(BaseModel):
+    id: int
+    text: str
+    counts: List[int]  # votes per bucket, aligned with PollTimeseriesResponse.buckets
+    total: int
+
+class PollTimeseriesResponse(BaseModel):
+    poll_id: int
+    bucket: str
+    bucket_seconds: int
+    buckets: List[datetime]  # bucket start times (UTC)
+    options: List[TimeseriesOption]
+    totals: List[int]  # votes per bucket across all options
+
 # Vote Schema
 class VoteCreate(BaseModel):
     option_id: int
@@ -164,6 +207,42 @@ class VoteResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class VoteAccepted(BaseModel):
+    """A vote acknowledged by the write-behind ingester but not yet stored."""
+    user_id: int
+    poll_id: int
+    option_id: int
+    created_at: datetime
+    status: str = "pending"
+
+class VoteBatchItem(BaseModel):
+    poll_id: int
+    option_id: int
+
+class VoteBatchCreate(BaseModel):
+    votes: List[VoteBatchItem]
+    
+    @field_validator('votes')
+    @classmethod
+    def validate_votes(cls, v):
+        if not v:
+            raise ValueError('At least one vote is required')
+        if len(v) > 50:
+            raise ValueError('Cannot submit more than 50 votes at once')
+        return v
+
+class VoteBatchResult(BaseModel):
+    """Outcome of one vote in a batch; ``status_code`` is what a single vote would return."""
+    poll_id: int
+    option_id: int
+    status_code: int
+    detail: Optional[str] = None
+    vote_id: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class VoteBatchResponse(BaseModel):
+    results: List[VoteBatchResult]
+
 # Token Schema
 class Token(BaseModel):
     access_token: str
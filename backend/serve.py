@@ -0,0 +1,82 @@
+"""Production entry point: migrate once, then serve with one uvicorn worker per core.
+
+Usage: python serve.py [--host 0.0.0.0] [--port 8000] [--workers N] [--skip-migrate]
+
+Pending schema migrations are applied here, once, before any worker starts;
+workers then start with MIGRATE_ON_STARTUP=false. Workers are processes under
+uvicorn's supervisor (one per available core unless --workers or
+WEB_CONCURRENCY is set) running on uvloop and httptools when installed.
+
+SIGHUP replaces the workers one at a time with freshly started ones, which pick
+up new code; run ``python manage.py migrate`` first if the new code needs
+schema changes. On SIGHUP, SIGTERM or SIGINT a worker stops accepting
+connections and gets GRACEFUL_SHUTDOWN_SECONDS to finish its requests.
+"""
+import argparse
+import importlib.util
+import math
+import os
+import sys
+
+def available_cpus() -> int:
+    """Cores this process may run on, capped by a cgroup v2 CPU quota (containers)."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+def prestart():
+    """Apply pending schema migrations."""
+    from core.database import engine
+    from core.migrations import run_migrations
+
+    for migration in run_migrations(engine):
+        print(f"Applied {migration.version} {migration.name}")
+    # Workers open their own connections
+    engine.dispose()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the QuickPoll API with multiple workers")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--workers", type=int, help="Worker processes (default: WEB_CONCURRENCY, else one per core)")
+    parser.add_argument("--skip-migrate", action="store_true", help="Do not apply migrations before starting")
+    args = parser.parse_args(argv)
+
+    # Set before the app's config is first imported, so a single in-process worker sees it too
+    os.environ["MIGRATE_ON_STARTUP"] = "false"
+    from core.config import GRACEFUL_SHUTDOWN_SECONDS, WEB_CONCURRENCY
+
+    workers = args.workers or WEB_CONCURRENCY or available_cpus()
+    # Each worker has its own bcrypt process pool; share the cores between them. Workers start
+    # theirs with the listening socket open, which forked pool processes would keep bound.
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, available_cpus() // workers)))
+    os.environ.setdefault("PASSWORD_HASH_START_METHOD", "forkserver")
+    if not args.skip_migrate:
+        prestart()
+
+    import uvicorn
+
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    print(f"Starting {workers} worker(s) on {args.host}:{args.port} ({loop}, {http})", flush=True)
+    uvicorn.run(
+        "main:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS,
+    )
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,131 @@
+"""Async counterparts of services/poll_service.py for DB_ASYNC mode.
+
+Statements, caching and response assembly are shared with the sync service;
+only the execution against an ``AsyncSession`` differs.
+"""
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from typing import List, Optional, Tuple
+from core.database import from_replica
+from models.models import Poll, User
+from schemas.schemas import PollCreate
+from services.counter_engine import counter_engine
+from services.counter_service import like_counter_update, vote_counter_updates
+from services.search_service import index_statements, unindex_statement
+from services.timeseries_service import rollup_rows, rollup_upsert
+from services.poll_service import (
+    assemble_shared_details,
+    assemble_user_details,
+    by_id,
+    created_poll_details,
+    creators_statement,
+    current_polls,
+    fresh_cached,
+    option_insert_rows,
+    option_insert_statement,
+    options_statement,
+    poll_details_cache,
+    poll_insert_rows,
+    poll_insert_statement,
+    poll_version_statement,
+    split_cached,
+    store_built,
+    user_likes_statement,
+    user_votes_statement,
+)
+
+async def get_poll_with_details(poll_id: int, user_id: Optional[int], db: AsyncSession, version: Optional[int] = None):
+    """Get poll with all details including votes and user interaction status."""
+    shared = fresh_cached(poll_id, version)
+    if shared is None:
+        generation = poll_details_cache.generation(poll_id)
+        poll = await db.get(Poll, poll_id)
+        if not poll:
+            return None
+        shared = (await _build_shared_details([poll], db))[0]
+        if not from_replica(db):
+            poll_details_cache.set(poll_id, shared, generation=generation)
+    
+    return (await _with_user_interactions([shared], user_id, db))[0]
+
+async def get_poll_version(poll_id: int, db: AsyncSession) -> Optional[int]:
+    """Current version of an active poll (None if missing or deleted)."""
+    return (await db.execute(poll_version_statement(poll_id))).scalar()
+
+async def get_polls_with_details(polls: List[Poll], user_id: Optional[int], db: AsyncSession):
+    """Get details for many polls using a fixed number of grouped queries."""
+    if not polls:
+        return []
+    
+    shared_by_id, missing = split_cached(polls)
+    if missing:
+        built = await _build_shared_details([poll for poll, _ in missing], db)
+        store_built(missing, built, shared_by_id, db)
+    
+    return await _with_user_interactions([shared_by_id[poll.id] for poll in polls], user_id, db)
+
+async def _build_shared_details(polls: List[Poll], db: AsyncSession) -> List[dict]:
+    options = (await db.execute(options_statement([poll.id for poll in polls]))).all()
+    creators = (await db.execute(creators_statement(polls))).scalars().all()
+    return assemble_shared_details(current_polls(polls, options), options, creators)
+
+async def _with_user_interactions(shared_details: List[dict], user_id: Optional[int], db: AsyncSession) -> List[dict]:
+    user_votes = {}
+    user_likes = set()
+    if user_id is not None and shared_details:
+        poll_ids = [details["id"] for details in shared_details]
+        user_votes = dict((await db.execute(user_votes_statement(user_id, poll_ids))).all())
+        user_likes = set((await db.execute(user_likes_statement(user_id, poll_ids))).scalars())
+    
+    return assemble_user_details(shared_details, user_id, user_votes, user_likes)
+
+async def create_poll_service(poll_data: PollCreate, creator: User, db: AsyncSession) -> dict:
+    """Create a new poll with options in one transaction and return its details."""
+    poll_rows, option_rows = await insert_polls([poll_data], creator.id, db)
+    await db.commit()
+    return created_poll_details(poll_rows, option_rows, creator)
+
+async def insert_polls(polls: List[PollCreate], creator_id: int, db: AsyncSession) -> list:
+    """Insert polls, their options and their search rows in three round trips (caller commits)."""
+    poll_rows = by_id(await db.execute(poll_insert_statement(), poll_insert_rows(polls, creator_id)))
+    option_rows = by_id(await db.execute(option_insert_statement(), option_insert_rows(polls, poll_rows)))
+    await index_polls(db, [row.id for row in poll_rows], new=True)
+    return poll_rows, option_rows
+
+async def index_polls(db: AsyncSession, poll_ids: List[int], new: bool = False):
+    """Async ``search_service.index_polls`` (caller flushes pending changes and commits)."""
+    for statement in index_statements(db.get_bind().dialect.name, poll_ids, new):
+        await db.execute(statement)
+
+async def unindex_polls(db: AsyncSession, poll_ids: List[int]):
+    """Async ``search_service.unindex_polls`` (caller commits)."""
+    statement = unindex_statement(db.get_bind().dialect.name, poll_ids)
+    if statement is not None:
+        await db.execute(statement)
+
+async def record_vote(poll_id: int, option_id: int, voted_at: datetime, db: AsyncSession) -> Optional[int]:
+    """Increment the vote counters and time rollups for a new vote (caller commits).
+
+    ``voted_at`` is the vote row's ``created_at``, as in ``counter_service.record_vote``.
+
+    Returns the poll's new version, or None with the counter engine on.
+    """
+    version = None
+    if counter_engine is None:
+        option_update, poll_update = vote_counter_updates(poll_id, option_id)
+        await db.execute(option_update)
+        version = (await db.execute(poll_update)).scalar()
+    await db.execute(rollup_upsert(db.get_bind().dialect.name), rollup_rows([(poll_id, option_id, voted_at)]))
+    return version
+
+async def count_votes(votes: List[Tuple[int, int]]):
+    """Async ``counter_service.count_votes``; polls not loaded yet are loaded in the threadpool."""
+    if counter_engine is not None:
+        missed = counter_engine.increment_resident(votes)
+        if missed:
+            await run_in_threadpool(counter_engine.increment_many, missed)
+
+async def record_like(poll_id: int, delta: int, db: AsyncSession):
+    """Adjust the like counter of a poll by ``delta`` (caller commits) and return its new version."""
+    return (await db.execute(like_counter_update(poll_id, delta))).scalar()
@@ -0,0 +1,316 @@
+"""In-memory vote counters for hot polls (COUNTER_ENGINE_ENABLED).
+
+With the engine on, a vote's transaction only inserts the vote row. The
+``poll_options.vote_count`` / ``polls.total_votes`` increments, which every vote
+on a viral poll would otherwise serialize on, are applied in memory after the
+commit and written by a background thread every COUNTER_ENGINE_FLUSH_MS, as
+one batched UPDATE per touched option and poll. Poll reads take their counts
+from the engine, so a worker always shows its own votes.
+
+Layout: each resident poll keeps ``array('q')`` rows indexed by option slot: the
+base count read from the database, and COUNTER_ENGINE_STRIPES cells of local
+increments. Each thread adds to its own stripe's cell under that stripe's lock,
+so concurrent votes, even on the same poll, do not queue on one lock; reads sum
+the cells. Polls are loaded from ``poll_options`` on their first vote and kept
+in LRU maps (one per stripe, by poll id) of COUNTER_ENGINE_MAX_POLLS in total.
+Cold polls are evicted once their increments are flushed.
+
+Every COUNTER_ENGINE_RECONCILE_SECONDS the resident polls' base counts are
+re-read from ``poll_options``, which picks up increments flushed by other
+workers. Increments not yet flushed are lost if the process dies; run
+``manage.py reconcile-counters`` to recompute the counters from ``votes``.
+"""
+import itertools
+import logging
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from contextlib import ExitStack
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from core.config import (
+    COUNTER_ENGINE_ENABLED, COUNTER_ENGINE_FLUSH_MS, COUNTER_ENGINE_MAX_POLLS, COUNTER_ENGINE_RECONCILE_SECONDS,
+    COUNTER_ENGINE_STRIPES, VOTE_INGEST_MODE,
+)
+from core.database import SessionLocal
+from models.models import PollOption
+
+logger = logging.getLogger(__name__)
+
+# Polls whose counters are re-read per reconcile query
+RECONCILE_CHUNK = 500
+
+def _zeros(size: int) -> array:
+    return array("q", bytes(8 * size))
+
+class _PollCounters:
+    __slots__ = ("slots", "width", "base", "cells", "flushed", "referenced")
+
+    def __init__(self, option_counts: List[Tuple[int, int]], stripes: int):
+        self.slots = {option_id: slot for slot, (option_id, _) in enumerate(option_counts)}
+        self.width = len(option_counts)
+        # Count = base + local; base is the database count minus what we had flushed when it was read
+        self.base = array("q", (count for _, count in option_counts))
+        # Local increments since load, one row of ``width`` per stripe
+        self.cells = _zeros(stripes * self.width)
+        # Local increments already written to the database
+        self.flushed = _zeros(self.width)
+        self.referenced = True
+
+    def local(self) -> array:
+        cells, width = self.cells, self.width
+        return array("q", [sum(cells[slot::width]) for slot in range(width)])
+
+    def dirty(self) -> bool:
+        return self.local() != self.flushed
+
+class CounterEngine:
+    """Striped, LRU-bounded per-poll vote counters with write-behind to the database."""
+
+    def __init__(self, stripes: int, max_polls: int, flush_interval: float, reconcile_interval: float):
+        self.stripes = stripes
+        self.max_polls_per_map = max(1, max_polls // stripes)
+        self.flush_interval = flush_interval
+        self.reconcile_interval = reconcile_interval
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._maps: List["OrderedDict[int, _PollCounters]"] = [OrderedDict() for _ in range(stripes)]
+        self._map_locks = [threading.Lock() for _ in range(stripes)]
+        self._thread_stripe = threading.local()
+        self._next_stripe = itertools.count()
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_reconcile = time.monotonic()
+        self.loads = 0
+        self.evictions = 0
+        self.flushes = 0
+        self.flushed_votes = 0
+        self.reconciles = 0
+
+    # Write path
+
+    def try_increment(self, poll_id: int, option_id: int, n: int = 1) -> bool:
+        """Count a committed vote if the poll is resident; False if it must be loaded first."""
+        counters_map = self._maps[poll_id % self.stripes]
+        counters = counters_map.get(poll_id)
+        if counters is None:
+            return False
+        slot = counters.slots.get(option_id)
+        if slot is None:
+            return False
+        stripe = self._stripe()
+        with self._locks[stripe]:
+            counters.cells[stripe * counters.width + slot] += n
+        counters.referenced = True
+        # Evicted between the lookup and the increment: the vote went to a dropped copy.
+        # Eviction holds every stripe lock, so a removal that missed this vote happened before this check.
+        return counters_map.get(poll_id) is counters
+
+    def increment(self, poll_id: int, option_id: int, n: int = 1):
+        """Count a committed vote, loading the poll's counters on first use."""
+        if not self.try_increment(poll_id, option_id, n):
+            self._load(poll_id)
+            if not self.try_increment(poll_id, option_id, n):
+                logger.warning("Vote on unknown option %s of poll %s not counted", option_id, poll_id)
+
+    def increment_resident(self, votes: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """Count votes on resident polls; returns the (poll_id, option_id) pairs that need ``increment``."""
+        return [(poll_id, option_id) for poll_id, option_id in votes if not self.try_increment(poll_id, option_id)]
+
+    def increment_many(self, votes: Iterable[Tuple[int, int]]):
+        for poll_id, option_id in votes:
+            self.increment(poll_id, option_id)
+
+    # Read path
+
+    def counts(self, poll_id: int) -> Optional[Dict[int, int]]:
+        """Current count per option, or None if the poll is not resident."""
+        counters = self._maps[poll_id % self.stripes].get(poll_id)
+        if counters is None:
+            return None
+        counters.referenced = True
+        base, local = counters.base, counters.local()
+        return {option_id: base[slot] + local[slot] for option_id, slot in counters.slots.items()}
+
+    def unflushed(self, poll_id: int) -> int:
+        """Votes counted here but not yet written to the poll's counters."""
+        counters = self._maps[poll_id % self.stripes].get(poll_id)
+        if counters is None:
+            return 0
+        return sum(counters.local()) - sum(counters.flushed)
+
+    def stats(self) -> dict:
+        resident = self._resident()
+        return {
+            "stripes": self.stripes,
+            "resident_polls": len(resident),
+            "max_polls": self.max_polls_per_map * self.stripes,
+            "unflushed_votes": sum(sum(counters.local()) - sum(counters.flushed) for _, counters in resident),
+            "loads": self.loads,
+            "evictions": self.evictions,
+            "flushes": self.flushes,
+            "flushed_votes": self.flushed_votes,
+            "reconciles": self.reconciles,
+        }
+
+    # Background writer
+
+    def flush(self) -> int:
+        """Write local increments to the database in one transaction. Returns votes written."""
+        from services.counter_service import add_to_vote_counters
+        from services.poll_service import invalidate_poll
+
+        with self._flush_lock:
+            work = []
+            for poll_id, counters in self._resident():
+                local = counters.local()
+                if local != counters.flushed:
+                    work.append((poll_id, counters, local))
+            if not work:
+                return 0
+
+            option_totals, poll_totals = {}, {}
+            for poll_id, counters, local in work:
+                for option_id, slot in counters.slots.items():
+                    delta = local[slot] - counters.flushed[slot]
+                    if delta:
+                        option_totals[option_id] = delta
+                poll_totals[poll_id] = sum(local) - sum(counters.flushed)
+            db = SessionLocal()
+            try:
+                add_to_vote_counters(db, option_totals, poll_totals)
+                db.commit()
+            except Exception:
+                db.rollback()
+                logger.exception("Counter flush failed; will retry")
+                return 0
+            finally:
+                db.close()
+
+            for poll_id, counters, local in work:
+                counters.flushed = local
+                invalidate_poll(poll_id)
+            written = sum(poll_totals.values())
+            self.flushes += 1
+            self.flushed_votes += written
+            return written
+
+    def reconcile(self):
+        """Re-read the base counts of resident polls from the database."""
+        with self._flush_lock:
+            resident = dict(self._resident())
+            poll_ids = list(resident)
+            db = SessionLocal()
+            try:
+                for offset in range(0, len(poll_ids), RECONCILE_CHUNK):
+                    chunk = poll_ids[offset:offset + RECONCILE_CHUNK]
+                    rows = db.execute(
+                        select(PollOption.poll_id, PollOption.id, PollOption.vote_count).where(PollOption.poll_id.in_(chunk))
+                    ).all()
+                    bases = {poll_id: array("q", resident[poll_id].base) for poll_id in chunk}
+                    for poll_id, option_id, vote_count in rows:
+                        counters = resident[poll_id]
+                        slot = counters.slots.get(option_id)
+                        if slot is not None:
+                            bases[poll_id][slot] = vote_count - counters.flushed[slot]
+                    for poll_id, base in bases.items():
+                        resident[poll_id].base = base
+            finally:
+                db.close()
+            self._last_reconcile = time.monotonic()
+            self.reconciles += 1
+
+    def start(self):
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="counter-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.monotonic() - self._last_reconcile >= self.reconcile_interval:
+                    self.reconcile()
+            except Exception:
+                logger.exception("Counter engine worker error")
+
+    # Helpers
+
+    def _stripe(self) -> int:
+        stripe = getattr(self._thread_stripe, "index", None)
+        if stripe is None:
+            stripe = self._thread_stripe.index = next(self._next_stripe) % self.stripes
+        return stripe
+
+    def _resident(self) -> List[Tuple[int, _PollCounters]]:
+        resident = []
+        for counters_map, lock in zip(self._maps, self._map_locks):
+            with lock:
+                resident.extend(counters_map.items())
+        return resident
+
+    def _evict_if_clean(self, counters_map: "OrderedDict[int, _PollCounters]", poll_id: int, counters: _PollCounters) -> bool:
+        """Drop a poll with no unflushed votes (caller holds its map lock).
+
+        Increments take only their stripe's lock, so every stripe lock is held
+        while ``dirty()`` is checked: an increment either lands first and keeps
+        the poll resident, or runs after the removal and sees it evicted.
+        """
+        with ExitStack() as stack:
+            for lock in self._locks:
+                stack.enter_context(lock)
+            if counters.dirty():
+                return False
+            del counters_map[poll_id]
+            return True
+
+    def _load(self, poll_id: int):
+        db = SessionLocal()
+        try:
+            option_counts = db.execute(
+                select(PollOption.id, PollOption.vote_count).where(PollOption.poll_id == poll_id).order_by(PollOption.id)
+            ).all()
+        finally:
+            db.close()
+        if not option_counts:
+            return
+
+        index = poll_id % self.stripes
+        counters_map = self._maps[index]
+        with self._map_locks[index]:
+            if poll_id in counters_map:
+                return
+            counters_map[poll_id] = _PollCounters([tuple(row) for row in option_counts], self.stripes)
+            self.loads += 1
+            # Second-chance LRU: recently used polls and polls with unflushed votes go round again
+            for _ in range(2 * len(counters_map)):
+                if len(counters_map) <= self.max_polls_per_map:
+                    break
+                oldest_id, oldest = next(iter(counters_map.items()))
+                if oldest_id != poll_id and not oldest.referenced and self._evict_if_clean(counters_map, oldest_id, oldest):
+                    self.evictions += 1
+                else:
+                    oldest.referenced = False
+                    counters_map.move_to_end(oldest_id)
+
+counter_engine: Optional[CounterEngine] = None
+if COUNTER_ENGINE_ENABLED:
+    if VOTE_INGEST_MODE == "buffered":
+        logger.warning("COUNTER_ENGINE_ENABLED is ignored with VOTE_INGEST_MODE=buffered, which already batches counter updates")
+    else:
+        counter_engine = CounterEngine(
+            COUNTER_ENGINE_STRIPES,
+            COUNTER_ENGINE_MAX_POLLS,
+            COUNTER_ENGINE_FLUSH_MS / 1000,
+            COUNTER_ENGINE_RECONCILE_SECONDS,
+        )
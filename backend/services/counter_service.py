@@ -0,0 +1,125 @@
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+from models.models import Poll, PollOption, Vote, poll_likes
+from services.counter_engine import counter_engine
+from services.timeseries_service import record_rollups
+
+def vote_counter_updates(poll_id: int, option_id: int) -> list:
+    """Statements that count one new vote on ``option_id``; the last returns the poll's new version."""
+    return [
+        update(PollOption)
+        .where(PollOption.id == option_id)
+        .values(vote_count=PollOption.vote_count + 1),
+        update(Poll)
+        .where(Poll.id == poll_id)
+        .values(total_votes=Poll.total_votes + 1, version=Poll.version + 1)
+        .returning(Poll.version),
+    ]
+
+def like_counter_update(poll_id: int, delta: int):
+    """Statement that adjusts the like counter of a poll by ``delta`` and returns its new version."""
+    return (
+        update(Poll)
+        .where(Poll.id == poll_id)
+        .values(like_count=Poll.like_count + delta, version=Poll.version + 1)
+        .returning(Poll.version)
+    )
+
+def poll_versions(db: Session, poll_ids: Iterable[int]) -> Dict[int, int]:
+    """Versions of the given polls, as seen by the current transaction."""
+    return dict(db.execute(select(Poll.id, Poll.version).where(Poll.id.in_(list(poll_ids)))).all())
+
+def add_to_vote_counters(db: Session, option_totals: Dict[int, int], poll_totals: Dict[int, int]):
+    """Add many votes to the counters with one batched UPDATE per table (caller commits)."""
+    options_table = PollOption.__table__
+    polls_table = Poll.__table__
+    db.execute(
+        update(options_table)
+        .where(options_table.c.id == bindparam("target_id"))
+        .values(vote_count=options_table.c.vote_count + bindparam("increment")),
+        [{"target_id": key, "increment": n} for key, n in option_totals.items()]
+    )
+    db.execute(
+        update(polls_table)
+        .where(polls_table.c.id == bindparam("target_id"))
+        .values(total_votes=polls_table.c.total_votes + bindparam("increment"), version=polls_table.c.version + 1),
+        [{"target_id": key, "increment": n} for key, n in poll_totals.items()]
+    )
+
+def record_vote(poll_id: int, option_id: int, voted_at: datetime, db: Session) -> Optional[int]:
+    """Increment the vote counters and time rollups for a new vote (caller commits).
+
+    ``voted_at`` must be the vote row's ``created_at``, so the rollups bucket it
+    exactly as ``backfill_rollups`` would.
+
+    Returns the poll's new version. With the counter engine on, the counters
+    are left to it (see ``count_votes``) and None is returned.
+    """
+    version = None
+    if counter_engine is None:
+        option_update, poll_update = vote_counter_updates(poll_id, option_id)
+        db.execute(option_update)
+        version = db.execute(poll_update).scalar()
+    record_rollups(db, [(poll_id, option_id, voted_at)])
+    return version
+
+def count_votes(votes: Iterable[Tuple[int, int]]):
+    """Hand committed (poll_id, option_id) votes to the counter engine, if it is on."""
+    if counter_engine is not None:
+        counter_engine.increment_many(votes)
+
+def record_like(poll_id: int, delta: int, db: Session):
+    """Adjust the like counter of a poll by ``delta`` (caller commits) and return its new version."""
+    return db.execute(like_counter_update(poll_id, delta)).scalar()
+
+def reconcile_counters(db: Session, dry_run: bool = False) -> dict:
+    """Recompute all denormalized counters and repair any drift in bulk.
+
+    Returns the number of rows whose stored counter disagreed with the
+    source tables, per counter.
+    """
+    actual_option_votes = (
+        select(func.count(Vote.id))
+        .where(Vote.option_id == PollOption.id)
+        .scalar_subquery()
+    )
+    actual_poll_votes = (
+        select(func.count(Vote.id))
+        .where(Vote.poll_id == Poll.id)
+        .scalar_subquery()
+    )
+    actual_poll_likes = (
+        select(func.count())
+        .select_from(poll_likes)
+        .where(poll_likes.c.poll_id == Poll.id)
+        .scalar_subquery()
+    )
+
+    checks = {
+        "option_vote_count": (PollOption, PollOption.vote_count, actual_option_votes),
+        "poll_total_votes": (Poll, Poll.total_votes, actual_poll_votes),
+        "poll_like_count": (Poll, Poll.like_count, actual_poll_likes),
+    }
+
+    drift = {}
+    for name, (model, column, actual) in checks.items():
+        drift[name] = db.query(func.count()).select_from(model).filter(column != actual).scalar()
+        if drift[name] and not dry_run:
+            # Repaired polls get a new version so cached HTTP responses are revalidated
+            drifted_polls = Poll.id.in_(select(PollOption.poll_id).where(column != actual)) if model is PollOption else column != actual
+            db.execute(
+                update(Poll).where(drifted_polls).values(version=Poll.version + 1),
+                execution_options={"synchronize_session": False}
+            )
+            db.execute(
+                update(model)
+                .where(column != actual)
+                .values({column.key: actual}),
+                execution_options={"synchronize_session": False}
+            )
+
+    if not dry_run:
+        db.commit()
+    return drift
@@ -0,0 +1,154 @@
+"""Streaming CSV/NDJSON export of raw votes, optionally gzipped.
+
+Votes are read in keyset batches of EXPORT_BATCH_ROWS ordered by
+(poll_id, user_id), which the unique vote index already provides. Each batch
+checks out a connection, streams its rows through a server-side cursor
+(``yield_per``) into the encoder, and returns the connection before the
+encoded bytes are sent. Memory stays at one batch whatever the export size,
+and a slow download never pins a pooled connection.
+"""
+import csv
+import io
+import zlib
+from typing import AsyncIterator, Iterable, Iterator, List
+
+import orjson
+from sqlalchemy import select
+
+from core.config import EXPORT_BATCH_ROWS
+from models.models import Poll, PollOption, Vote
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+EXPORT_FORMAT_PATTERN = "^(" + "|".join(EXPORT_FORMATS) + ")$"
+COLUMNS = ("vote_id", "poll_id", "option_id", "option_text", "user_id", "voted_at")
+# Rows per fetch from the server-side cursor
+FETCH_ROWS = 1000
+
+def export_headers(filename: str, format: str, gzip: bool) -> dict:
+    """Response media type and download headers for an export."""
+    extension = f"{format}.gz" if gzip else format
+    return {
+        "media_type": "application/gzip" if gzip else EXPORT_FORMATS[format],
+        "headers": {"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+    }
+
+def votes_statement(poll_id: int, after_user_id: int, limit: int):
+    """One batch of a poll's votes, after ``after_user_id`` in the vote index order."""
+    return (
+        select(Vote.id, Vote.poll_id, Vote.option_id, PollOption.text, Vote.user_id, Vote.created_at)
+        .join(PollOption, PollOption.id == Vote.option_id)
+        .where(Vote.poll_id == poll_id, Vote.user_id > after_user_id)
+        .order_by(Vote.user_id)
+        .limit(limit)
+        .execution_options(yield_per=FETCH_ROWS)
+    )
+
+def owned_polls_statement(creator_id: int, after_poll_id: int, limit: int):
+    return (
+        select(Poll.id)
+        .where(Poll.creator_id == creator_id, Poll.is_active == True, Poll.id > after_poll_id)
+        .order_by(Poll.id)
+        .limit(limit)
+    )
+
+class ExportEncoder:
+    """Encodes vote rows as CSV or NDJSON bytes, gzipped as one stream if asked."""
+
+    def __init__(self, format: str, gzip: bool):
+        self.format = format
+        self._compressor = zlib.compressobj(wbits=31) if gzip else None
+
+    def header(self) -> bytes:
+        if self.format != "csv":
+            return b""
+        return self._output(",".join(COLUMNS).encode() + b"\r\n")
+
+    def rows(self, rows: Iterable) -> bytes:
+        if self.format == "csv":
+            buffer = io.StringIO()
+            csv.writer(buffer).writerows(
+                (vote_id, poll_id, option_id, text, user_id, voted_at.isoformat() if voted_at else "")
+                for vote_id, poll_id, option_id, text, user_id, voted_at in rows
+            )
+            data = buffer.getvalue().encode()
+        else:
+            data = b"".join(orjson.dumps(dict(zip(COLUMNS, row)), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+        return self._output(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush() if self._compressor is not None else b""
+
+    def _output(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) if self._compressor is not None else data
+
+def export_votes(engine, poll_ids: Iterable[int], format: str, gzip: bool) -> Iterator[bytes]:
+    """Export body for the votes of ``poll_ids``, read in batches."""
+    encoder = ExportEncoder(format, gzip)
+    header = encoder.header()
+    if header:
+        yield header
+    for poll_id in poll_ids:
+        after_user_id = 0
+        while True:
+            chunks: List[bytes] = []
+            count = 0
+            with engine.connect() as connection:
+                result = connection.execute(votes_statement(poll_id, after_user_id, EXPORT_BATCH_ROWS))
+                for partition in result.partitions():
+                    chunks.append(encoder.rows(partition))
+                    count += len(partition)
+                    after_user_id = partition[-1].user_id
+            if chunks:
+                yield b"".join(chunks)
+            if count < EXPORT_BATCH_ROWS:
+                break
+    yield encoder.finish()
+
+def owned_poll_ids(engine, creator_id: int) -> Iterator[int]:
+    """Ids of a user's active polls, read in batches like the votes."""
+    after_poll_id = 0
+    while True:
+        with engine.connect() as connection:
+            poll_ids = connection.execute(owned_polls_statement(creator_id, after_poll_id, EXPORT_BATCH_ROWS)).scalars().all()
+        yield from poll_ids
+        if len(poll_ids) < EXPORT_BATCH_ROWS:
+            return
+        after_poll_id = poll_ids[-1]
+
+# Async counterparts, for DB_ASYNC mode
+
+async def export_votes_async(engine, poll_ids: AsyncIterator[int], format: str, gzip: bool) -> AsyncIterator[bytes]:
+    encoder = ExportEncoder(format, gzip)
+    header = encoder.header()
+    if header:
+        yield header
+    async for poll_id in poll_ids:
+        after_user_id = 0
+        while True:
+            chunks: List[bytes] = []
+            count = 0
+            async with engine.connect() as connection:
+                result = await connection.stream(votes_statement(poll_id, after_user_id, EXPORT_BATCH_ROWS))
+                async for partition in result.partitions():
+                    chunks.append(encoder.rows(partition))
+                    count += len(partition)
+                    after_user_id = partition[-1].user_id
+            if chunks:
+                yield b"".join(chunks)
+            if count < EXPORT_BATCH_ROWS:
+                break
+    yield encoder.finish()
+
+async def owned_poll_ids_async(engine, creator_id: int) -> AsyncIterator[int]:
+    after_poll_id = 0
+    while True:
+        async with engine.connect() as connection:
+            poll_ids = (await connection.execute(owned_polls_statement(creator_id, after_poll_id, EXPORT_BATCH_ROWS))).scalars().all()
+        for poll_id in poll_ids:
+            yield poll_id
+        if len(poll_ids) < EXPORT_BATCH_ROWS:
+            return
+        after_poll_id = poll_ids[-1]
+
+async def single_poll(poll_id: int) -> AsyncIterator[int]:
+    yield poll_id
@@ -0,0 +1,68 @@
+"""Keyset (cursor) pagination for the poll feeds.
+
+Each feed is ordered by a sort key plus ``id`` as a tie-breaker, both
+descending, and backed by an ``(is_active, key, id)`` index. A page is fetched
+with ``WHERE (key, id) < (:last_key, :last_id)`` instead of ``OFFSET``, so deep
+pages cost the same as the first one. Cursors are opaque URL-safe tokens
+encoding the sort and the last row's key.
+"""
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import String, select, tuple_, type_coerce
+
+from core.config import DATABASE_URL
+from models.models import Poll
+
+# SQLite stores timestamps as text in more than one format (server default vs
+# Python-bound values), so compare created_at as its raw stored string there.
+_created_at_key = type_coerce(Poll.created_at, String) if "sqlite" in DATABASE_URL else Poll.created_at
+
+FEED_SORTS = {
+    "newest": _created_at_key,
+    "most_voted": Poll.total_votes,
+    "most_liked": Poll.like_count,
+}
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(sort: str, value, poll_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([sort, value, poll_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[object, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, poll_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+    if cursor_sort != sort or not isinstance(poll_id, int):
+        raise InvalidCursor("Cursor does not match the requested sort")
+    if sort == "newest" and _created_at_key is Poll.created_at:
+        value = datetime.fromisoformat(value)
+    return value, poll_id
+
+def feed_statement(sort: str, limit: int, cursor: Optional[str] = None, skip: int = 0):
+    """Select one page of active polls (plus one extra row to detect a next page)."""
+    key = FEED_SORTS[sort]
+    statement = select(Poll, key.label("sort_key")).where(Poll.is_active == True)
+    if cursor:
+        value, poll_id = decode_cursor(cursor, sort)
+        statement = statement.where(tuple_(key, Poll.id) < tuple_(value, poll_id))
+    elif skip:
+        statement = statement.offset(skip)
+    return statement.order_by(key.desc(), Poll.id.desc()).limit(limit + 1)
+
+def paginate(rows, sort: str, limit: int) -> Tuple[List[Poll], Optional[str]]:
+    """Split fetched rows into the page and the cursor for the next one."""
+    polls = [row.Poll for row in rows[:limit]]
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(sort, last.sort_key, last.Poll.id)
+    return polls, next_cursor
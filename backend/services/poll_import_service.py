@@ -0,0 +1,167 @@
+"""Streaming bulk import of polls from NDJSON or CSV.
+
+The request body is parsed as it arrives, one record at a time. Valid polls
+are inserted POLL_IMPORT_BATCH_SIZE at a time (two multi-row INSERTs per batch,
+see ``insert_polls``) and committed per batch, so memory is bounded by the
+batch size however large the upload is. Invalid records are skipped and
+reported by line number; the rest of the file is still imported.
+
+NDJSON: one ``{"title": ..., "description": ..., "options": [...]}`` object per line.
+CSV: a header row with ``title``, optionally ``description``, and one column per
+option whose name starts with ``option`` (``option_1``, ``option_2``, ...).
+Empty option cells are ignored, so polls may have different option counts.
+"""
+import csv
+from typing import AsyncIterator, Awaitable, Callable, Iterator, List, Optional, Tuple
+
+import orjson
+from pydantic import ValidationError
+
+from core.config import POLL_IMPORT_BATCH_SIZE, POLL_IMPORT_MAX_ERRORS
+from schemas.schemas import PollCreate
+
+IMPORT_CONTENT_TYPES = {
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/json-lines": "ndjson",
+    "text/csv": "csv",
+}
+# A record longer than this cannot be valid (10 options of 500 characters) and is not buffered
+MAX_RECORD_BYTES = 64 * 1024
+
+class InvalidImport(ValueError):
+    """The upload cannot be parsed any further."""
+
+def import_format(content_type: Optional[str]) -> Optional[str]:
+    """"ndjson" or "csv" for a request Content-Type, None if unsupported."""
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    return IMPORT_CONTENT_TYPES.get(media_type)
+
+def validation_message(exc: ValidationError) -> str:
+    return "; ".join(error["msg"].removeprefix("Value error, ") for error in exc.errors())
+
+class PollRecordParser:
+    """Turns body chunks into ``(line, PollCreate or None, error or None)`` records."""
+
+    def __init__(self, format: str):
+        self.format = format
+        self._buffer = b""
+        self._line = 0
+        self._columns: Optional[List[str]] = None
+        # CSV record spanning several lines (a quoted field with newlines)
+        self._pending: List[str] = []
+        self._pending_line = 0
+
+    def feed(self, chunk: bytes) -> Iterator[Tuple[int, Optional[PollCreate], Optional[str]]]:
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split(b"\n")
+        if len(self._buffer) > MAX_RECORD_BYTES:
+            raise InvalidImport(f"Line {self._line + len(lines) + 1} is longer than {MAX_RECORD_BYTES} bytes")
+        for raw in lines:
+            yield from self._parse_line(raw)
+
+    def close(self) -> Iterator[Tuple[int, Optional[PollCreate], Optional[str]]]:
+        if self._buffer:
+            yield from self._parse_line(self._buffer)
+            self._buffer = b""
+        if self._pending:
+            raise InvalidImport(f"Unterminated quoted field in the record starting on line {self._pending_line}")
+
+    def _parse_line(self, raw: bytes):
+        self._line += 1
+        try:
+            text = raw.decode("utf-8-sig" if self._line == 1 else "utf-8").rstrip("\r")
+        except UnicodeDecodeError:
+            yield self._line, None, "Not valid UTF-8"
+            return
+        if self.format == "ndjson":
+            if text.strip():
+                yield self._record(self._line, self._ndjson_fields, text)
+            return
+
+        if not self._pending:
+            self._pending_line = self._line
+        self._pending.append(text)
+        record = "\n".join(self._pending)
+        if record.count('"') % 2:
+            if len(record) > MAX_RECORD_BYTES:
+                raise InvalidImport(f"Record starting on line {self._pending_line} is longer than {MAX_RECORD_BYTES} bytes")
+            return
+        self._pending = []
+        if not record.strip():
+            return
+        row = next(csv.reader([record]))
+        if self._columns is None:
+            self._columns = [column.strip().lower() for column in row]
+            if "title" not in self._columns:
+                raise InvalidImport("The CSV header must have a title column")
+            return
+        yield self._record(self._pending_line, self._csv_fields, row)
+
+    @staticmethod
+    def _record(line: int, to_fields: Callable, value):
+        try:
+            return line, PollCreate(**to_fields(value)), None
+        except ValidationError as exc:
+            return line, None, validation_message(exc)
+        except ValueError as exc:
+            return line, None, str(exc)
+
+    @staticmethod
+    def _ndjson_fields(text: str) -> dict:
+        try:
+            fields = orjson.loads(text)
+        except orjson.JSONDecodeError:
+            raise ValueError("Not valid JSON")
+        if not isinstance(fields, dict):
+            raise ValueError("Each line must be a JSON object")
+        return {name: fields.get(name) for name in ("title", "description", "options") if name in fields}
+
+    def _csv_fields(self, row: List[str]) -> dict:
+        if len(row) > len(self._columns):
+            raise ValueError(f"Expected at most {len(self._columns)} fields, got {len(row)}")
+        values = dict(zip(self._columns, row))
+        return {
+            "title": values.get("title", ""),
+            "description": values.get("description") or None,
+            "options": [
+                value for column, value in zip(self._columns, row)
+                if column.startswith("option") and value.strip()
+            ],
+        }
+
+async def import_polls(chunks: AsyncIterator[bytes], format: str, insert_batch: Callable[[List[PollCreate]], Awaitable[None]]) -> dict:
+    """Parse an upload and hand valid polls to ``insert_batch`` in batches.
+
+    ``insert_batch`` inserts and commits one batch. Raises InvalidImport when
+    the upload cannot be parsed further; batches before that stay imported.
+    """
+    parser = PollRecordParser(format)
+    result = {"imported": 0, "failed": 0, "errors": []}
+    batch: List[PollCreate] = []
+
+    async def flush(minimum: int):
+        while len(batch) >= minimum and batch:
+            polls = batch[:POLL_IMPORT_BATCH_SIZE]
+            await insert_batch(polls)
+            result["imported"] += len(polls)
+            del batch[:POLL_IMPORT_BATCH_SIZE]
+
+    def collect(records):
+        for line, poll, error in records:
+            if poll is not None:
+                batch.append(poll)
+            else:
+                result["failed"] += 1
+                if len(result["errors"]) < POLL_IMPORT_MAX_ERRORS:
+                    result["errors"].append({"line": line, "error": error})
+
+    try:
+        async for chunk in chunks:
+            collect(parser.feed(chunk))
+            await flush(POLL_IMPORT_BATCH_SIZE)
+        collect(parser.close())
+        await flush(1)
+    except InvalidImport as exc:
+        raise InvalidImport(f"{exc}; {result['imported']} polls were imported before it") from exc
+    return result
@@ -1,71 +1,304 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from models.models import Poll, PollOption, Vote, User
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional, Set
+from core.cache import TTLCache
+from core.config import POLL_CACHE_MAX_SIZE, POLL_CACHE_TTL_SECONDS
+from core.database import from_replica
+from models.models import Poll, PollOption, Vote, User, poll_likes
 from schemas.schemas import PollCreate
+from services.counter_engine import counter_engine
+from services.search_service import index_polls
+from services.vote_ingest import vote_ingester
 
-def get_poll_with_details(poll_id: int, user_id: int, db: Session):
-    """Get poll with all details including votes and user interaction status."""
-    poll = db.query(Poll).filter(Poll.id == poll_id).first()
-    if not poll:
-        return None
-    
-    # Get vote counts for each option
-    options_with_counts = []
-    for option in poll.options:
-        vote_count = db.query(Vote).filter(Vote.option_id == option.id).count()
-        option_data = {
-            "id": option.id,
-            "text": option.text,
-            "vote_count": vote_count
-        }
-        options_with_counts.append(option_data)
+# Shared (user-independent) part of poll details, keyed by poll id
+poll_details_cache = TTLCache("poll_details", POLL_CACHE_MAX_SIZE, POLL_CACHE_TTL_SECONDS)
+
+def invalidate_poll(poll_id: int):
+    """Drop cached details for a poll after it changes."""
+    poll_details_cache.invalidate(poll_id)
+
+def get_poll_with_details(poll_id: int, user_id: int, db: Session, version: Optional[int] = None):
+    """Get poll with all details including votes and user interaction status.
+
+    ``version``, read from the database, rejects cached details that are older.
+    """
+    shared = fresh_cached(poll_id, version)
+    if shared is None:
+        generation = poll_details_cache.generation(poll_id)
+        poll = db.query(Poll).filter(Poll.id == poll_id).first()
+        if not poll:
+            return None
+        shared = _build_shared_details([poll], db)[0]
+        if not from_replica(db):
+            poll_details_cache.set(poll_id, shared, generation=generation)
     
-    # Check if current user voted
-    user_vote = db.query(Vote).filter(
-        Vote.user_id == user_id, 
-        Vote.poll_id == poll_id
-    ).first()
+    return _with_user_interactions([shared], user_id, db)[0]
+
+def get_poll_version(poll_id: int, db: Session) -> Optional[int]:
+    """Current version of an active poll (None if missing or deleted).
+
+    Always a primary-key lookup of one column, never the details cache: the
+    cache is per worker and misses writes made by the others.
+    """
+    return db.execute(poll_version_statement(poll_id)).scalar()
+
+def get_polls_with_details(polls: List[Poll], user_id: Optional[int], db: Session):
+    """Get details for many polls using a fixed number of grouped queries.
+
+    The query count does not grow with the number of polls on the page.
+    """
+    if not polls:
+        return []
     
-    # Check if current user liked
-    user_liked = db.query(User).filter(
-        User.id == user_id,
-        User.liked_polls.any(Poll.id == poll_id)
-    ).first() is not None
+    # Serve what we can from the cache and build the rest in one batch
+    shared_by_id, missing = split_cached(polls)
+    if missing:
+        built = _build_shared_details([poll for poll, _ in missing], db)
+        store_built(missing, built, shared_by_id, db)
     
-    # Calculate totals
-    total_votes = sum(option["vote_count"] for option in options_with_counts)
-    like_count = len(poll.liked_by)
+    return _with_user_interactions([shared_by_id[poll.id] for poll in polls], user_id, db)
+
+def _build_shared_details(polls: List[Poll], db: Session) -> List[dict]:
+    """Build the user-independent details (options, counts, creator) for polls."""
+    options = db.execute(options_statement([poll.id for poll in polls])).all()
+    creators = db.execute(creators_statement(polls)).scalars().all()
+    return assemble_shared_details(current_polls(polls, options), options, creators)
+
+def _with_user_interactions(shared_details: List[dict], user_id: Optional[int], db: Session) -> List[dict]:
+    """Add the caller's ``user_voted``/``user_liked`` on top of shared details."""
+    user_votes = {}
+    user_likes = set()
+    if user_id is not None and shared_details:
+        poll_ids = [details["id"] for details in shared_details]
+        user_votes = dict(db.execute(user_votes_statement(user_id, poll_ids)).all())
+        user_likes = set(db.execute(user_likes_statement(user_id, poll_ids)).scalars())
     
+    return assemble_user_details(shared_details, user_id, user_votes, user_likes)
+
+# Statements and assembly shared by the sync and async (services/async_poll_service.py) paths
+
+def poll_version_statement(poll_id: int):
+    return select(Poll.version).where(Poll.id == poll_id, Poll.is_active == True)
+
+def version_token(poll_id: int, version: int) -> str:
+    """ETag input for a poll: its version plus any votes still buffered for it."""
+    pending = 0
+    if vote_ingester is not None:
+        pending = sum(vote_ingester.pending_counts(poll_id).values())
+    elif counter_engine is not None:
+        pending = counter_engine.unflushed(poll_id)
+    if pending:
+        return f"{version}+{pending}"
+    return str(version)
+
+# Poll columns that can change after creation, re-read with the options
+CURRENT_POLL_COLUMNS = ("title", "description", "is_active", "total_votes", "like_count", "version")
+
+def options_statement(poll_ids: Iterable[int]):
+    """Options for the given polls, with their stored vote counters and the polls' current columns."""
+    return select(
+        PollOption.id, PollOption.text, PollOption.poll_id, PollOption.vote_count,
+        *(getattr(Poll, column) for column in CURRENT_POLL_COLUMNS),
+    ).join(Poll, Poll.id == PollOption.poll_id).where(
+        PollOption.poll_id.in_(list(poll_ids))
+    ).order_by(PollOption.id)
+
+def current_polls(polls: List[Poll], options) -> list:
+    """The polls with their mutable columns taken from ``options_statement`` rows.
+
+    SQLite runs each SELECT on its own snapshot, so poll rows loaded earlier in
+    the request may predate a vote or edit that the option counts include.
+    Reading the counters, version and text in the options' statement keeps the
+    details, their ETag and the buffered-vote overlay in agreement.
+    """
+    latest = {option.poll_id: option for option in options}
+    return [
+        poll if poll.id not in latest else SimpleNamespace(
+            id=poll.id, creator_id=poll.creator_id, created_at=poll.created_at,
+            **{column: getattr(latest[poll.id], column) for column in CURRENT_POLL_COLUMNS},
+        )
+        for poll in polls
+    ]
+
+def creators_statement(polls: Iterable[Poll]):
+    """Creators of the given polls, loaded once per distinct user."""
+    return select(User).where(User.id.in_({poll.creator_id for poll in polls}))
+
+def user_votes_statement(user_id: int, poll_ids: Iterable[int]):
+    return select(Vote.poll_id, Vote.option_id).where(
+        Vote.user_id == user_id, Vote.poll_id.in_(list(poll_ids))
+    )
+
+def user_likes_statement(user_id: int, poll_ids: Iterable[int]):
+    return select(poll_likes.c.poll_id).where(
+        poll_likes.c.user_id == user_id, poll_likes.c.poll_id.in_(list(poll_ids))
+    )
+
+def fresh_cached(poll_id: int, version: Optional[int]) -> Optional[dict]:
+    """Cached shared details of a poll, unless older than ``version``.
+
+    Another worker's write bumps the version without invalidating this
+    worker's cache, so the caller's freshly read version decides.
+    """
+    shared = poll_details_cache.get(poll_id)
+    if shared is not None and version is not None and shared["version"] < version:
+        return None
+    return shared
+
+def split_cached(polls: List[Poll]):
+    """Split polls into cached shared details and (poll, generation) pairs to build."""
+    shared_by_id = {}
+    missing = []
+    for poll in polls:
+        shared = fresh_cached(poll.id, poll.version)
+        if shared is None:
+            missing.append((poll, poll_details_cache.generation(poll.id)))
+        else:
+            shared_by_id[poll.id] = shared
+    return shared_by_id, missing
+
+def store_built(missing: list, built: List[dict], shared_by_id: Dict[int, dict], db):
+    """Add freshly built shared details to ``shared_by_id``, caching them if read from the primary.
+
+    Details built on a lagging replica are never cached: the cache is shared by
+    every request, including read-your-writes reads routed to the primary.
+    """
+    cache = not from_replica(db)
+    for (poll, generation), shared in zip(missing, built):
+        if cache:
+            poll_details_cache.set(poll.id, shared, generation=generation)
+        shared_by_id[poll.id] = shared
+
+def user_summary(user: User) -> dict:
     return {
-        "id": poll.id,
-        "title": poll.title,
-        "description": poll.description,
-        "creator_id": poll.creator_id,
-        "creator": poll.creator,
-        "is_active": poll.is_active,
-        "created_at": poll.created_at,
-        "options": options_with_counts,
-        "total_votes": total_votes,
-        "like_count": like_count,
-        "user_voted": user_vote.option_id if user_vote else None,
-        "user_liked": user_liked
+        "id": user.id,
+        "username": user.username,
+        "email": user.email,
+        "is_active": user.is_active,
+        "created_at": user.created_at
     }
 
-def create_poll_service(poll_data: PollCreate, creator_id: int, db: Session):
-    """Create a new poll with options."""
-    # Create poll
-    db_poll = Poll(
-        title=poll_data.title,
-        description=poll_data.description,
-        creator_id=creator_id
-    )
-    db.add(db_poll)
-    db.commit()
-    db.refresh(db_poll)
-    
-    # Create poll options
-    for option_text in poll_data.options:
-        db_option = PollOption(text=option_text, poll_id=db_poll.id)
-        db.add(db_option)
+def assemble_shared_details(polls: List[Poll], options, creators: Iterable[User]) -> List[dict]:
+    options_by_poll = {poll.id: [] for poll in polls}
+    for option in options:
+        options_by_poll[option.poll_id].append(option)
+    creators_by_id = {user.id: user_summary(user) for user in creators}
     
+    return [
+        {
+            "id": poll.id,
+            "title": poll.title,
+            "description": poll.description,
+            "creator_id": poll.creator_id,
+            "creator": creators_by_id.get(poll.creator_id),
+            "is_active": poll.is_active,
+            "created_at": poll.created_at,
+            "options": [
+                {
+                    "id": option.id,
+                    "text": option.text,
+                    "vote_count": option.vote_count
+                }
+                for option in options_by_poll[poll.id]
+            ],
+            "total_votes": poll.total_votes,
+            "like_count": poll.like_count,
+            "version": poll.version
+        }
+        for poll in polls
+    ]
+
+def assemble_user_details(shared_details: List[dict], user_id: Optional[int], user_votes: Dict[int, int], user_likes: Set[int]) -> List[dict]:
+    results = [
+        {
+            **details,
+            "user_voted": user_votes.get(details["id"]),
+            "user_liked": details["id"] in user_likes
+        }
+        for details in shared_details
+    ]
+    if vote_ingester is not None and vote_ingester.has_pending():
+        results = [_with_pending_votes(details, user_id) for details in results]
+    if counter_engine is not None:
+        results = [_with_engine_counts(details) for details in results]
+    return results
+
+def _with_engine_counts(details: dict) -> dict:
+    """Take vote counts from the counter engine for polls it holds."""
+    counts = counter_engine.counts(details["id"])
+    if counts is not None:
+        details["options"] = [
+            {**option, "vote_count": counts.get(option["id"], option["vote_count"])}
+            for option in details["options"]
+        ]
+        details["total_votes"] = sum(option["vote_count"] for option in details["options"])
+    return details
+
+def _with_pending_votes(details: dict, user_id: Optional[int]) -> dict:
+    """Add votes accepted by the write-behind ingester but not yet flushed."""
+    pending = vote_ingester.pending_counts(details["id"], details["version"])
+    if pending:
+        details["options"] = [
+            {**option, "vote_count": option["vote_count"] + pending.get(option["id"], 0)}
+            for option in details["options"]
+        ]
+        details["total_votes"] += sum(pending.values())
+    if user_id is not None and details["user_voted"] is None:
+        details["user_voted"] = vote_ingester.pending_user_vote(user_id, details["id"])
+    return details
+
+# Creation
+
+# Core inserts, so rows with and without a description share one statement.
+# Both run as multi-row INSERT ... RETURNING (insertmanyvalues). RETURNING order is
+# not guaranteed, but ids are assigned in VALUES order, so callers sort by id to
+# line rows up with their parameters. Asking SQLAlchemy to sort instead would
+# make it fall back to one INSERT per row on SQLite.
+
+def poll_insert_statement():
+    """INSERT of polls returning what ``assemble_shared_details`` reads."""
+    polls = Poll.__table__
+    return polls.insert().returning(
+        polls.c.id, polls.c.title, polls.c.description, polls.c.creator_id, polls.c.is_active, polls.c.created_at,
+        polls.c.total_votes, polls.c.like_count, polls.c.version,
+    )
+
+def option_insert_statement():
+    options = PollOption.__table__
+    return options.insert().returning(options.c.id, options.c.text, options.c.poll_id, options.c.vote_count)
+
+def by_id(rows) -> list:
+    return sorted(rows, key=lambda row: row.id)
+
+def poll_insert_rows(polls: List[PollCreate], creator_id: int) -> List[dict]:
+    return [{"title": poll.title, "description": poll.description, "creator_id": creator_id} for poll in polls]
+
+def option_insert_rows(polls: List[PollCreate], poll_rows) -> List[dict]:
+    return [
+        {"text": option_text, "poll_id": row.id}
+        for poll, row in zip(polls, poll_rows)
+        for option_text in poll.options
+    ]
+
+def insert_polls(polls: List[PollCreate], creator_id: int, db: Session) -> list:
+    """Insert polls, their options and their search rows in three round trips, whatever their number.
+
+    Returns the inserted poll and option rows (caller commits).
+    """
+    poll_rows = by_id(db.execute(poll_insert_statement(), poll_insert_rows(polls, creator_id)))
+    option_rows = by_id(db.execute(option_insert_statement(), option_insert_rows(polls, poll_rows)))
+    index_polls(db, [row.id for row in poll_rows], new=True)
+    return poll_rows, option_rows
+
+def created_poll_details(poll_rows, option_rows, creator: User) -> dict:
+    """Details of a just-created poll, built from the inserted rows without reading back."""
+    shared = assemble_shared_details(poll_rows, option_rows, [creator])[0]
+    poll_details_cache.set(shared["id"], shared)
+    return assemble_user_details([shared], creator.id, {}, set())[0]
+
+def create_poll_service(poll_data: PollCreate, creator: User, db: Session) -> dict:
+    """Create a new poll with options in one transaction and return its details."""
+    poll_rows, option_rows = insert_polls([poll_data], creator.id, db)
     db.commit()
-    return db_poll
\ No newline at end of file
+    return created_poll_details(poll_rows, option_rows, creator)
@@ -0,0 +1,173 @@
+"""Full-text poll search over titles, descriptions and option text.
+
+Each active poll has one row in ``poll_search`` (created by migration 0008):
+an FTS5 table on SQLite, or a ``tsvector`` column with a GIN index on
+PostgreSQL. Rows are written in the same transaction as the poll change:
+``insert_polls`` indexes new polls, ``update_poll`` re-indexes and the soft
+delete in ``delete_poll`` removes the row. ``rebuild_search_index`` (``manage.py
+rebuild-search-index``) re-creates every row online.
+
+Queries match polls containing every term of ``q`` other than stop words
+(stemmed, case-insensitive) and rank them by relevance, title matches weighing
+most: bm25 on SQLite, ``ts_rank_cd`` on PostgreSQL. Every match is scored
+before the page is cut, so the best matches come first however old they are.
+Pages are fetched by keyset on (score, poll id) with the feed's cursor
+encoding. bm25 weighs terms by corpus statistics, so on SQLite heavy indexing
+between two page requests can still shift scores. Stop words are dropped
+because scoring costs time per match.
+"""
+import re
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from services.feed_service import InvalidCursor, decode_cursor, encode_cursor
+
+SEARCH_SORT = "relevance"
+# Terms of ``q`` beyond this are ignored
+MAX_TERMS = 16
+# PostgreSQL's English stop words, dropped from queries on both backends. They
+# match most polls, and bm25 reads a term's whole posting list to weigh it.
+STOP_WORDS = frozenset("""
+    a about above after again against all am an and any are as at be because been before being below between
+    both but by can did do does doing don down during each few for from further had has have having he her
+    here hers herself him himself his how i if in into is it its itself just me more most my myself no nor
+    not now of off on once only or other our ours ourselves out over own s same she should so some such t
+    than that the their theirs them themselves then there these they this those through to too under until
+    up very was we were what when where which while who whom why will with you your yours yourself yourselves
+""".split())
+
+SQLITE_DOCUMENT = (
+    "SELECT polls.id, polls.title, COALESCE(polls.description, ''), "
+    "COALESCE((SELECT group_concat(text, ' ') FROM poll_options WHERE poll_options.poll_id = polls.id), '') "
+    "FROM polls WHERE polls.id IN :poll_ids AND polls.is_active"
+)
+POSTGRES_DOCUMENT = (
+    "SELECT polls.id, "
+    "setweight(to_tsvector('english', polls.title), 'A') || "
+    "setweight(to_tsvector('english', COALESCE(polls.description, '')), 'B') || "
+    "setweight(to_tsvector('english', COALESCE((SELECT string_agg(text, ' ') FROM poll_options "
+    "WHERE poll_options.poll_id = polls.id), '')), 'C') "
+    "FROM polls WHERE polls.id IN :poll_ids AND polls.is_active"
+)
+
+SEARCH_SQL = {
+    "sqlite": {
+        "insert": f"INSERT INTO poll_search (rowid, title, description, options) {SQLITE_DOCUMENT}",
+        "delete": "DELETE FROM poll_search WHERE rowid IN :poll_ids",
+        "prune": "DELETE FROM poll_search WHERE rowid NOT IN (SELECT id FROM polls WHERE is_active)",
+        "optimize": "INSERT INTO poll_search (poll_search) VALUES ('optimize')",
+        # Weights per column: title, description, options
+        "matches": (
+            "SELECT rowid AS poll_id, -bm25(poll_search, 10.0, 4.0, 2.0) AS score "
+            "FROM poll_search WHERE poll_search MATCH :query"
+        ),
+    },
+    "postgresql": {
+        "insert": (
+            f"INSERT INTO poll_search (poll_id, document) {POSTGRES_DOCUMENT} "
+            "ON CONFLICT (poll_id) DO UPDATE SET document = excluded.document"
+        ),
+        "delete": "DELETE FROM poll_search WHERE poll_id IN :poll_ids",
+        "prune": "DELETE FROM poll_search WHERE poll_id NOT IN (SELECT id FROM polls WHERE is_active)",
+        "optimize": None,
+        "matches": (
+            "SELECT poll_id, ts_rank_cd(document, query) AS score "
+            "FROM poll_search, plainto_tsquery('english', :query) AS query WHERE document @@ query"
+        ),
+    },
+}
+
+class SearchUnavailable(Exception):
+    """The database backend has no full-text index."""
+
+def _sql(dialect_name: str) -> dict:
+    if dialect_name not in SEARCH_SQL:
+        raise SearchUnavailable(f"Search is not available on {dialect_name}")
+    return SEARCH_SQL[dialect_name]
+
+def search_terms(q: str) -> List[str]:
+    return [term for term in re.findall(r"\w+", q.lower()) if term not in STOP_WORDS][:MAX_TERMS]
+
+# Index maintenance
+
+def index_statements(dialect_name: str, poll_ids: Sequence[int], new: bool = False) -> list:
+    """Statements (re)writing the search rows of the given polls; ``new`` skips the delete."""
+    if dialect_name not in SEARCH_SQL or not poll_ids:
+        return []
+    sql = SEARCH_SQL[dialect_name]
+    ids = bindparam("poll_ids", list(poll_ids), expanding=True)
+    statements = [text(sql["insert"]).bindparams(ids)]
+    if not new:
+        statements.insert(0, text(sql["delete"]).bindparams(ids))
+    return statements
+
+def unindex_statement(dialect_name: str, poll_ids: Sequence[int]):
+    """Statement removing the search rows of deleted polls (None if search is unavailable)."""
+    if dialect_name not in SEARCH_SQL:
+        return None
+    return text(SEARCH_SQL[dialect_name]["delete"]).bindparams(bindparam("poll_ids", list(poll_ids), expanding=True))
+
+def index_polls(db: Session, poll_ids: Sequence[int], new: bool = False):
+    """Index new or changed polls (caller flushes pending changes and commits)."""
+    for statement in index_statements(db.get_bind().dialect.name, poll_ids, new):
+        db.execute(statement)
+
+def unindex_polls(db: Session, poll_ids: Sequence[int]):
+    """Drop deleted polls from the index (caller commits)."""
+    statement = unindex_statement(db.get_bind().dialect.name, poll_ids)
+    if statement is not None:
+        db.execute(statement)
+
+def rebuild_search_index(db: Session, polls_per_transaction: int = 1000) -> int:
+    """Re-index every active poll, one chunk per transaction, and drop stale rows.
+
+    Search keeps working while this runs. Returns the number of polls indexed.
+    """
+    sql = _sql(db.get_bind().dialect.name)
+    db.execute(text(sql["prune"]))
+    db.commit()
+    poll_ids = db.execute(text("SELECT id FROM polls WHERE is_active ORDER BY id")).scalars().all()
+    for offset in range(0, len(poll_ids), polls_per_transaction):
+        index_polls(db, poll_ids[offset:offset + polls_per_transaction])
+        db.commit()
+    if sql["optimize"]:
+        db.execute(text(sql["optimize"]))
+        db.commit()
+    return len(poll_ids)
+
+# Queries
+
+def search_statement(dialect_name: str, q: str, limit: int, cursor: Optional[str] = None):
+    """Select one page of (poll_id, score), best first, plus one row to detect a next page.
+
+    Returns None if ``q`` has no searchable terms (only stop words or punctuation). Raises SearchUnavailable or
+    InvalidCursor.
+    """
+    sql = _sql(dialect_name)
+    terms = search_terms(q)
+    if not terms:
+        return None
+    # FTS5 takes quoted terms as plain strings, so user input cannot form operators
+    query = " ".join(f'"{term}"' for term in terms) if dialect_name == "sqlite" else " ".join(terms)
+    params = {"query": query, "limit": limit + 1}
+    keyset = ""
+    if cursor:
+        score, poll_id = decode_cursor(cursor, SEARCH_SORT)
+        if not isinstance(score, (int, float)):
+            raise InvalidCursor("Invalid cursor")
+        keyset = " WHERE (score, poll_id) < (:score, :poll_id)"
+        params.update(score=score, poll_id=poll_id)
+    return text(
+        f"SELECT poll_id, score FROM ({sql['matches']}) AS matches{keyset} "
+        "ORDER BY score DESC, poll_id DESC LIMIT :limit"
+    ).bindparams(**params)
+
+def paginate_search(rows: Sequence, limit: int) -> Tuple[List[int], Optional[str]]:
+    """Split fetched (poll_id, score) rows into the page's ids and the next cursor."""
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(SEARCH_SORT, last.score, last.poll_id)
+    return [row.poll_id for row in rows[:limit]], next_cursor
@@ -0,0 +1,246 @@
+"""Real-time fan-out of vote and like count deltas.
+
+Write endpoints publish small deltas (``+1`` on an option, ``-1`` like, ...)
+to a ``Broker``. Every worker's ``StreamHub`` receives them from the broker,
+sums them per poll and flushes at most one merged update per poll per
+coalescing interval to its local subscribers. Subscribers have bounded queues;
+one that falls behind is dropped rather than slowing everyone else down.
+
+Deltas of writes that bump the poll's ``version`` carry the new version. A
+stream subscribes before it loads its snapshot, so deltas committed in between
+are both in the snapshot and queued; the subscriber drops those at or below
+the snapshot's version. Deltas counted only in memory (buffered votes, the
+counter engine) carry no version and are always delivered.
+"""
+import asyncio
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core.config import REDIS_URL, STREAM_BROKER, STREAM_COALESCE_MS, STREAM_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+class Broker(ABC):
+    """Delivers published messages to every worker's hub, including our own."""
+
+    @abstractmethod
+    def start(self, on_message: Callable[[dict], None]):
+        """Begin passing every published message to ``on_message``."""
+
+    @abstractmethod
+    def publish(self, message: dict):
+        """Send ``message`` to all hubs."""
+
+    def stop(self):
+        pass
+
+class InMemoryBroker(Broker):
+    """Loopback broker for a single process; messages go straight to the local hub."""
+
+    def __init__(self):
+        self._on_message = None
+
+    def start(self, on_message):
+        self._on_message = on_message
+
+    def publish(self, message):
+        if self._on_message is not None:
+            self._on_message(message)
+
+    def stop(self):
+        self._on_message = None
+
+class RedisBroker(Broker):
+    """Shares events between workers over a Redis pub/sub channel.
+
+    Requires the optional ``redis`` package.
+    """
+
+    channel = "quickpoll:poll-events"
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("STREAM_BROKER=redis requires the 'redis' package") from exc
+        self._client = redis.Redis.from_url(url)
+        self._pubsub = None
+        self._thread = None
+
+    def start(self, on_message):
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._pubsub.subscribe(**{self.channel: lambda raw: on_message(json.loads(raw["data"]))})
+        self._thread = self._pubsub.run_in_thread(sleep_time=0.1, daemon=True)
+
+    def publish(self, message):
+        self._client.publish(self.channel, json.dumps(message))
+
+    def stop(self):
+        if self._thread is not None:
+            self._thread.stop()
+        if self._pubsub is not None:
+            self._pubsub.close()
+
+class Subscriber:
+    """A single stream consumer with a bounded queue of pending updates."""
+
+    def __init__(self, poll_id: int, queue_size: int):
+        self.poll_id = poll_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+        # Version of the snapshot sent to this consumer; deltas up to it are already counted
+        self.snapshot_version: Optional[int] = None
+
+    async def next_update(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """Return the next update, None if dropped, or raise TimeoutError."""
+        while True:
+            item = await asyncio.wait_for(self.queue.get(), timeout)
+            if item is None:
+                return None
+            update = self._unseen(*item)
+            if update is not None:
+                return update
+
+    def _unseen(self, update: dict, versioned: List[Tuple[int, dict]]) -> Optional[dict]:
+        """Remove the deltas the snapshot already counted; None if nothing is left."""
+        if self.snapshot_version is None:
+            return update
+        seen = [delta for version, delta in versioned if version <= self.snapshot_version]
+        if not seen:
+            return update
+        options = dict(update["options"])
+        total_votes, like_count = update["total_votes"], update["like_count"]
+        for delta in seen:
+            for option_id, count in delta.get("options", {}).items():
+                options[option_id] -= count
+            total_votes -= delta.get("total_votes", 0)
+            like_count -= delta.get("like_count", 0)
+        options = {option_id: count for option_id, count in options.items() if count}
+        if not options and not total_votes and not like_count:
+            return None
+        return {**update, "options": options, "total_votes": total_votes, "like_count": like_count}
+
+class StreamHub:
+    """Per-process pub/sub hub that coalesces count deltas per poll."""
+
+    def __init__(self, broker: Broker, interval: float, queue_size: int):
+        self.broker = broker
+        self.interval = interval
+        self.queue_size = queue_size
+        self._subscribers: Dict[int, Set[Subscriber]] = {}
+        self._pending: Dict[int, dict] = {}
+        # Versioned deltas merged into each pending update, for subscribers still catching up
+        self._pending_versions: Dict[int, List[Tuple[int, dict]]] = {}
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.dropped_subscribers = 0
+
+    async def start(self):
+        self.broker.start(self.receive)
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        self.broker.stop()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    # Publishing side (called from request handlers, possibly in worker threads)
+
+    def publish_vote(self, poll_id: int, option_id: int, version: Optional[int] = None):
+        self._publish({"poll_id": poll_id, "options": {str(option_id): 1}, "total_votes": 1}, version)
+
+    def publish_like(self, poll_id: int, delta: int, version: Optional[int] = None):
+        self._publish({"poll_id": poll_id, "like_count": delta}, version)
+
+    def _publish(self, message: dict, version: Optional[int]):
+        if version is not None:
+            message["version"] = version
+        self.broker.publish(message)
+
+    def receive(self, message: dict):
+        """Merge a delta from the broker into the pending update for its poll."""
+        poll_id = message["poll_id"]
+        with self._lock:
+            if poll_id not in self._subscribers:
+                return
+            pending = self._pending.setdefault(
+                poll_id, {"poll_id": poll_id, "options": {}, "total_votes": 0, "like_count": 0}
+            )
+            for option_id, delta in message.get("options", {}).items():
+                pending["options"][option_id] = pending["options"].get(option_id, 0) + delta
+            pending["total_votes"] += message.get("total_votes", 0)
+            pending["like_count"] += message.get("like_count", 0)
+            if message.get("version") is not None:
+                self._pending_versions.setdefault(poll_id, []).append((message["version"], message))
+
+    # Subscribing side (runs on the event loop)
+
+    def subscribe(self, poll_id: int) -> Subscriber:
+        subscriber = Subscriber(poll_id, self.queue_size)
+        with self._lock:
+            self._subscribers.setdefault(poll_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            subscribers = self._subscribers.get(subscriber.poll_id)
+            if subscribers is not None:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self._subscribers[subscriber.poll_id]
+                    self._pending.pop(subscriber.poll_id, None)
+                    self._pending_versions.pop(subscriber.poll_id, None)
+
+    def subscriber_count(self, poll_id: Optional[int] = None) -> int:
+        with self._lock:
+            if poll_id is not None:
+                return len(self._subscribers.get(poll_id, ()))
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def flush(self):
+        """Send one merged update per poll to its subscribers."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            versions, self._pending_versions = self._pending_versions, {}
+            targets = {poll_id: list(self._subscribers.get(poll_id, ())) for poll_id in pending}
+
+        for poll_id, update in pending.items():
+            item = ({"type": "delta", **update}, versions.get(poll_id, []))
+            for subscriber in targets[poll_id]:
+                try:
+                    subscriber.queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    self._drop(subscriber)
+
+    def _drop(self, subscriber: Subscriber):
+        """Disconnect a consumer that is not keeping up."""
+        self.unsubscribe(subscriber)
+        subscriber.dropped = True
+        while not subscriber.queue.empty():
+            subscriber.queue.get_nowait()
+        subscriber.queue.put_nowait(None)
+        self.dropped_subscribers += 1
+        logger.info("Dropped slow stream subscriber for poll %s", subscriber.poll_id)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Stream flush failed")
+
+def create_broker() -> Broker:
+    if STREAM_BROKER == "redis":
+        return RedisBroker(REDIS_URL)
+    return InMemoryBroker()
+
+stream_hub = StreamHub(create_broker(), STREAM_COALESCE_MS / 1000, STREAM_QUEUE_SIZE)
@@ -0,0 +1,165 @@
+"""Vote-over-time rollups for the poll results timeseries.
+
+Every vote increments one ``poll_vote_rollups`` row per bucket size (minute,
+hour, day) in the same transaction that inserts it, via an upsert. A
+timeseries read then touches at most buckets x options rows through the
+primary key, however many votes the poll has. ``backfill_rollups`` rebuilds
+the rollups from the votes table for data written before they existed.
+"""
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from models.models import Poll, PollOption, Vote, VoteRollup
+
+BUCKETS = {"1m": 60, "1h": 3600, "1d": 86400}
+BUCKET_PATTERN = "^(" + "|".join(BUCKETS) + ")$"
+# Buckets returned when no ``since`` is given, and the most one response may span
+DEFAULT_BUCKET_COUNTS = {"1m": 60, "1h": 48, "1d": 30}
+MAX_BUCKETS = 1440
+
+def _epoch(value: Optional[datetime]) -> float:
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        # SQLite hands back naive timestamps, which are UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def rollup_rows(votes: Iterable[Tuple[int, int, Optional[datetime]]]) -> List[dict]:
+    """Rollup increments for (poll_id, option_id, voted_at) triples; None means now.
+
+    Increments for the same row are merged, since one upsert statement may not
+    touch a row twice.
+    """
+    counts: Dict[tuple, int] = {}
+    for poll_id, option_id, voted_at in votes:
+        timestamp = int(_epoch(voted_at))
+        for seconds in BUCKETS.values():
+            key = (poll_id, seconds, timestamp - timestamp % seconds, option_id)
+            counts[key] = counts.get(key, 0) + 1
+    return [
+        {"poll_id": poll_id, "bucket_seconds": seconds, "bucket_start": start, "option_id": option_id, "vote_count": n}
+        for (poll_id, seconds, start, option_id), n in counts.items()
+    ]
+
+def rollup_upsert(dialect_name: str):
+    """INSERT ... ON CONFLICT DO UPDATE adding to existing rollup rows (SQLite and PostgreSQL)."""
+    # Only the dialect in use is imported; the PostgreSQL one is slow to load
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(VoteRollup)
+    return statement.on_conflict_do_update(
+        index_elements=[VoteRollup.poll_id, VoteRollup.bucket_seconds, VoteRollup.bucket_start, VoteRollup.option_id],
+        set_={"vote_count": VoteRollup.vote_count + statement.excluded.vote_count},
+    )
+
+def record_rollups(db: Session, votes: Iterable[Tuple[int, int, Optional[datetime]]]):
+    """Add new votes to the rollups (caller commits)."""
+    rows = rollup_rows(votes)
+    if rows:
+        db.execute(rollup_upsert(db.get_bind().dialect.name), rows)
+
+# Reads
+
+def timeseries_range(bucket: str, since: Optional[datetime], until: Optional[datetime]) -> Tuple[int, int]:
+    """Bucket-aligned [start, end) in Unix time. Raises ValueError for a bad range."""
+    seconds = BUCKETS[bucket]
+    end = int(_epoch(until))
+    end = end - end % seconds + seconds
+    if since is None:
+        start = end - DEFAULT_BUCKET_COUNTS[bucket] * seconds
+    else:
+        start = int(_epoch(since))
+        start -= start % seconds
+    if start >= end:
+        raise ValueError("since must be before until")
+    if (end - start) // seconds > MAX_BUCKETS:
+        raise ValueError(f"At most {MAX_BUCKETS} buckets per request; narrow the range or use a larger bucket")
+    return start, end
+
+def poll_options_statement(poll_id: int):
+    """Options of an active poll; no rows if the poll does not exist or was deleted."""
+    return (
+        select(PollOption.id, PollOption.text)
+        .join(Poll, Poll.id == PollOption.poll_id)
+        .where(Poll.id == poll_id, Poll.is_active == True)
+        .order_by(PollOption.id)
+    )
+
+def rollups_statement(poll_id: int, bucket: str, start: int, end: int):
+    return select(VoteRollup.option_id, VoteRollup.bucket_start, VoteRollup.vote_count).where(
+        VoteRollup.poll_id == poll_id,
+        VoteRollup.bucket_seconds == BUCKETS[bucket],
+        VoteRollup.bucket_start >= start,
+        VoteRollup.bucket_start < end,
+    )
+
+def build_timeseries(poll_id: int, bucket: str, start: int, end: int, options: Sequence, rollups: Sequence) -> dict:
+    """Zero-filled per-option series from option rows and rollup rows."""
+    seconds = BUCKETS[bucket]
+    size = (end - start) // seconds
+    series = {option.id: [0] * size for option in options}
+    totals = [0] * size
+    for option_id, bucket_start, count in rollups:
+        if option_id in series:
+            index = (bucket_start - start) // seconds
+            series[option_id][index] += count
+            totals[index] += count
+    return {
+        "poll_id": poll_id,
+        "bucket": bucket,
+        "bucket_seconds": seconds,
+        "buckets": [datetime.fromtimestamp(start + i * seconds, timezone.utc) for i in range(size)],
+        "options": [
+            {"id": option.id, "text": option.text, "counts": series[option.id], "total": sum(series[option.id])}
+            for option in options
+        ],
+        "totals": totals,
+    }
+
+def poll_timeseries(db: Session, poll_id: int, bucket: str, start: int, end: int) -> Optional[dict]:
+    """Vote counts per bucket for an active poll, or None if there is no such poll."""
+    options = db.execute(poll_options_statement(poll_id)).all()
+    if not options:
+        return None
+    rollups = db.execute(rollups_statement(poll_id, bucket, start, end)).all()
+    return build_timeseries(poll_id, bucket, start, end, options, rollups)
+
+# Backfill
+
+def backfill_rollups(db: Session, poll_ids: Optional[List[int]] = None, polls_per_transaction: int = 500) -> int:
+    """Rebuild rollups from the votes table, one chunk of polls per transaction.
+
+    Each chunk's rollups are deleted and recomputed, so the job can be re-run.
+    The chunk's poll rows are locked first, which on PostgreSQL waits for votes
+    in flight on those polls and holds new ones (their foreign key check needs
+    a share lock) until the chunk commits. On SQLite the single writer already
+    serializes them. Returns the number of rollup rows written.
+    """
+    id_query = select(Poll.id).order_by(Poll.id)
+    if poll_ids:
+        id_query = id_query.where(Poll.id.in_(poll_ids))
+    all_ids = db.execute(id_query).scalars().all()
+    dialect_name = db.get_bind().dialect.name
+    written = 0
+    for offset in range(0, len(all_ids), polls_per_transaction):
+        chunk = all_ids[offset:offset + polls_per_transaction]
+        db.execute(select(Poll.id).where(Poll.id.in_(chunk)).with_for_update())
+        db.execute(delete(VoteRollup).where(VoteRollup.poll_id.in_(chunk)))
+        votes = db.execute(
+            select(Vote.poll_id, Vote.option_id, Vote.created_at)
+            .where(Vote.poll_id.in_(chunk))
+            .execution_options(yield_per=10000)
+        )
+        rows = rollup_rows(votes)
+        if rows:
+            db.execute(rollup_upsert(dialect_name), rows)
+        db.commit()
+        written += len(rows)
+    return written
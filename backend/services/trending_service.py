@@ -0,0 +1,255 @@
+"""Trending polls: a time-decayed activity score kept in an in-memory top-K.
+
+Every vote adds 1 and every like adds TRENDING_LIKE_WEIGHT to a poll's score,
+and the score halves every TRENDING_HALF_LIFE_HOURS. Scores are stored as the
+decay-invariant key ``log2(score) + t / half_life``: decay lowers every score by
+the same factor, so keys never change as time passes and an update touches only
+the poll that received it. The current score is ``2 ** (key - now / half_life)``.
+
+The best TRENDING_TOP_K keys are kept in a sorted list, so reading the ranking
+costs O(K) however many polls or votes exist. A background thread checkpoints
+changed keys to ``poll_trending_scores`` and the ranking is reloaded from there
+on startup.
+
+The ranking is per process. With several workers each one ranks the activity
+it served and checkpoints are last-writer-wins per poll.
+"""
+import bisect
+import heapq
+import logging
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, insert, select
+
+from core.config import TRENDING_CHECKPOINT_SECONDS, TRENDING_HALF_LIFE_HOURS, TRENDING_LIKE_WEIGHT, TRENDING_TOP_K
+from core.database import SessionLocal
+from models.models import TrendingScore
+
+logger = logging.getLogger(__name__)
+
+# Polls whose decayed score falls below this are dropped from memory and the checkpoint
+MIN_SCORE = 0.01
+
+class TrendingRanking:
+    """Decayed per-poll activity scores with an incrementally maintained top-K."""
+
+    def __init__(self, half_life: float, top_k: int, like_weight: float, checkpoint_interval: float):
+        self.half_life = half_life
+        self.top_k = top_k
+        self.like_weight = like_weight
+        self.checkpoint_interval = checkpoint_interval
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._keys: Dict[int, float] = {}
+        self._top: List[Tuple[float, int]] = []  # ascending (key, poll_id)
+        self._top_ids: Set[int] = set()
+        self._stale = False  # a top entry dropped and an outsider may now belong in the top
+        self._dirty: Set[int] = set()
+        self._removed: Set[int] = set()
+        self.updates = 0
+        self.rebuilds = 0
+        self.checkpoints = 0
+
+    # Lifecycle
+
+    def start(self):
+        with SessionLocal() as db:
+            self.load(db)
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="trending-checkpoint", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with SessionLocal() as db:
+            self.checkpoint(db)
+
+    def load(self, db) -> int:
+        """Replace the in-memory ranking with the checkpointed keys still worth keeping."""
+        rows = db.execute(
+            select(TrendingScore.poll_id, TrendingScore.score_key)
+            .where(TrendingScore.score_key >= self._cutoff_key())
+        ).all()
+        with self._lock:
+            self._keys = {poll_id: key for poll_id, key in rows}
+            self._dirty.clear()
+            self._removed.clear()
+            self._rebuild_top()
+        return len(rows)
+
+    def checkpoint(self, db):
+        """Write keys changed since the last checkpoint and prune decayed rows."""
+        with self._lock:
+            dirty = {poll_id: self._keys[poll_id] for poll_id in self._dirty if poll_id in self._keys}
+            removed = set(self._removed)
+            self._dirty.clear()
+            self._removed.clear()
+        try:
+            stale_ids = list(dirty) + list(removed)
+            if stale_ids:
+                db.execute(delete(TrendingScore).where(TrendingScore.poll_id.in_(stale_ids)))
+            if dirty:
+                db.execute(insert(TrendingScore), [
+                    {"poll_id": poll_id, "score_key": key} for poll_id, key in dirty.items()
+                ])
+            db.execute(delete(TrendingScore).where(TrendingScore.score_key < self._cutoff_key()))
+            db.commit()
+        except Exception:
+            db.rollback()
+            # Retry these polls next time, unless they changed again meanwhile
+            with self._lock:
+                self._dirty.update(dirty)
+                self._removed.update(removed - self._keys.keys())
+            raise
+        self.checkpoints += 1
+
+    # Updates
+
+    def record_vote(self, poll_id: int):
+        self._add(poll_id, 1.0)
+
+    def record_like(self, poll_id: int, delta: int):
+        self._add(poll_id, self.like_weight * delta)
+
+    def forget(self, poll_id: int):
+        """Drop a poll from the ranking (e.g. after it is deleted)."""
+        with self._lock:
+            if self._keys.pop(poll_id, None) is not None:
+                self._drop_from_top(poll_id)
+                self._dirty.discard(poll_id)
+                self._removed.add(poll_id)
+
+    # Reads
+
+    def top(self, limit: int) -> List[Tuple[int, float]]:
+        """The ``limit`` highest-scoring polls as (poll_id, current score)."""
+        now_key = self._now_key()
+        with self._lock:
+            if self._stale:
+                self._rebuild_top()
+            best = self._top[-limit:] if limit > 0 else []
+        return [(poll_id, 2 ** (key - now_key)) for key, poll_id in reversed(best)]
+
+    def stats(self) -> dict:
+        return {
+            "tracked_polls": len(self._keys),
+            "top_k": self.top_k,
+            "updates": self.updates,
+            "rebuilds": self.rebuilds,
+            "checkpoints": self.checkpoints,
+            "pending_checkpoint": len(self._dirty) + len(self._removed),
+        }
+
+    # Helpers
+
+    def _now_key(self) -> float:
+        return time.time() / self.half_life
+
+    def _cutoff_key(self) -> float:
+        return self._now_key() + math.log2(MIN_SCORE)
+
+    def _add(self, poll_id: int, weight: float):
+        if weight == 0:
+            return
+        event_key = math.log2(abs(weight)) + self._now_key()
+        with self._lock:
+            self.updates += 1
+            old_key = self._keys.get(poll_id)
+            if weight > 0:
+                if old_key is None:
+                    new_key = event_key
+                else:
+                    # log2(2**old_key + 2**event_key) without overflow
+                    high = max(old_key, event_key)
+                    new_key = high + math.log2(2 ** (old_key - high) + 2 ** (event_key - high))
+            else:
+                if old_key is None:
+                    return
+                remaining = 2 ** (old_key - event_key) - 1
+                new_key = event_key + math.log2(remaining) if remaining > 0 else None
+
+            if new_key is None or new_key < self._cutoff_key():
+                self._keys.pop(poll_id, None)
+                self._drop_from_top(poll_id)
+                self._dirty.discard(poll_id)
+                self._removed.add(poll_id)
+                return
+
+            self._keys[poll_id] = new_key
+            self._dirty.add(poll_id)
+            self._removed.discard(poll_id)
+            self._place(poll_id, old_key, new_key)
+
+    def _place(self, poll_id: int, old_key: Optional[float], new_key: float):
+        """Move a poll within the top-K after its key changed (lock held).
+
+        Invariant: unless ``_stale``, no poll outside the top has a higher key
+        than the lowest one inside it.
+        """
+        if poll_id in self._top_ids:
+            self._top.pop(bisect.bisect_left(self._top, (old_key, poll_id)))
+            if new_key < old_key and len(self._keys) > len(self._top) + 1 and (not self._top or new_key < self._top[0][0]):
+                # It may have sunk below a poll outside the top; rebuild on the next read
+                self._stale = True
+            bisect.insort(self._top, (new_key, poll_id))
+        elif len(self._top) < self.top_k:
+            if not self._stale:
+                bisect.insort(self._top, (new_key, poll_id))
+                self._top_ids.add(poll_id)
+        elif new_key > self._top[0][0]:
+            _, evicted = self._top.pop(0)
+            self._top_ids.discard(evicted)
+            bisect.insort(self._top, (new_key, poll_id))
+            self._top_ids.add(poll_id)
+
+    def _drop_from_top(self, poll_id: int):
+        """Remove a poll that left the ranking from the top-K (lock held)."""
+        if poll_id not in self._top_ids:
+            return
+        self._top = [entry for entry in self._top if entry[1] != poll_id]
+        self._top_ids.discard(poll_id)
+        if len(self._keys) > len(self._top):
+            self._stale = True
+
+    def _rebuild_top(self):
+        """Recompute the top-K from all tracked keys (lock held)."""
+        self._top = sorted(heapq.nlargest(self.top_k, ((key, poll_id) for poll_id, key in self._keys.items())))
+        self._top_ids = {poll_id for _, poll_id in self._top}
+        self._stale = False
+        self.rebuilds += 1
+
+    def _prune(self):
+        """Forget polls whose score decayed below MIN_SCORE."""
+        cutoff = self._cutoff_key()
+        with self._lock:
+            decayed = [poll_id for poll_id, key in self._keys.items() if key < cutoff]
+            for poll_id in decayed:
+                del self._keys[poll_id]
+                self._dirty.discard(poll_id)
+            if decayed:
+                # Outsiders never outrank the top, so anything left in the top is still valid
+                self._top = [entry for entry in self._top if entry[0] >= cutoff]
+                self._top_ids = {poll_id for _, poll_id in self._top}
+
+    def _run(self):
+        while not self._stopping.wait(self.checkpoint_interval):
+            try:
+                self._prune()
+                with SessionLocal() as db:
+                    self.checkpoint(db)
+            except Exception:
+                logger.exception("Trending checkpoint error")
+
+trending = TrendingRanking(
+    half_life=TRENDING_HALF_LIFE_HOURS * 3600,
+    top_k=TRENDING_TOP_K,
+    like_weight=TRENDING_LIKE_WEIGHT,
+    checkpoint_interval=TRENDING_CHECKPOINT_SECONDS,
+)
@@ -0,0 +1,113 @@
+"""Multi-poll vote submission (POST /votes/batch), shared by the sync and async routers.
+
+A batch is validated with one query for poll/option ownership and written by
+``insert_new_votes`` in a single INSERT ... ON CONFLICT DO NOTHING, so polls
+already voted on, even by a concurrent request, are skipped rather than failing
+the transaction. Invalid items get their own error result instead of failing
+the batch.
+"""
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import and_, select
+
+from models.models import Poll, PollOption, Vote
+from schemas.schemas import VoteBatchItem
+from services.vote_ingest import ALREADY_VOTED, VoteRejected
+
+def ownership_statement(items: List[VoteBatchItem]):
+    """Active polls in the batch, each joined to the batch options it owns (or NULL)."""
+    return select(Poll.id, PollOption.id).outerjoin(
+        PollOption,
+        and_(PollOption.poll_id == Poll.id, PollOption.id.in_({item.option_id for item in items}))
+    ).where(Poll.id.in_({item.poll_id for item in items}), Poll.is_active == True)
+
+def inserted_ids_statement(user_id: int, rows: List[dict]):
+    return select(Vote.poll_id, Vote.id).where(
+        Vote.user_id == user_id, Vote.poll_id.in_([row["poll_id"] for row in rows])
+    )
+
+def error_result(item: VoteBatchItem, status_code: int, detail: str) -> dict:
+    return {"poll_id": item.poll_id, "option_id": item.option_id, "status_code": status_code, "detail": detail}
+
+def validate_batch(items: List[VoteBatchItem], user_id: int, ownership) -> Tuple[List[dict], List[Tuple[int, dict]]]:
+    """Check every item against the rows of ``ownership_statement``.
+
+    Returns the per-item results (None for items still to be written) and the
+    (index, vote row) pairs to insert.
+    """
+    active_polls = {poll_id for poll_id, _ in ownership}
+    owned = {(poll_id, option_id) for poll_id, option_id in ownership if option_id is not None}
+    created_at = datetime.now(timezone.utc)
+
+    results: List[dict] = [None] * len(items)
+    pending = []
+    seen_polls = set()
+    for index, item in enumerate(items):
+        if item.poll_id in seen_polls:
+            results[index] = error_result(item, 400, "Poll appears more than once in this batch")
+        elif item.poll_id not in active_polls:
+            results[index] = error_result(item, 404, "Poll not found")
+        elif (item.poll_id, item.option_id) not in owned:
+            results[index] = error_result(item, 400, "Invalid option for this poll")
+        else:
+            seen_polls.add(item.poll_id)
+            pending.append((index, {
+                "user_id": user_id,
+                "poll_id": item.poll_id,
+                "option_id": item.option_id,
+                "created_at": created_at,
+            }))
+    return results, pending
+
+def settle_batch(results: List[dict], pending: List[Tuple[int, dict]], inserted: List[dict], vote_ids: Dict[int, int]) -> List[dict]:
+    """Fill in the results of pending items once ``insert_new_votes`` has run."""
+    inserted_polls = {row["poll_id"] for row in inserted}
+    for index, row in pending:
+        if row["poll_id"] in inserted_polls:
+            results[index] = {
+                "poll_id": row["poll_id"],
+                "option_id": row["option_id"],
+                "status_code": 200,
+                "vote_id": vote_ids.get(row["poll_id"]),
+                "created_at": row["created_at"],
+            }
+        else:
+            results[index] = {
+                "poll_id": row["poll_id"],
+                "option_id": row["option_id"],
+                "status_code": 400,
+                "detail": ALREADY_VOTED,
+            }
+    return results
+
+def submit_buffered_batch(items: List[VoteBatchItem], user_id: int, ingester) -> Tuple[List[dict], List[dict]]:
+    """Hand each vote to the write-behind ingester. Returns the results and accepted rows.
+
+    Repeated polls are reported as in ``validate_batch``: after an item that
+    passed validation, later items for its poll are rejected as duplicates.
+    """
+    results = []
+    accepted = []
+    seen_polls = set()
+    for item in items:
+        if item.poll_id in seen_polls:
+            results.append(error_result(item, 400, "Poll appears more than once in this batch"))
+            continue
+        try:
+            row = ingester.submit(item.poll_id, item.option_id, user_id)
+        except VoteRejected as exc:
+            if exc.detail == ALREADY_VOTED:
+                seen_polls.add(item.poll_id)
+            results.append(error_result(item, exc.status_code, exc.detail))
+            continue
+        seen_polls.add(item.poll_id)
+        accepted.append(row)
+        results.append({
+            "poll_id": item.poll_id,
+            "option_id": item.option_id,
+            "status_code": 202,
+            "detail": "pending",
+            "created_at": row["created_at"],
+        })
+    return results, accepted
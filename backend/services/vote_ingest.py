@@ -0,0 +1,591 @@
+"""Write-behind vote ingestion (VOTE_INGEST_MODE=buffered).
+
+Votes are validated against an in-memory index of each poll's options and
+voters, appended to a local journal, acknowledged, and written to the database
+by a background worker in batched multi-row inserts.
+
+Durability: a vote is acknowledged only after its journal line is written.
+With VOTE_JOURNAL_FSYNC=always the line is fsync'ed before the response, so an
+acknowledged vote survives a process or machine crash. The fsync is a group
+commit outside the ingester lock: one call covers every line written before it
+started, so concurrent votes share it and reads never wait for the disk. With
+``batch`` it is fsync'ed when the segment is rotated at the next flush, also
+outside the lock, so a machine crash can lose up to one flush interval of
+acknowledged votes (a process crash cannot). Journal segments are deleted only after their votes are
+committed, and any segments left behind are replayed on startup. Replay skips
+(poll, user) pairs that already have a vote, so it is safe to replay a segment
+twice.
+
+A batch the database rejects for anything but being unavailable is retried one
+vote at a time; votes that still fail are appended to ``dead-letter.jsonl`` in
+the journal directory and dropped, so they cannot hold up later batches.
+
+The voter index is per process. When several workers take votes, a vote that
+another worker already recorded is dropped at flush time by the same
+duplicate check. Each worker journals into its own ``worker-N`` directory under
+VOTE_JOURNAL_DIR, held with a file lock; a worker that starts after another
+stopped or crashed takes over its unlocked directory and replays it.
+"""
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from core.config import (
+    VOTE_FLUSH_BATCH_SIZE, VOTE_FLUSH_INTERVAL_MS, VOTE_INGEST_MAX_POLLS, VOTE_INGEST_MODE,
+    VOTE_JOURNAL_DIR, VOTE_JOURNAL_FSYNC,
+)
+from core.database import SessionLocal
+from models.models import Poll, PollOption, Vote
+from services.counter_engine import counter_engine
+from services.counter_service import add_to_vote_counters, poll_versions
+from services.timeseries_service import record_rollups
+
+logger = logging.getLogger(__name__)
+
+ALREADY_VOTED = "You have already voted on this poll"
+
+class VoteRejected(Exception):
+    """A vote failed validation; carries the HTTP status and detail to return."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+class _PollState:
+    __slots__ = ("is_active", "option_ids", "voters")
+
+    def __init__(self, is_active: bool, option_ids: set, voters: set):
+        self.is_active = is_active
+        self.option_ids = option_ids
+        self.voters = voters
+
+def vote_insert(dialect_name: str):
+    """INSERT ... ON CONFLICT DO NOTHING RETURNING the pairs actually inserted (SQLite and PostgreSQL)."""
+    # Only the dialect in use is imported; the PostgreSQL one is slow to load
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Vote).on_conflict_do_nothing(
+        index_elements=[Vote.poll_id, Vote.user_id]
+    ).returning(Vote.poll_id, Vote.user_id)
+
+def insert_new_votes(db, rows: List[dict]) -> List[dict]:
+    """Insert votes whose (poll_id, user_id) pair is not taken yet, update the
+    counters for them and commit. Returns the rows actually inserted, each with
+    its poll's new ``version``.
+
+    Taken pairs (a replayed journal, or a vote recorded meanwhile by another
+    request or worker) are skipped by the unique index rather than raising, so
+    a concurrent duplicate cannot fail the rest of the batch.
+
+    With the counter engine on, the caller hands the inserted rows to it instead
+    and the rows carry no version.
+    """
+    # Within the batch the first vote for a pair wins
+    seen = set()
+    unique_rows = []
+    for row in rows:
+        pair = (row["poll_id"], row["user_id"])
+        if pair not in seen:
+            seen.add(pair)
+            unique_rows.append(row)
+    if not unique_rows:
+        return []
+    
+    inserted = set(db.execute(vote_insert(db.get_bind().dialect.name), unique_rows).all())
+    new_rows = [row for row in unique_rows if (row["poll_id"], row["user_id"]) in inserted]
+    if not new_rows:
+        return []
+    
+    if counter_engine is None:
+        option_totals: Dict[int, int] = {}
+        poll_totals: Dict[int, int] = {}
+        for row in new_rows:
+            option_totals[row["option_id"]] = option_totals.get(row["option_id"], 0) + 1
+            poll_totals[row["poll_id"]] = poll_totals.get(row["poll_id"], 0) + 1
+        add_to_vote_counters(db, option_totals, poll_totals)
+        versions = poll_versions(db, poll_totals)
+        for row in new_rows:
+            row["version"] = versions[row["poll_id"]]
+    record_rollups(db, ((row["poll_id"], row["option_id"], row.get("created_at")) for row in new_rows))
+    db.commit()
+    return new_rows
+
+# How long flushed votes stay in the read overlay for readers that loaded a poll before the commit
+SETTLED_GRACE_SECONDS = 5.0
+
+def _lock_slot(path: str):
+    """Take the journal directory's lock without blocking; None if another process holds it."""
+    import fcntl
+
+    lock = open(os.path.join(path, ".lock"), "w")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
+
+class VoteIngester:
+    """Validates, journals and batches votes for a background writer."""
+
+    def __init__(self, journal_dir: str, interval: float, batch_size: int, fsync_mode: str, max_polls: int):
+        self.journal_root = journal_dir
+        self.journal_dir = journal_dir
+        self._slot_lock = None
+        self.interval = interval
+        self.batch_size = batch_size
+        self.fsync_mode = fsync_mode
+        self.max_polls = max_polls
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._polls: "OrderedDict[int, _PollState]" = OrderedDict()
+        self._buffer: List[dict] = []
+        self._unflushed: List[tuple] = []  # (segment path, rows) awaiting a successful commit
+        self._pending_counts: Dict[int, Dict[int, int]] = {}
+        self._pending_user_votes: Dict[tuple, int] = {}
+        # Recently committed votes, per poll as (poll version after the commit, option counts)
+        self._settled: Dict[int, List[tuple]] = {}
+        self._settled_user_votes: Dict[tuple, int] = {}
+        self._settled_expiry: deque = deque()  # (expires at, poll_id, version, user keys)
+        self._segment_seq = 0
+        self._journal = None
+        self._rotated: List[tuple] = []  # (closed-out segment file, last line in it) awaiting fsync and close
+        # Group commit: journal lines written, lines known to be on disk, and whether an fsync is running
+        self._written_seq = 0
+        self._durable_seq = 0
+        self._syncing = False
+        self._durable = threading.Condition()
+        self.accepted = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.dead_lettered = 0
+
+    # Lifecycle
+
+    def start(self):
+        self.journal_dir = self._claim_journal_slot()
+        if self.journal_dir == os.path.join(self.journal_root, "worker-0"):
+            # Segments journaled straight into VOTE_JOURNAL_DIR by earlier releases
+            self.replay(self.journal_root)
+        self.replay()
+        self._replay_unclaimed_slots()
+        self._open_segment()
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="vote-ingest", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        if self._journal is not None:
+            path = self._journal.name
+            self._journal.close()
+            self._journal = None
+            # Everything was flushed, so the open segment holds nothing unwritten
+            if not self._unflushed and os.path.getsize(path) == 0:
+                os.remove(path)
+        if self._slot_lock is not None:
+            self._slot_lock.close()
+            self._slot_lock = None
+
+    def replay(self, directory: Optional[str] = None) -> int:
+        """Write votes from journal segments left by a previous run."""
+        directory = directory or self.journal_dir
+        segments = sorted(
+            name for name in os.listdir(directory)
+            if name.startswith("votes-") and name.endswith(".jsonl")
+        )
+        replayed = 0
+        for name in segments:
+            path = os.path.join(directory, name)
+            rows = []
+            with open(path) as journal:
+                for line in journal:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        rows.append(self._decode(json.loads(line)))
+                    except ValueError:
+                        # A torn final line from a crash mid-write was never acknowledged
+                        logger.warning("Skipping unreadable journal line in %s", name)
+            db = SessionLocal()
+            try:
+                replayed += len(insert_new_votes(db, rows))
+            finally:
+                db.close()
+            os.remove(path)
+            seq = int(name[len("votes-"):-len(".jsonl")])
+            self._segment_seq = max(self._segment_seq, seq)
+        if replayed:
+            logger.info("Replayed %s journaled votes", replayed)
+        return replayed
+
+    # Request path
+
+    def submit(self, poll_id: int, option_id: int, user_id: int) -> dict:
+        """Validate and journal a vote. Raises VoteRejected on invalid votes."""
+        state = self._poll_state(poll_id)
+        with self._lock:
+            if state is None or not state.is_active:
+                raise VoteRejected(404, "Poll not found")
+            if option_id not in state.option_ids:
+                raise VoteRejected(400, "Invalid option for this poll")
+            if user_id in state.voters:
+                raise VoteRejected(400, ALREADY_VOTED)
+            
+            row = {
+                "user_id": user_id,
+                "poll_id": poll_id,
+                "option_id": option_id,
+                "created_at": datetime.now(timezone.utc),
+            }
+            self._append_to_journal(row)
+            written = self._written_seq
+            state.voters.add(user_id)
+            self._buffer.append(row)
+            counts = self._pending_counts.setdefault(poll_id, {})
+            counts[option_id] = counts.get(option_id, 0) + 1
+            self._pending_user_votes[(user_id, poll_id)] = option_id
+            self.accepted += 1
+            buffered = len(self._buffer)
+        
+        if buffered >= self.batch_size:
+            self._wake.set()
+        if self.fsync_mode == "always":
+            self._wait_durable(written)
+        return row
+
+    def forget_poll(self, poll_id: int):
+        """Drop the cached state of a poll (e.g. after it is deleted)."""
+        with self._lock:
+            self._polls.pop(poll_id, None)
+
+    # Read path
+
+    def pending_counts(self, poll_id: int, seen_version: Optional[int] = None) -> Dict[int, int]:
+        """Votes not in the database as of ``seen_version`` of the poll.
+
+        Besides the buffered votes, this includes votes a flush committed at a
+        later version, so a reader that loaded the poll just before the commit
+        still counts them exactly once.
+        """
+        with self._lock:
+            counts = dict(self._pending_counts.get(poll_id, {}))
+            if seen_version is not None:
+                for version, settled in self._settled.get(poll_id, ()):
+                    if version > seen_version:
+                        for option_id, count in settled.items():
+                            counts[option_id] = counts.get(option_id, 0) + count
+            return counts
+
+    def pending_user_vote(self, user_id: int, poll_id: int) -> Optional[int]:
+        with self._lock:
+            key = (user_id, poll_id)
+            return self._pending_user_votes.get(key, self._settled_user_votes.get(key))
+
+    def has_pending(self) -> bool:
+        return bool(self._pending_counts or self._settled)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "accepted": self.accepted,
+                "flushed": self.flushed,
+                "flushes": self.flushes,
+                "buffered": len(self._buffer) + sum(len(rows) for _, rows in self._unflushed),
+                "tracked_polls": len(self._polls),
+                "dead_lettered": self.dead_lettered,
+            }
+
+    # Background writer
+
+    def flush(self):
+        """Commit everything buffered so far in one batch."""
+        with self._flush_lock:
+            with self._lock:
+                if self._buffer:
+                    self._unflushed.append((self._rotate_segment(), self._buffer))
+                    self._buffer = []
+                work = list(self._unflushed)
+            self._sync_rotated()
+            
+            for segment, rows in work:
+                try:
+                    try:
+                        inserted = self._insert(rows)
+                    except OperationalError:
+                        raise
+                    except Exception:
+                        logger.exception("Vote batch %s failed; writing its votes one at a time", segment)
+                        inserted = self._insert_each(rows)
+                except OperationalError:
+                    # The database is unreachable or locked: keep the order and retry on the next flush
+                    logger.exception("Vote flush failed; will retry")
+                    return
+                
+                self._settle(rows, inserted)
+                os.remove(segment)
+
+    def _insert(self, rows: List[dict]) -> List[dict]:
+        db = SessionLocal()
+        try:
+            return insert_new_votes(db, rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _insert_each(self, rows: List[dict]) -> List[dict]:
+        """Insert a rejected batch vote by vote, dead-lettering the votes that fail on their own."""
+        inserted = []
+        for row in rows:
+            try:
+                inserted += self._insert([row])
+            except OperationalError:
+                raise
+            except Exception:
+                logger.exception("Dead-lettering vote of user %s on poll %s", row["user_id"], row["poll_id"])
+                self._dead_letter(row)
+        return inserted
+
+    def _dead_letter(self, row: dict):
+        with open(os.path.join(self.journal_dir, "dead-letter.jsonl"), "a") as dead_letters:
+            dead_letters.write(self._encode(row) + "\n")
+        with self._lock:
+            self.dead_lettered += 1
+            # The vote was never recorded, so the user may vote again
+            state = self._polls.get(row["poll_id"])
+            if state is not None:
+                state.voters.discard(row["user_id"])
+
+    def _settle(self, rows: List[dict], inserted: List[dict]):
+        from services.poll_service import invalidate_poll
+
+        # Committed votes by (poll, version), kept visible to readers holding an older version
+        settled: Dict[tuple, Dict[int, int]] = {}
+        user_keys: Dict[tuple, list] = {}
+        for row in inserted:
+            key = (row["poll_id"], row["version"])
+            counts = settled.setdefault(key, {})
+            counts[row["option_id"]] = counts.get(row["option_id"], 0) + 1
+            user_keys.setdefault(key, []).append((row["user_id"], row["poll_id"]))
+
+        with self._lock:
+            self._unflushed = [entry for entry in self._unflushed if entry[1] is not rows]
+            expires_at = time.monotonic() + SETTLED_GRACE_SECONDS
+            for (poll_id, version), counts in settled.items():
+                self._settled.setdefault(poll_id, []).append((version, counts))
+                self._settled_expiry.append((expires_at, poll_id, version, user_keys[poll_id, version]))
+            for row in inserted:
+                self._settled_user_votes[(row["user_id"], row["poll_id"])] = row["option_id"]
+            for row in rows:
+                counts = self._pending_counts.get(row["poll_id"])
+                if counts is not None:
+                    counts[row["option_id"]] -= 1
+                    if counts[row["option_id"]] <= 0:
+                        del counts[row["option_id"]]
+                    if not counts:
+                        del self._pending_counts[row["poll_id"]]
+                self._pending_user_votes.pop((row["user_id"], row["poll_id"]), None)
+            self._expire_settled()
+            self.flushed += len(inserted)
+            self.flushes += 1
+        
+        for poll_id in {row["poll_id"] for row in rows}:
+            invalidate_poll(poll_id)
+
+    def _expire_settled(self):
+        """Drop settled votes past their grace period (caller holds the lock)."""
+        now = time.monotonic()
+        while self._settled_expiry and self._settled_expiry[0][0] <= now:
+            _, poll_id, version, user_keys = self._settled_expiry.popleft()
+            remaining = [entry for entry in self._settled.get(poll_id, ()) if entry[0] != version]
+            if remaining:
+                self._settled[poll_id] = remaining
+            else:
+                self._settled.pop(poll_id, None)
+            for key in user_keys:
+                self._settled_user_votes.pop(key, None)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Vote ingest worker error")
+
+    # Helpers
+
+    def _poll_state(self, poll_id: int) -> Optional[_PollState]:
+        with self._lock:
+            state = self._polls.get(poll_id)
+            if state is not None:
+                self._polls.move_to_end(poll_id)
+                return state
+        
+        db = SessionLocal()
+        try:
+            poll = db.execute(select(Poll.is_active).where(Poll.id == poll_id)).first()
+            if poll is None:
+                return None
+            option_ids = set(db.execute(select(PollOption.id).where(PollOption.poll_id == poll_id)).scalars())
+            voters = set(db.execute(select(Vote.user_id).where(Vote.poll_id == poll_id)).scalars())
+        finally:
+            db.close()
+        
+        with self._lock:
+            state = self._polls.get(poll_id)
+            if state is None:
+                # Include votes accepted while we were loading
+                voters.update(user_id for (user_id, pid) in self._pending_user_votes if pid == poll_id)
+                state = _PollState(bool(poll.is_active), option_ids, voters)
+                self._polls[poll_id] = state
+                while len(self._polls) > self.max_polls:
+                    self._polls.popitem(last=False)
+            return state
+
+    def _claim_journal_slot(self) -> str:
+        """Lock the first free ``worker-N`` directory under the journal root for this process."""
+        os.makedirs(self.journal_root, exist_ok=True)
+        if importlib.util.find_spec("fcntl") is None:
+            # No flock (Windows): one process per VOTE_JOURNAL_DIR
+            return self.journal_root
+        for slot in itertools.count():
+            path = os.path.join(self.journal_root, f"worker-{slot}")
+            os.makedirs(path, exist_ok=True)
+            self._slot_lock = _lock_slot(path)
+            if self._slot_lock is not None:
+                return path
+
+    def _replay_unclaimed_slots(self):
+        """Replay other slots no live worker holds, such as one a worker took during a reload and then crashed."""
+        if self._slot_lock is None:
+            return
+        for name in os.listdir(self.journal_root):
+            path = os.path.join(self.journal_root, name)
+            if not name.startswith("worker-") or path == self.journal_dir:
+                continue
+            lock = _lock_slot(path)
+            if lock is not None:
+                try:
+                    self.replay(path)
+                finally:
+                    lock.close()
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.journal_dir, f"votes-{seq:012d}.jsonl")
+
+    def _open_segment(self):
+        self._segment_seq += 1
+        self._journal = open(self._segment_path(self._segment_seq), "a", buffering=1)
+
+    def _rotate_segment(self) -> str:
+        """Start a new segment (caller holds the lock); ``_sync_rotated`` syncs and closes the old one."""
+        path = self._journal.name
+        self._journal.flush()
+        self._rotated.append((self._journal, self._written_seq))
+        self._open_segment()
+        return path
+
+    def _sync_rotated(self):
+        """fsync and close rotated segments without holding the lock, so votes and reads never wait on it."""
+        with self._lock:
+            rotated = list(self._rotated)
+        for journal, seq in rotated:
+            if self.fsync_mode != "never":
+                os.fsync(journal.fileno())
+            with self._lock:
+                # Until now a waiter's group commit also syncs this segment (see _wait_durable)
+                self._rotated.remove((journal, seq))
+            if self.fsync_mode != "never":
+                self._mark_durable(seq)
+            journal.close()
+
+    def _append_to_journal(self, row: dict):
+        """Write a vote's journal line (caller holds the lock); ``_wait_durable`` syncs it."""
+        self._journal.write(self._encode(row) + "\n")
+        self._written_seq += 1
+
+    def _wait_durable(self, seq: int):
+        """Return once journal line ``seq`` is on disk, fsyncing for every waiter at once if needed."""
+        while True:
+            with self._durable:
+                while self._syncing and self._durable_seq < seq:
+                    self._durable.wait()
+                if self._durable_seq >= seq:
+                    return
+                self._syncing = True
+            synced = 0
+            try:
+                with self._lock:
+                    synced = self._written_seq
+                    # Duplicates stay valid if a segment is closed meanwhile; rotated
+                    # segments not synced yet may hold lines up to ``synced`` too
+                    fds = [os.dup(journal.fileno()) for journal, _ in self._rotated]
+                    fds.append(os.dup(self._journal.fileno()))
+                try:
+                    for fd in fds:
+                        os.fsync(fd)
+                finally:
+                    for fd in fds:
+                        os.close(fd)
+            finally:
+                with self._durable:
+                    self._syncing = False
+                    self._durable_seq = max(self._durable_seq, synced)
+                    self._durable.notify_all()
+
+    def _mark_durable(self, seq: int):
+        with self._durable:
+            self._durable_seq = max(self._durable_seq, seq)
+            self._durable.notify_all()
+
+    @staticmethod
+    def _encode(row: dict) -> str:
+        return json.dumps({
+            "u": row["user_id"], "p": row["poll_id"], "o": row["option_id"],
+            "t": row["created_at"].isoformat(),
+        })
+
+    @staticmethod
+    def _decode(entry: dict) -> dict:
+        return {
+            "user_id": entry["u"],
+            "poll_id": entry["p"],
+            "option_id": entry["o"],
+            "created_at": datetime.fromisoformat(entry["t"]),
+        }
+
+vote_ingester: Optional[VoteIngester] = None
+if VOTE_INGEST_MODE == "buffered":
+    vote_ingester = VoteIngester(
+        VOTE_JOURNAL_DIR,
+        VOTE_FLUSH_INTERVAL_MS / 1000,
+        VOTE_FLUSH_BATCH_SIZE,
+        VOTE_JOURNAL_FSYNC,
+        VOTE_INGEST_MAX_POLLS,
+    )
@@ -0,0 +1,45 @@
+"""Shared fixtures: the app on a scratch SQLite database.
+
+Settings are read when the app modules are imported, so the environment is set
+up here before anything from the backend is imported.
+"""
+import itertools
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp(prefix='quickpoll-test-')}/test.db"
+os.environ["RATE_LIMIT_ENABLED"] = "False"
+os.environ["PASSWORD_HASH_WORKERS"] = "0"
+os.environ["BCRYPT_ROUNDS"] = "4"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+
+_usernames = itertools.count()
+
+def login(client, username: str):
+    response = client.post("/auth/login", data={"username": username, "password": "secret1"})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def register(client):
+    """Create a user and return the username and its auth headers."""
+    def register_user():
+        username = f"user{next(_usernames)}"
+        response = client.post("/auth/register", json={"username": username, "email": f"{username}@example.com", "password": "secret1"})
+        assert response.status_code == 200, response.text
+        return username, login(client, username)
+    return register_user
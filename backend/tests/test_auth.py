@@ -0,0 +1,42 @@
+from sqlalchemy import update
+
+from core.database import SessionLocal
+from core.token_cache import token_cache
+from models.models import User
+
+def set_active(username: str, is_active: bool, bulk: bool = False):
+    db = SessionLocal()
+    try:
+        if bulk:
+            db.execute(update(User).where(User.username == username).values(is_active=is_active))
+        else:
+            db.query(User).filter(User.username == username).one().is_active = is_active
+        db.commit()
+    finally:
+        db.close()
+
+def test_deactivated_user_is_rejected_on_next_request(client, register):
+    username, headers = register()
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert token_cache.peek(headers["Authorization"].split()[1]) is not None
+
+    set_active(username, False)
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    # The inactive user is not cached either, so the next request queries again
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+    set_active(username, True)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+def test_bulk_deactivation_rejects_cached_token(client, register):
+    username, headers = register()
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    set_active(username, False, bulk=True)
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+def test_deactivated_user_cannot_log_in(client, register):
+    username, _ = register()
+    set_active(username, False)
+    response = client.post("/auth/login", data={"username": username, "password": "secret1"})
+    assert response.status_code == 401
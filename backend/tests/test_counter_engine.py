@@ -0,0 +1,29 @@
+import threading
+
+from services.counter_engine import CounterEngine, _PollCounters
+
+def test_increment_racing_eviction_is_never_lost():
+    engine = CounterEngine(stripes=2, max_polls=2, flush_interval=60, reconcile_interval=60)
+    counters_map = engine._maps[0]
+    counters = counters_map[2] = _PollCounters([(10, 0), (11, 0)], engine.stripes)
+    counted = []
+    voter = threading.Thread(target=lambda: counted.append(engine.try_increment(2, 11)))
+
+    class RacingCounters(_PollCounters):
+        __slots__ = ()
+
+        def dirty(self):
+            # The vote arrives right after eviction decided the poll was clean
+            clean = super().dirty()
+            voter.start()
+            voter.join(0.2)
+            return clean
+
+    counters.__class__ = RacingCounters
+    evicted = engine._evict_if_clean(counters_map, 2, counters)
+    voter.join()
+
+    # Either the poll stayed resident with the vote, or the vote was reported uncounted
+    assert counted == [not evicted]
+    if not evicted:
+        assert engine.counts(2) == {10: 0, 11: 1}
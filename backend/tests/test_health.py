@@ -0,0 +1,19 @@
+from sqlalchemy import create_engine, inspect
+
+import main
+from core.migrations import discover_migrations, pending_migrations
+
+def test_readiness_reports_pending_migrations_without_ddl(client, monkeypatch, tmp_path):
+    empty = create_engine(f"sqlite:///{tmp_path}/empty.db")
+    monkeypatch.setattr(main, "engine", empty)
+    monkeypatch.setattr(main, "_schema_current", False)
+
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["pending"] == [migration.version for migration in discover_migrations()]
+    assert inspect(empty).get_table_names() == []
+
+def test_readiness_on_current_schema(client, monkeypatch):
+    monkeypatch.setattr(main, "_schema_current", False)
+    assert pending_migrations(main.engine) == []
+    assert client.get("/health/ready").json() == {"status": "ready"}
@@ -0,0 +1,40 @@
+import asyncio
+
+from routers.stream import stream_poll_ws
+from services.stream_service import stream_hub
+
+class ClosingWebSocket:
+    """A WebSocket whose client disconnects right after the snapshot."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def receive(self):
+        return {"type": "websocket.disconnect", "code": 1000}
+
+def test_websocket_unsubscribes_when_client_leaves_a_quiet_poll(client, register):
+    _, headers = register()
+    poll = client.post("/polls/", json={"title": "Quiet", "description": "", "options": ["a", "b"]}, headers=headers).json()
+    websocket = ClosingWebSocket()
+
+    # No update ever arrives; the disconnect alone must end the handler
+    asyncio.run(asyncio.wait_for(stream_poll_ws(websocket, poll["id"]), 2))
+    assert [message["type"] for message in websocket.sent] == ["snapshot"]
+    assert stream_hub.subscriber_count(poll["id"]) == 0
+
+def test_websocket_still_delivers_updates(client, register):
+    _, headers = register()
+    poll = client.post("/polls/", json={"title": "Busy", "description": "", "options": ["a", "b"]}, headers=headers).json()
+    option_id = poll["options"][0]["id"]
+
+    with client.websocket_connect(f"/polls/{poll['id']}/stream") as websocket:
+        assert websocket.receive_json()["type"] == "snapshot"
+        assert client.post(f"/polls/{poll['id']}/vote", json={"option_id": option_id}, headers=headers).status_code == 200
+        update = websocket.receive_json()
+        assert update["type"] == "delta" and update["options"] == {str(option_id): 1}
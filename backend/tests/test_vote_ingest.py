@@ -0,0 +1,183 @@
+import json
+import os
+import threading
+
+import pytest
+
+from core.database import SessionLocal
+from models.models import User, Vote
+from schemas.schemas import VoteBatchItem
+from services import vote_ingest
+from services.vote_batch_service import submit_buffered_batch
+from services.vote_ingest import VoteIngester, VoteRejected
+
+@pytest.fixture
+def poll(client, register):
+    """A poll with two options, as (poll id, [option ids])."""
+    _, headers = register()
+    response = client.post("/polls/", json={"title": "Lunch?", "description": "", "options": ["Yes", "No"]}, headers=headers)
+    assert response.status_code == 200, response.text
+    details = response.json()
+    return details["id"], [option["id"] for option in details["options"]]
+
+@pytest.fixture
+def voters(client, register):
+    db = SessionLocal()
+    try:
+        return [db.query(User.id).filter(User.username == register()[0]).scalar() for _ in range(3)]
+    finally:
+        db.close()
+
+@pytest.fixture
+def make_ingester(tmp_path):
+    started = []
+
+    def make(fsync_mode: str = "always") -> VoteIngester:
+        # A long interval: the tests flush explicitly
+        ingester = VoteIngester(str(tmp_path), interval=60, batch_size=1000, fsync_mode=fsync_mode, max_polls=100)
+        ingester.start()
+        started.append(ingester)
+        return ingester
+
+    yield make
+    for ingester in started:
+        if ingester._thread is not None:
+            ingester.stop()
+
+def stored_votes(poll_id: int) -> dict:
+    db = SessionLocal()
+    try:
+        return dict(db.query(Vote.user_id, Vote.option_id).filter(Vote.poll_id == poll_id).all())
+    finally:
+        db.close()
+
+def crash(ingester: VoteIngester):
+    """Stop the ingester's thread without flushing, and release its files as a dead process would."""
+    ingester.flush = lambda: None
+    ingester._stopping.set()
+    ingester._wake.set()
+    ingester._thread.join()
+    ingester._thread = None
+    ingester._journal.close()
+    ingester._slot_lock.close()
+
+def test_flush_writes_votes_and_removes_segment(make_ingester, poll, voters):
+    poll_id, option_ids = poll
+    ingester = make_ingester()
+    ingester.submit(poll_id, option_ids[0], voters[0])
+    ingester.submit(poll_id, option_ids[1], voters[1])
+    assert ingester.pending_counts(poll_id) == {option_ids[0]: 1, option_ids[1]: 1}
+
+    ingester.flush()
+    assert stored_votes(poll_id) == {voters[0]: option_ids[0], voters[1]: option_ids[1]}
+    assert ingester.pending_counts(poll_id) == {}
+    segments = [name for name in os.listdir(ingester.journal_dir) if name.startswith("votes-")]
+    assert segments == [os.path.basename(ingester._journal.name)]
+
+def test_replay_after_crash(make_ingester, poll, voters, tmp_path):
+    poll_id, option_ids = poll
+    ingester = make_ingester()
+    ingester.submit(poll_id, option_ids[0], voters[0])
+    ingester.submit(poll_id, option_ids[1], voters[1])
+    ingester.flush()
+    ingester.submit(poll_id, option_ids[1], voters[2])
+    # Crash: the process dies with the last vote journaled but never flushed
+    segment = ingester._journal.name
+    with open(segment, "a") as journal:
+        # A vote already committed (replays must be idempotent) and a torn last line
+        journal.write(json.dumps({"u": voters[0], "p": poll_id, "o": option_ids[1], "t": "2026-01-01T00:00:00+00:00"}) + "\n")
+        journal.write('{"u": 1, "p"')
+    crash(ingester)
+    assert stored_votes(poll_id) == {voters[0]: option_ids[0], voters[1]: option_ids[1]}
+
+    restarted = make_ingester()
+    assert restarted.journal_dir == ingester.journal_dir
+    assert not os.path.exists(segment)
+    assert stored_votes(poll_id) == {voters[0]: option_ids[0], voters[1]: option_ids[1], voters[2]: option_ids[1]}
+
+def test_rejected_vote_is_dead_lettered_without_blocking_the_batch(make_ingester, poll, voters, monkeypatch):
+    poll_id, option_ids = poll
+    ingester = make_ingester()
+    ingester.submit(poll_id, option_ids[0], voters[0])
+    ingester.submit(poll_id, option_ids[1], voters[1])
+    insert_new_votes = vote_ingest.insert_new_votes
+
+    def reject_second_voter(db, rows):
+        if any(row["user_id"] == voters[1] for row in rows):
+            raise ValueError("rejected by the database")
+        return insert_new_votes(db, rows)
+
+    monkeypatch.setattr(vote_ingest, "insert_new_votes", reject_second_voter)
+    ingester.flush()
+
+    assert stored_votes(poll_id) == {voters[0]: option_ids[0]}
+    assert ingester.stats()["dead_lettered"] == 1
+    with open(os.path.join(ingester.journal_dir, "dead-letter.jsonl")) as dead_letters:
+        assert [json.loads(line)["u"] for line in dead_letters] == [voters[1]]
+    assert ingester.pending_counts(poll_id) == {}
+    # The vote was never recorded, so the voter may vote again
+    monkeypatch.setattr(vote_ingest, "insert_new_votes", insert_new_votes)
+    ingester.submit(poll_id, option_ids[0], voters[1])
+    ingester.flush()
+    assert stored_votes(poll_id)[voters[1]] == option_ids[0]
+
+def test_duplicate_votes(make_ingester, poll, voters):
+    poll_id, option_ids = poll
+    ingester = make_ingester()
+    ingester.submit(poll_id, option_ids[0], voters[0])
+    with pytest.raises(VoteRejected) as rejected:
+        ingester.submit(poll_id, option_ids[1], voters[0])
+    assert rejected.value.detail == "You have already voted on this poll"
+
+    # Recorded meanwhile by another worker: skipped at flush time, not failed
+    db = SessionLocal()
+    db.add(Vote(user_id=voters[1], poll_id=poll_id, option_id=option_ids[1]))
+    db.commit()
+    db.close()
+    ingester.submit(poll_id, option_ids[0], voters[1])
+    ingester.flush()
+    assert stored_votes(poll_id) == {voters[0]: option_ids[0], voters[1]: option_ids[1]}
+    assert ingester.stats()["dead_lettered"] == 0
+
+def test_buffered_batch_reports_repeated_polls_like_direct_mode(client, register, make_ingester, poll, voters):
+    poll_id, option_ids = poll
+    items = [
+        VoteBatchItem(poll_id=poll_id, option_id=option_ids[0]),
+        VoteBatchItem(poll_id=poll_id, option_id=option_ids[1]),
+        VoteBatchItem(poll_id=poll_id, option_id=-1),
+    ]
+    results, accepted = submit_buffered_batch(items, voters[0], make_ingester())
+    assert [result["status_code"] for result in results] == [202, 400, 400]
+    assert [result.get("detail") for result in results[1:]] == ["Poll appears more than once in this batch"] * 2
+
+    _, headers = register()
+    response = client.post("/votes/batch", json={"votes": [item.model_dump() for item in items]}, headers=headers)
+    assert response.status_code == 200, response.text
+    assert [result.get("detail") for result in response.json()["results"][1:]] == ["Poll appears more than once in this batch"] * 2
+
+def test_votes_and_reads_do_not_wait_for_segment_fsync(make_ingester, poll, voters, monkeypatch):
+    poll_id, option_ids = poll
+    ingester = make_ingester(fsync_mode="batch")
+    ingester.submit(poll_id, option_ids[0], voters[0])
+    syncing, release = threading.Event(), threading.Event()
+    fsync = os.fsync
+
+    def slow_fsync(fd):
+        syncing.set()
+        release.wait(5)
+        fsync(fd)
+
+    monkeypatch.setattr(vote_ingest.os, "fsync", slow_fsync)
+    flusher = threading.Thread(target=ingester.flush)
+    flusher.start()
+    assert syncing.wait(5)
+    # The rotated segment is being synced; votes and reads must not wait for it
+    voter = threading.Thread(target=lambda: ingester.submit(poll_id, option_ids[1], voters[1]))
+    voter.start()
+    voter.join(1)
+    assert not voter.is_alive()
+    assert ingester.pending_counts(poll_id) == {option_ids[0]: 1, option_ids[1]: 1}
+    release.set()
+    flusher.join()
+    ingester.flush()
+    assert stored_votes(poll_id) == {voters[0]: option_ids[0], voters[1]: option_ids[1]}
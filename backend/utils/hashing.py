@@ -0,0 +1,115 @@
+"""Run bcrypt in a dedicated, size-bounded process pool.
+
+bcrypt costs a few hundred milliseconds of CPU per call. Running it in worker
+processes keeps that work off the request threadpool and out of the server
+process's GIL. At most PASSWORD_HASH_MAX_PENDING operations may be queued or
+running at once; beyond that ``HashingBusy`` is raised immediately so callers
+can reject the request instead of queueing behind a login storm.
+"""
+import asyncio
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_all_start_methods, get_context
+from typing import Optional
+
+from core.config import BCRYPT_ROUNDS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_START_METHOD, PASSWORD_HASH_WORKERS
+from utils.auth import get_password_hash, verify_password
+
+class HashingBusy(Exception):
+    """The hashing pool is saturated; retry later."""
+
+def _hash(password: str, rounds: int) -> str:
+    return get_password_hash(password, rounds)
+
+def _verify(password: str, hashed_password: str) -> bool:
+    return verify_password(password, hashed_password)
+
+class PasswordHasher:
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self.rejected = 0
+
+    def start(self):
+        """Start the worker processes.
+
+        Call this at startup, before other threads exist: with the fork start
+        method all workers are launched on the first submit.
+        """
+        if self.workers > 0:
+            self._get_executor().submit(int).result()
+
+    def shutdown(self, wait: bool = False):
+        """Cancel queued work; ``wait`` also lets running calls finish and the workers exit."""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def hash(self, password: str) -> str:
+        return self._wait(self._submit(_hash, password, BCRYPT_ROUNDS))
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        return self._wait(self._submit(_verify, password, hashed_password))
+
+    async def hash_async(self, password: str) -> str:
+        return await self._wait_async(self._submit(_hash, password, BCRYPT_ROUNDS))
+
+    async def verify_async(self, password: str, hashed_password: str) -> bool:
+        return await self._wait_async(self._submit(_verify, password, hashed_password))
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "max_pending": self.max_pending, "rejected": self.rejected}
+
+    def _wait(self, future: Future):
+        try:
+            return future.result()
+        except BrokenProcessPool:
+            self.shutdown()
+            raise HashingBusy()
+
+    async def _wait_async(self, future: Future):
+        try:
+            return await asyncio.wrap_future(future)
+        except BrokenProcessPool:
+            self.shutdown()
+            raise HashingBusy()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                # fork by default, so workers do not re-import the application module
+                method = PASSWORD_HASH_START_METHOD if PASSWORD_HASH_START_METHOD in get_all_start_methods() else "spawn"
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context(method))
+            return self._executor
+
+    def _submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingBusy()
+        
+        if self.workers == 0:
+            # Inline mode: still bounded, but runs on the calling thread
+            future = Future()
+            try:
+                future.set_result(fn(*args))
+            except Exception as exc:
+                future.set_exception(exc)
+            finally:
+                self._slots.release()
+            return future
+        
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self.shutdown()
+            raise HashingBusy()
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING)